@@ -1,141 +1,724 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import hashlib
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
-from app.models.menu import MenuItem as MenuItemModel, Category as CategoryModel
-from app.schemas.menu import MenuItem, MenuItemCreate, MenuItemUpdate, Category, CategoryCreate, CategoryUpdate, MenuItemWithCategory, CategoryWithItems
+from app.core.bulk import bulk_insert, bulk_upsert, chunked, existing_rows, read_rows, row_values, validate_rows
+from app.core.cache import decode_response, encode_response, menu_cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db, get_read_db, read_engine, reads_primary
+from app.core.events import menu_events
+from app.core.history import read_history, table as history
+from app.core.http_cache import is_not_modified, not_modified, row_version, validator_headers, version_etag
+from app.core.outbox import change, outbox_relay, read_changes, record_changes
+from app.core.pagination import NEXT_CURSOR_HEADER, keyset_filter, next_cursor
+from app.core.restaurants import lookup_restaurants, require_restaurant, restaurant_directory, restaurant_error
+from app.core.search import search_backend
+from app.core.serialization import dump_rows, parse_fields, projection, schema_columns, stream_format, stream_rows
+from app.core.singleflight import Once, menu_item_reads, menu_items_reads
+from app.models.menu import MenuItem as MenuItemModel, Category as CategoryModel, category_display_order_key
+from app.schemas.menu import MenuItem, MenuItemCreate, MenuItemUpdate, Category, CategoryCreate, CategoryUpdate, MenuItemWithCategory, CategoryWithItems, MenuSnapshot, MenuItemSearchResult
+from app.schemas.menu import BulkDelete, BulkResult, CategoryBulkUpsert, MenuItemBulkUpdate, MenuItemBulkUpsert
+from app.schemas.menu import MenuItemAvailability, MenuItemAvailabilityResult, MenuItemBulkAvailability
+from app.schemas.menu import ChangeBatch, ChangeFeed, MenuItemHistory
 
 menu_router = APIRouter()
 
+# List endpoints select these columns as plain rows and encode them with orjson (see core/serialization.py)
+CATEGORY_COLUMNS = schema_columns(CategoryModel, Category.__fields__)
+MENU_ITEM_COLUMNS = schema_columns(MenuItemModel, MenuItem.__fields__)
+
+def _encode_json(payload: Any) -> bytes:
+    return json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+
+async def _cached(request: Request, key: str) -> Optional[bytes]:
+    """The cached response, except for a client that just wrote: its reads go to the primary instead."""
+    if reads_primary(request):
+        return None
+    return await menu_cache.get(key)
+
+def _cached_response(value: bytes, request: Optional[Request] = None) -> Response:
+    body, headers = decode_response(value)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+AVAILABILITY_COLUMNS = (MenuItemModel.id, MenuItemModel.restaurant_id, MenuItemModel.is_available, MenuItemModel.updated_at)
+
+async def _set_availability(db: AsyncSession, is_available: bool, *conditions) -> List[Dict[str, Any]]:
+    """Flip availability with a single UPDATE ... RETURNING instead of loading, changing and refreshing each item."""
+    rows = await db.execute(
+        update(MenuItemModel).where(*conditions).values(is_available=is_available).returning(*AVAILABILITY_COLUMNS)
+    )
+    rows = [dict(row._mapping) for row in rows]
+    await record_changes(db, (
+        change("menu_item", "updated", row["id"], row["restaurant_id"], {"is_available": is_available}) for row in rows
+    ))
+    return rows
+
+async def _availability_changed(restaurant_id: int, rows: List[Dict[str, Any]]):
+    outbox_relay.wake()
+    await menu_cache.invalidate_restaurant(restaurant_id)
+    items = [{key: row[key] for key in ("id", "is_available", "updated_at")} for row in rows]
+    await menu_events.publish(restaurant_id, "availability", jsonable_encoder({"restaurant_id": restaurant_id, "items": items}))
+
+# Whole-menu snapshot
+@menu_router.get("/restaurants/{restaurant_id}/menu", response_model=MenuSnapshot)
+async def get_restaurant_menu(restaurant_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
+    cache_key = menu_cache.key("snapshot", restaurant_id=restaurant_id)
+    cached = await _cached(request, cache_key)
+    if cached is not None:
+        return _cached_response(cached, request)
+
+    # Three set-based queries regardless of menu size: categories, their items (selectin) and
+    # the items that are not in any category
+    categories = (await db.scalars(
+        select(CategoryModel)
+        .where(CategoryModel.restaurant_id == restaurant_id)
+        .options(selectinload(CategoryModel.items))
+        .order_by(category_display_order_key, CategoryModel.id)
+    )).all()
+    uncategorized_items = (await db.scalars(
+        select(MenuItemModel)
+        .where(MenuItemModel.restaurant_id == restaurant_id, MenuItemModel.category_id.is_(None))
+        .order_by(MenuItemModel.id)
+    )).all()
+
+    content = {
+        "categories": jsonable_encoder([CategoryWithItems.from_orm(category) for category in categories]),
+        "uncategorized_items": jsonable_encoder([MenuItem.from_orm(item) for item in uncategorized_items]),
+    }
+    # The version is a digest of the menu content, so it changes exactly when the menu does
+    version = hashlib.sha1(json.dumps(content, separators=(",", ":")).encode()).hexdigest()
+    snapshot = {"restaurant_id": restaurant_id, "version": version, **content}
+    headers = {"ETag": f'"{version}"', "Cache-Control": settings.HTTP_CACHE_CONTROL_MENU_SNAPSHOT}
+
+    value = encode_response(json.dumps(snapshot, separators=(",", ":")).encode(), headers)
+    await menu_cache.set(cache_key, value, restaurant_id)
+    return _cached_response(value, request)
+
+# Live menu changes
+@menu_router.get("/restaurants/{restaurant_id}/events")
+async def stream_menu_events(restaurant_id: int):
+    """
+    Server-Sent Events stream of the restaurant's menu changes, so storefronts update without
+    polling the listings. `availability` events carry the items whose is_available changed; a
+    `reset` event means the client fell behind and should refetch the menu.
+    """
+    return StreamingResponse(
+        menu_events.stream(restaurant_id, settings.EVENTS_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        # X-Accel-Buffering stops nginx from holding events back in its buffer
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Change feeds
+@menu_router.get("/changes", response_model=ChangeFeed)
+async def get_menu_changes(
+    since: int = Query(0, ge=0, description="Last sequence number already processed; 0 for the oldest kept"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Category and menu item changes after `since`, oldest first, for consumers syncing incrementally
+    instead of re-reading the listings. Events are kept OUTBOX_RETENTION_HOURS; a 410 means the
+    consumer fell further behind than that and must resync.
+    """
+    return await read_changes(db, since, limit)
+
+@menu_router.post("/restaurants/changes", status_code=204)
+async def restaurant_changes(batch: ChangeBatch):
+    """
+    Receives restaurant-service's change events (its outbox webhook sink), so the next write
+    referencing a changed restaurant looks it up again instead of trusting the cached answer.
+    """
+    restaurant_directory.invalidate(event.entity_id for event in batch.events if event.entity == "restaurant")
+    return Response(status_code=204)
+
+# Price and availability history
+@menu_router.get("/items/{item_id}/history", response_model=List[MenuItemHistory])
+async def get_menu_item_history(
+    item_id: int,
+    response: Response,
+    since: Optional[datetime] = Query(None, description="Oldest changed_at to return, inclusive"),
+    until: Optional[datetime] = Query(None, description="Newest changed_at to return, exclusive"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Price and availability writes to one menu item, oldest first, from the partitioned history
+    table rather than menu_items. The first row is the item's state when history started or its
+    creation.
+    """
+    rows, cursor_value = await read_history(db, history.c.menu_item_id == item_id, since, until, cursor, limit)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return rows
+
+@menu_router.get("/restaurants/{restaurant_id}/history", response_model=List[MenuItemHistory])
+async def get_restaurant_history(
+    restaurant_id: int,
+    response: Response,
+    since: Optional[datetime] = Query(None, description="Oldest changed_at to return, inclusive"),
+    until: Optional[datetime] = Query(None, description="Newest changed_at to return, exclusive"),
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Price and availability writes to all of a restaurant's menu items in a time range, oldest first,
+    for analytics and disputes without snapshot dumps of menu_items. Only the monthly partitions
+    overlapping since/until are read.
+    """
+    rows, cursor_value = await read_history(db, history.c.restaurant_id == restaurant_id, since, until, cursor, limit)
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return rows
+
+# Search
+@menu_router.get("/search", response_model=List[MenuItemSearchResult])
+async def search_menu_items(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    restaurant_id: Optional[int] = None,
+    is_vegetarian: Optional[bool] = None,
+    is_vegan: Optional[bool] = None,
+    is_gluten_free: Optional[bool] = None,
+    is_available: Optional[bool] = None,
+    spice_level: Optional[int] = Query(None, ge=0, le=5, description="Only items at or below this spice level"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
+):
+    filters = {
+        "restaurant_id": restaurant_id,
+        "is_vegetarian": is_vegetarian,
+        "is_vegan": is_vegan,
+        "is_gluten_free": is_gluten_free,
+        "is_available": is_available,
+        "spice_level": spice_level,
+    }
+    cache_key = menu_cache.key("search", q=q.lower(), limit=limit, **filters)
+    cached = await _cached(request, cache_key)
+    if cached is not None:
+        return _cached_response(cached)
+
+    hits = await search_backend.search(db, q, filters, limit)
+    results = [{**jsonable_encoder(MenuItem.from_orm(item)), "score": score} for item, score in hits]
+    value = encode_response(json.dumps(results, separators=(",", ":")).encode())
+    await menu_cache.set(cache_key, value, restaurant_id)
+    return _cached_response(value)
+
 # Category endpoints
 @menu_router.post("/categories/", response_model=Category)
-def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
-    db_category = CategoryModel(**category.dict())
+async def create_category(category: CategoryCreate, db: AsyncSession = Depends(get_async_db)):
+    await require_restaurant(category.restaurant_id)
+    data = category.dict()
+    db_category = CategoryModel(**data)
     db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    await db.flush()
+    await record_changes(db, [change("category", "created", db_category.id, db_category.restaurant_id, data)])
+    await db.commit()
+    await db.refresh(db_category)
+    outbox_relay.wake()
+    await menu_cache.invalidate_restaurant(db_category.restaurant_id)
     return db_category
 
 @menu_router.get("/categories/", response_model=List[Category])
-def get_categories(
+async def get_categories(
+    request: Request,
     restaurant_id: Optional[int] = None,
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=settings.MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; replaces skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,display_order"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(CategoryModel)
-    
+    selected = parse_fields(fields, Category.__fields__)
+    cache_key = menu_cache.key(
+        "categories",
+        restaurant_id=restaurant_id,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        fields=selected and ",".join(selected),
+    )
+    cached = await _cached(request, cache_key)
+    if cached is not None:
+        return _cached_response(cached)
+
+    # Only the requested columns are selected; the sort keys are added when missing so the cursor can be built
+    query = select(*projection(CATEGORY_COLUMNS, selected, required=("display_order", "id")))
+
     if restaurant_id:
-        query = query.filter(CategoryModel.restaurant_id == restaurant_id)
-    
-    return query.offset(skip).limit(limit).all()
+        query = query.where(CategoryModel.restaurant_id == restaurant_id)
+
+    # Keyset ordering on (display_order, id) so deep pages cost the same as the first one
+    keys = [category_display_order_key, CategoryModel.id]
+    query = query.order_by(*keys)
+    if cursor:
+        query = query.where(keyset_filter(keys, cursor))
+    else:
+        query = query.offset(skip)
+
+    rows = (await db.execute(query.limit(limit))).all()
+    cursor_value = next_cursor(rows, limit, lambda c: [c.display_order or 0, c.id])
+    headers = {NEXT_CURSOR_HEADER: cursor_value} if cursor_value else {}
+    value = encode_response(dump_rows(rows, selected), headers)
+    await menu_cache.set(cache_key, value, restaurant_id)
+    return _cached_response(value)
 
 @menu_router.get("/categories/{category_id}", response_model=CategoryWithItems)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
+async def get_category(request: Request, category_id: int, db: AsyncSession = Depends(get_read_db)):
+    cache_key = menu_cache.key("category", id=category_id)
+    cached = await _cached(request, cache_key)
+    if cached is not None:
+        return _cached_response(cached)
+
+    # Relationships cannot lazy-load under asyncio, so the items are fetched up front
+    db_category = await db.get(CategoryModel, category_id, options=[selectinload(CategoryModel.items)])
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    return db_category
+
+    value = encode_response(_encode_json(CategoryWithItems.from_orm(db_category)))
+    await menu_cache.set(cache_key, value, db_category.restaurant_id)
+    return _cached_response(value)
 
 @menu_router.put("/categories/{category_id}", response_model=Category)
-def update_category(
-    category_id: int, 
-    category: CategoryUpdate, 
-    db: Session = Depends(get_db)
+async def update_category(
+    category_id: int,
+    category: CategoryUpdate,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
+    db_category = await db.get(CategoryModel, category_id)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    
+
     update_data = category.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_category, key, value)
-    
-    db.commit()
-    db.refresh(db_category)
+
+    await record_changes(db, [change("category", "updated", category_id, db_category.restaurant_id, update_data)])
+    await db.commit()
+    await db.refresh(db_category)
+    outbox_relay.wake()
+    await menu_cache.invalidate_restaurant(db_category.restaurant_id)
     return db_category
 
 @menu_router.delete("/categories/{category_id}", response_model=Category)
-def delete_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = db.query(CategoryModel).filter(CategoryModel.id == category_id).first()
+async def delete_category(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_category = await db.get(CategoryModel, category_id, options=[selectinload(CategoryModel.items)])
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    db.delete(db_category)
-    db.commit()
+
+    await db.delete(db_category)
+    await record_changes(db, [change("category", "deleted", category_id, db_category.restaurant_id)])
+    await db.commit()
+    outbox_relay.wake()
+    await menu_cache.invalidate_restaurant(db_category.restaurant_id)
     return db_category
 
 # Menu item endpoints
 @menu_router.post("/items/", response_model=MenuItem)
-def create_menu_item(menu_item: MenuItemCreate, db: Session = Depends(get_db)):
-    db_menu_item = MenuItemModel(**menu_item.dict())
+async def create_menu_item(
+    menu_item: MenuItemCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    await require_restaurant(menu_item.restaurant_id)
+    data = menu_item.dict()
+    db_menu_item = MenuItemModel(**data)
     db.add(db_menu_item)
-    db.commit()
-    db.refresh(db_menu_item)
+    await db.flush()
+    await record_changes(db, [change("menu_item", "created", db_menu_item.id, db_menu_item.restaurant_id, data)])
+    await db.commit()
+    await db.refresh(db_menu_item)
+    outbox_relay.wake()
+    await menu_cache.invalidate_restaurant(db_menu_item.restaurant_id)
+    background_tasks.add_task(search_backend.sync_items, [db_menu_item.id])
     return db_menu_item
 
 @menu_router.get("/items/", response_model=List[MenuItem])
-def get_menu_items(
+async def get_menu_items(
+    request: Request,
     restaurant_id: Optional[int] = None,
     category_id: Optional[int] = None,
     is_vegetarian: Optional[bool] = None,
     is_vegan: Optional[bool] = None,
     is_gluten_free: Optional[bool] = None,
-    skip: int = 0, 
-    limit: int = 100, 
-    db: Session = Depends(get_db)
+    is_available: Optional[bool] = None,
+    skip: int = 0,
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE, description="Rows to return; 100 by default, all when streamed"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; replaces skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,price,image_url"),
+    stream: bool = Query(False, description="Stream the rows as one chunked JSON array; Accept: application/x-ndjson streams NDJSON"),
 ):
-    query = db.query(MenuItemModel)
-    
+    selected = parse_fields(fields, MenuItem.__fields__)
+    # Streamed listings (exports) bypass the cache and have no page size unless asked for
+    format = stream_format(request, stream)
+    if format is None and limit is None:
+        limit = 100
+    cache_key = menu_cache.key(
+        "items",
+        restaurant_id=restaurant_id,
+        category_id=category_id,
+        is_vegetarian=is_vegetarian,
+        is_vegan=is_vegan,
+        is_gluten_free=is_gluten_free,
+        is_available=is_available,
+        skip=skip,
+        limit=limit,
+        cursor=cursor,
+        fields=selected and ",".join(selected),
+    )
+    cached = await _cached(request, cache_key) if format is None else None
+    if cached is not None:
+        return _cached_response(cached)
+
+    query = select(*projection(MENU_ITEM_COLUMNS, selected, required=("id",)))
+
     if restaurant_id:
-        query = query.filter(MenuItemModel.restaurant_id == restaurant_id)
-    
+        query = query.where(MenuItemModel.restaurant_id == restaurant_id)
+
     if category_id:
-        query = query.filter(MenuItemModel.category_id == category_id)
-    
+        query = query.where(MenuItemModel.category_id == category_id)
+
     if is_vegetarian is not None:
-        query = query.filter(MenuItemModel.is_vegetarian == is_vegetarian)
-    
+        query = query.where(MenuItemModel.is_vegetarian == is_vegetarian)
+
     if is_vegan is not None:
-        query = query.filter(MenuItemModel.is_vegan == is_vegan)
-    
+        query = query.where(MenuItemModel.is_vegan == is_vegan)
+
     if is_gluten_free is not None:
-        query = query.filter(MenuItemModel.is_gluten_free == is_gluten_free)
-    
-    return query.offset(skip).limit(limit).all()
+        query = query.where(MenuItemModel.is_gluten_free == is_gluten_free)
+
+    if is_available is not None:
+        query = query.where(MenuItemModel.is_available == is_available)
+
+    query = query.order_by(MenuItemModel.id)
+    if cursor:
+        query = query.where(keyset_filter([MenuItemModel.id], cursor))
+    else:
+        query = query.offset(skip)
+
+    if format is not None:
+        return stream_rows(query if limit is None else query.limit(limit), selected, format, read_engine(request))
+
+    async def load(engine: AsyncEngine) -> bytes:
+        # Shared by every concurrent request for this page, so it runs in its own session
+        async with AsyncSessionLocal(bind=engine) as db:
+            rows = (await db.execute(query.limit(limit))).all()
+        cursor_value = next_cursor(rows, limit, lambda i: [i.id])
+        headers = {NEXT_CURSOR_HEADER: cursor_value} if cursor_value else {}
+        value = encode_response(dump_rows(rows, selected), headers)
+        await menu_cache.set(cache_key, value, restaurant_id)
+        return value
+
+    # A cold or just invalidated page hit by many requests at once is queried and serialized once;
+    # clients that just wrote only share a load from the primary
+    value = await menu_items_reads.do((cache_key, reads_primary(request)), lambda: load(read_engine(request)))
+    return _cached_response(value)
 
 @menu_router.get("/items/{item_id}", response_model=MenuItemWithCategory)
-def get_menu_item(item_id: int, db: Session = Depends(get_db)):
-    db_menu_item = db.query(MenuItemModel).filter(MenuItemModel.id == item_id).first()
-    if db_menu_item is None:
+async def get_menu_item(item_id: int, request: Request):
+    cache_key = menu_cache.key("item", id=item_id)
+    cached = await _cached(request, cache_key)
+    if cached is not None:
+        return _cached_response(cached, request)
+
+    async def load(engine: AsyncEngine) -> Optional[Tuple[Dict[str, str], Once]]:
+        # Shared by every concurrent request for this item, so it runs in its own session
+        async with AsyncSessionLocal(bind=engine) as db:
+            db_menu_item = await db.get(MenuItemModel, item_id, options=[selectinload(MenuItemModel.category)])
+        if db_menu_item is None:
+            return None
+        # The embedded category is part of the body, so its changes count towards the version too
+        version = row_version(db_menu_item, db_menu_item.category)
+        headers = validator_headers(version_etag("item", item_id, version), version, settings.HTTP_CACHE_CONTROL_MENU_ITEM)
+
+        async def serialize() -> bytes:
+            value = encode_response(_encode_json(MenuItemWithCategory.from_orm(db_menu_item)), headers)
+            await menu_cache.set(cache_key, value, db_menu_item.restaurant_id)
+            return value
+
+        return headers, Once(serialize)
+
+    # A popular item that just dropped out of the cache is loaded once, not once per request
+    loaded = await menu_item_reads.do((cache_key, reads_primary(request)), lambda: load(read_engine(request)))
+    if loaded is None:
         raise HTTPException(status_code=404, detail="Menu item not found")
-    return db_menu_item
+
+    # Revalidating clients get their 304 before anything is serialized; the others share one serialization
+    headers, value = loaded
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return _cached_response(await value.get())
 
 @menu_router.put("/items/{item_id}", response_model=MenuItem)
-def update_menu_item(
-    item_id: int, 
-    menu_item: MenuItemUpdate, 
-    db: Session = Depends(get_db)
+async def update_menu_item(
+    item_id: int,
+    menu_item: MenuItemUpdate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_menu_item = db.query(MenuItemModel).filter(MenuItemModel.id == item_id).first()
+    db_menu_item = await db.get(MenuItemModel, item_id)
     if db_menu_item is None:
         raise HTTPException(status_code=404, detail="Menu item not found")
-    
+
     update_data = menu_item.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_menu_item, key, value)
-    
-    db.commit()
-    db.refresh(db_menu_item)
+
+    await record_changes(db, [change("menu_item", "updated", item_id, db_menu_item.restaurant_id, update_data)])
+    await db.commit()
+    await db.refresh(db_menu_item)
+    outbox_relay.wake()
+    if "is_available" in update_data:
+        await _availability_changed(db_menu_item.restaurant_id, [MenuItem.from_orm(db_menu_item).dict()])
+    else:
+        await menu_cache.invalidate_restaurant(db_menu_item.restaurant_id)
+    background_tasks.add_task(search_backend.sync_items, [item_id])
     return db_menu_item
 
+@menu_router.patch("/items/{item_id}/availability", response_model=MenuItemAvailabilityResult)
+async def set_menu_item_availability(
+    item_id: int,
+    availability: MenuItemAvailability,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    rows = await _set_availability(db, availability.is_available, MenuItemModel.id == item_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="Menu item not found")
+    await db.commit()
+
+    await _availability_changed(rows[0]["restaurant_id"], rows)
+    background_tasks.add_task(search_backend.sync_items, [item_id])
+    return rows[0]
+
+@menu_router.patch("/restaurants/{restaurant_id}/items/availability", response_model=List[MenuItemAvailabilityResult])
+async def set_restaurant_items_availability(
+    restaurant_id: int,
+    availability: MenuItemBulkAvailability,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Set availability on the listed items of the restaurant, on the items of one category, or on the
+    whole menu when neither is given. Returns the items that were changed; ids of other
+    restaurants' items are ignored.
+    """
+    conditions = [MenuItemModel.restaurant_id == restaurant_id]
+    if availability.category_id is not None:
+        conditions.append(MenuItemModel.category_id == availability.category_id)
+
+    rows: List[Dict[str, Any]] = []
+    if availability.item_ids is None:
+        rows = await _set_availability(db, availability.is_available, *conditions)
+    else:
+        for batch in chunked(availability.item_ids, settings.BULK_BATCH_SIZE):
+            rows.extend(await _set_availability(db, availability.is_available, *conditions, MenuItemModel.id.in_(batch)))
+    await db.commit()
+
+    if rows:
+        await _availability_changed(restaurant_id, rows)
+        background_tasks.add_task(search_backend.sync_items, [row["id"] for row in rows])
+    return rows
+
 @menu_router.delete("/items/{item_id}", response_model=MenuItem)
-def delete_menu_item(item_id: int, db: Session = Depends(get_db)):
-    db_menu_item = db.query(MenuItemModel).filter(MenuItemModel.id == item_id).first()
+async def delete_menu_item(item_id: int, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    db_menu_item = await db.get(MenuItemModel, item_id)
     if db_menu_item is None:
         raise HTTPException(status_code=404, detail="Menu item not found")
-    
-    db.delete(db_menu_item)
-    db.commit()
-    return db_menu_item
\ No newline at end of file
+
+    await db.delete(db_menu_item)
+    await record_changes(db, [change("menu_item", "deleted", item_id, db_menu_item.restaurant_id)])
+    await db.commit()
+    outbox_relay.wake()
+    await menu_cache.invalidate_restaurant(db_menu_item.restaurant_id)
+    background_tasks.add_task(search_backend.sync_items, [item_id])
+    return db_menu_item
+
+# Bulk endpoints
+# Per-row results are plain dicts returned as a JSONResponse: re-validating tens of thousands of
+# BulkRowResult models through response_model would cost more than the writes themselves
+def _row_result(index: int, id: Optional[int] = None, status: str = "invalid", error: Any = None) -> Dict[str, Any]:
+    return {"index": index, "id": id, "status": status, "error": error}
+
+def _bulk_result(results: List[Dict[str, Any]]) -> JSONResponse:
+    results.sort(key=lambda r: r["index"])
+    counts = {"created": 0, "updated": 0, "deleted": 0}
+    for r in results:
+        if r["status"] in counts:
+            counts[r["status"]] += 1
+    return JSONResponse({**counts, "failed": len(results) - sum(counts.values()), "results": results})
+
+def _reject_duplicate_ids(valid, results: List[Dict[str, Any]]):
+    """Keep the first row for each id; Postgres cannot update one row twice in a single statement."""
+    seen, unique = set(), []
+    for index, row in valid:
+        if row.id is not None and row.id in seen:
+            results.append(_row_result(index=index, id=row.id, status="invalid", error="Duplicate id in request"))
+            continue
+        seen.add(row.id)
+        unique.append((index, row))
+    return unique
+
+async def _upsert_rows(db: AsyncSession, model, entity: str, valid, results: List[Dict[str, Any]]) -> set:
+    """Insert rows without an id and upsert rows whose id exists; returns the restaurant ids touched."""
+    existing = await existing_rows(db, model, [row.id for _, row in valid if row.id is not None], lock=True)
+    inserts, upserts = [], []
+    for index, row in valid:
+        if row.id is None:
+            inserts.append((index, row))
+        elif row.id in existing:
+            upserts.append((index, row))
+        else:
+            results.append(_row_result(index=index, id=row.id, status="not_found", error="Row not found"))
+
+    inserted = [row_values(row, exclude=("id",)) for _, row in inserts]
+    new_ids = await bulk_insert(db, model, inserted)
+    results.extend(_row_result(index=index, id=new_id, status="created") for (index, _), new_id in zip(inserts, new_ids))
+    upserted = [row_values(row) for _, row in upserts]
+    await bulk_upsert(db, model, upserted)
+    results.extend(_row_result(index=index, id=row.id, status="updated") for index, row in upserts)
+
+    await record_changes(db, [
+        *(change(entity, "created", new_id, values["restaurant_id"], values) for values, new_id in zip(inserted, new_ids)),
+        *(change(entity, "updated", values["id"], values["restaurant_id"], values) for values in upserted),
+    ])
+
+    touched = {row.restaurant_id for _, row in inserts + upserts}
+    touched.update(existing[row.id] for _, row in upserts)
+    return touched
+
+async def _check_categories(db: AsyncSession, valid, results: List[Dict[str, Any]]):
+    """Drop rows that reference a category that does not exist instead of failing the whole batch."""
+    category_ids = [row.category_id for _, row in valid if row.category_id is not None]
+    known = await existing_rows(db, CategoryModel, category_ids)
+    checked = []
+    for index, row in valid:
+        if row.category_id is not None and row.category_id not in known:
+            results.append(_row_result(index=index, id=row.id, status="invalid", error="Category not found"))
+        else:
+            checked.append((index, row))
+    return checked
+
+async def _check_restaurants(valid, results: List[Dict[str, Any]]):
+    """Drop rows whose restaurant is unknown or inactive; one batched lookup covers the whole request."""
+    active = await lookup_restaurants(row.restaurant_id for _, row in valid)
+    checked = []
+    for index, row in valid:
+        error = restaurant_error(active[row.restaurant_id])
+        if error:
+            results.append(_row_result(index=index, id=row.id, status="invalid", error=error))
+        else:
+            checked.append((index, row))
+    return checked
+
+async def _invalidate_restaurants(restaurant_ids):
+    outbox_relay.wake()
+    for restaurant_id in restaurant_ids:
+        await menu_cache.invalidate_restaurant(restaurant_id)
+
+@menu_router.post("/categories/bulk", response_model=BulkResult)
+async def bulk_upsert_categories(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Create categories, or replace them when a row carries an existing id. Accepts a JSON array or NDJSON."""
+    valid, invalid = validate_rows(await read_rows(request), CategoryBulkUpsert)
+    results = [_row_result(index=index, status="invalid", error=errors) for index, errors in invalid]
+
+    valid = _reject_duplicate_ids(valid, results)
+    valid = await _check_restaurants(valid, results)
+    touched = await _upsert_rows(db, CategoryModel, "category", valid, results)
+    await db.commit()
+    await _invalidate_restaurants(touched)
+    return _bulk_result(results)
+
+@menu_router.post("/categories/bulk-delete", response_model=BulkResult)
+async def bulk_delete_categories(payload: BulkDelete, db: AsyncSession = Depends(get_async_db)):
+    touched, results, deleted = set(), [], {}
+    for batch in chunked(payload.ids, settings.BULK_BATCH_SIZE):
+        # Items keep existing without a category, matching the single-row delete
+        await db.execute(update(MenuItemModel).where(MenuItemModel.category_id.in_(batch)).values(category_id=None))
+        rows = await db.execute(
+            delete(CategoryModel).where(CategoryModel.id.in_(batch)).returning(CategoryModel.id, CategoryModel.restaurant_id)
+        )
+        deleted.update(rows.all())
+    await record_changes(db, (change("category", "deleted", id, restaurant_id) for id, restaurant_id in deleted.items()))
+    await db.commit()
+
+    for index, category_id in enumerate(payload.ids):
+        if category_id in deleted:
+            results.append(_row_result(index=index, id=category_id, status="deleted"))
+            touched.add(deleted[category_id])
+        else:
+            results.append(_row_result(index=index, id=category_id, status="not_found", error="Category not found"))
+    await _invalidate_restaurants(touched)
+    return _bulk_result(results)
+
+@menu_router.post("/items/bulk", response_model=BulkResult)
+async def bulk_upsert_menu_items(request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    """Create menu items, or replace them when a row carries an existing id. Accepts a JSON array or NDJSON."""
+    valid, invalid = validate_rows(await read_rows(request), MenuItemBulkUpsert)
+    results = [_row_result(index=index, status="invalid", error=errors) for index, errors in invalid]
+
+    valid = _reject_duplicate_ids(valid, results)
+    valid = await _check_restaurants(valid, results)
+    valid = await _check_categories(db, valid, results)
+    touched = await _upsert_rows(db, MenuItemModel, "menu_item", valid, results)
+    await db.commit()
+    await _invalidate_restaurants(touched)
+    background_tasks.add_task(search_backend.sync_items, [r["id"] for r in results if r["status"] in ("created", "updated")])
+    return _bulk_result(results)
+
+@menu_router.patch("/items/bulk", response_model=BulkResult)
+async def bulk_update_menu_items(request: Request, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    """Apply partial updates (for example price syncs) to existing menu items, each row identified by id."""
+    valid, invalid = validate_rows(await read_rows(request), MenuItemBulkUpdate)
+    results = [_row_result(index=index, status="invalid", error=errors) for index, errors in invalid]
+
+    valid = _reject_duplicate_ids(valid, results)
+    valid = await _check_categories(db, valid, results)
+    existing = await existing_rows(db, MenuItemModel, [row.id for _, row in valid], lock=True)
+    updates: List[Dict[str, Any]] = []
+    for index, row in valid:
+        if row.id in existing:
+            updates.append({"id": row.id, **row_values(row, exclude_unset=True)})
+            results.append(_row_result(index=index, id=row.id, status="updated"))
+        else:
+            results.append(_row_result(index=index, id=row.id, status="not_found", error="Menu item not found"))
+
+    # ORM bulk UPDATE by primary key: rows sharing the same set of columns go out as one executemany
+    for batch in chunked([u for u in updates if len(u) > 1], settings.BULK_BATCH_SIZE):
+        await db.execute(update(MenuItemModel), list(batch))
+    await record_changes(db, (change("menu_item", "updated", u["id"], existing[u["id"]], u) for u in updates if len(u) > 1))
+    await db.commit()
+    await _invalidate_restaurants({existing[u["id"]] for u in updates})
+    background_tasks.add_task(search_backend.sync_items, [u["id"] for u in updates])
+    return _bulk_result(results)
+
+@menu_router.post("/items/bulk-delete", response_model=BulkResult)
+async def bulk_delete_menu_items(payload: BulkDelete, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    results, deleted = [], {}
+    for batch in chunked(payload.ids, settings.BULK_BATCH_SIZE):
+        rows = await db.execute(
+            delete(MenuItemModel).where(MenuItemModel.id.in_(batch)).returning(MenuItemModel.id, MenuItemModel.restaurant_id)
+        )
+        deleted.update(rows.all())
+    await record_changes(db, (change("menu_item", "deleted", id, restaurant_id) for id, restaurant_id in deleted.items()))
+    await db.commit()
+
+    for index, item_id in enumerate(payload.ids):
+        if item_id in deleted:
+            results.append(_row_result(index=index, id=item_id, status="deleted"))
+        else:
+            results.append(_row_result(index=index, id=item_id, status="not_found", error="Menu item not found"))
+    await _invalidate_restaurants(set(deleted.values()))
+    background_tasks.add_task(search_backend.sync_items, list(deleted))
+    return _bulk_result(results)
@@ -0,0 +1,96 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Columns the database maintains itself and that bulk writes never set directly
+SERVER_COLUMNS = ("id", "created_at", "updated_at")
+
+async def read_rows(request: Request) -> List[Any]:
+    """Read the request body as either a JSON array or newline-delimited JSON objects."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    try:
+        if content_type in NDJSON_MEDIA_TYPES:
+            rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            rows = json.loads(body)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Malformed request body: {exc}")
+
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON rows")
+    if len(rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BULK_MAX_ROWS} rows per request")
+    return rows
+
+def validate_rows(rows: Sequence[Any], schema: Type[BaseModel]) -> Tuple[List[Tuple[int, BaseModel]], List[Tuple[int, Any]]]:
+    """Validate each row on its own so one bad row does not reject the whole batch."""
+    valid, invalid = [], []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, schema.parse_obj(row)))
+        except ValidationError as exc:
+            invalid.append((index, exc.errors()))
+    return valid, invalid
+
+def row_values(row: BaseModel, exclude: Sequence[str] = (), exclude_unset: bool = False) -> Dict[str, Any]:
+    """
+    Shallow equivalent of `row.dict()` for flat schemas.
+
+    Bulk payloads only hold scalar fields, and skipping pydantic's recursive export is an order of
+    magnitude faster once a request carries tens of thousands of rows.
+    """
+    fields = row.__fields_set__ if exclude_unset else row.__fields__
+    return {field: getattr(row, field) for field in fields if field not in exclude}
+
+def chunked(items: Sequence[T], size: int) -> Iterator[Sequence[T]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+async def existing_rows(db: AsyncSession, model, ids: Iterable[int], lock: bool = False) -> Dict[int, int]:
+    """Map each id that exists to its restaurant_id, optionally locking the rows for this transaction."""
+    found = {}
+    for batch in chunked(sorted(set(ids)), settings.BULK_BATCH_SIZE):
+        query = select(model.id, model.restaurant_id).where(model.id.in_(batch))
+        if lock:
+            query = query.with_for_update()
+        found.update((await db.execute(query)).all())
+    return found
+
+# Statements below go through the Core table rather than the ORM entity and are executed with a
+# list of parameter sets, so SQLAlchemy compiles them once and batches the rows itself
+# (insertmanyvalues / executemany) instead of rendering a new multi-row VALUES clause per call.
+
+async def bulk_insert(db: AsyncSession, model, rows: Sequence[Dict[str, Any]]) -> List[int]:
+    """Insert rows with batched INSERT ... RETURNING and return the new ids in row order."""
+    ids = []
+    table = model.__table__
+    # RETURNING order is not guaranteed to follow the VALUES order, here or across SQLAlchemy's
+    # insertmanyvalues batches; sort_by_parameter_order has the ids handed back in row order
+    statement = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    for batch in chunked(rows, settings.BULK_BATCH_SIZE):
+        ids.extend(await db.scalars(statement, list(batch)))
+    return ids
+
+async def bulk_upsert(db: AsyncSession, model, rows: Sequence[Dict[str, Any]]):
+    """Write rows that carry an id with INSERT ... ON CONFLICT (id) DO UPDATE, replacing every column."""
+    table = model.__table__
+    fields = [column.name for column in table.columns if column.name not in SERVER_COLUMNS]
+    statement = insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={**{field: statement.excluded[field] for field in fields}, "updated_at": func.now()},
+    )
+    for batch in chunked(rows, settings.BULK_BATCH_SIZE):
+        await db.execute(statement, list(batch))
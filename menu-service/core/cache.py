@@ -0,0 +1,202 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tag for entries that span restaurants (listings without a restaurant_id filter)
+ALL_RESTAURANTS = "all"
+
+class LRUCache:
+    """
+    Bounded in-process cache with per-entry TTL; the least recently used entry is evicted first.
+
+    Entries can carry a tag so a group of them can be dropped together with `delete_tag`, which
+    only touches that tag's keys: an index of tag -> keys is kept alongside the entries.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Any, Optional[str]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, tag: Optional[str] = None):
+        if self.max_entries <= 0:
+            return
+        self.delete(key)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tag)
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self.delete(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None or entry[2] is None:
+            return
+        keys = self._tags.get(entry[2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[entry[2]]
+
+    def delete_tag(self, tag: str):
+        for key in self._tags.pop(tag, ()):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class MenuCache:
+    """
+    Two-tier read-through cache for serialized menu responses.
+
+    Entries live in a short-lived in-process LRU and, when a Redis client is configured, in Redis
+    with a longer TTL. Every entry is tagged with the restaurant it belongs to so a write only
+    drops that restaurant's entries. Writes on another worker cannot reach this process's LRU,
+    which is why its TTL is kept short; Redis is invalidated directly and stays consistent.
+
+    With read replicas, a miss right after a write can refill an entry from a replica that has not
+    replayed the write yet, so invalidations are repeated `replica_lag` seconds later.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl: float = 10,
+        redis=None,
+        redis_ttl: int = 300,
+        prefix: str = "menu",
+        replica_lag: float = 0,
+        enabled: bool = True,
+    ):
+        self.local = LRUCache(max_entries, ttl)
+        self.redis = redis
+        self.redis_ttl = redis_ttl
+        self.prefix = prefix
+        self.replica_lag = replica_lag
+        self.enabled = enabled
+        self._repeats: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, kind: str, **params) -> str:
+        """Build a cache key from the resource kind and the full filter set of the request."""
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{self.prefix}:{kind}:{digest}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+
+        value = self.local.get(key)
+        if value is None and self.redis is not None:
+            try:
+                value = await self.redis.get(key)
+            except Exception as exc:
+                logger.warning("Menu cache Redis read failed: %s", exc)
+            if value is not None:
+                # Redis only holds the value, so the entry is re-tagged as cross-restaurant here
+                # to make sure any later write evicts it from this process
+                self.local.set(key, value, ALL_RESTAURANTS)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, restaurant_id: Optional[int] = None):
+        if not self.enabled:
+            return
+
+        tag = str(restaurant_id) if restaurant_id else ALL_RESTAURANTS
+        self.local.set(key, value, tag)
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.set(key, value, ex=self.redis_ttl)
+                    pipe.sadd(self._tag_key(tag), key)
+                    pipe.expire(self._tag_key(tag), self.redis_ttl)
+                    await pipe.execute()
+            except Exception as exc:
+                logger.warning("Menu cache Redis write failed: %s", exc)
+
+    async def invalidate_restaurant(self, restaurant_id: int):
+        """Drop every entry tagged with the restaurant, plus cross-restaurant listings."""
+        if not self.enabled:
+            return
+
+        await self._drop_restaurant(restaurant_id)
+        if self.replica_lag:
+            repeat = asyncio.create_task(self._drop_restaurant(restaurant_id, delay=self.replica_lag))
+            self._repeats.add(repeat)
+            repeat.add_done_callback(self._repeats.discard)
+
+    async def _drop_restaurant(self, restaurant_id: int, delay: float = 0):
+        if delay:
+            await asyncio.sleep(delay)
+        for tag in (str(restaurant_id), ALL_RESTAURANTS):
+            self.local.delete_tag(tag)
+            if self.redis is not None:
+                try:
+                    keys = await self.redis.smembers(self._tag_key(tag))
+                    await self.redis.delete(self._tag_key(tag), *keys)
+                except Exception as exc:
+                    logger.warning("Menu cache Redis invalidation failed: %s", exc)
+
+    def clear(self):
+        self.local.clear()
+
+def encode_response(body: bytes, headers: Optional[Dict[str, str]] = None) -> bytes:
+    """Pack a response body and its headers into a single cache value."""
+    return json.dumps(headers or {}, separators=(",", ":")).encode() + b"\n" + body
+
+def decode_response(value: bytes) -> Tuple[bytes, Dict[str, str]]:
+    headers, _, body = value.partition(b"\n")
+    return body, json.loads(headers)
+
+def _create_redis_client():
+    if not settings.CACHE_REDIS_ENABLED:
+        return None
+    try:
+        from redis.asyncio import Redis
+    except ImportError:
+        logger.warning("CACHE_REDIS_ENABLED is set but the redis package is not installed")
+        return None
+    return Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+
+menu_cache = MenuCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    redis=_create_redis_client(),
+    redis_ttl=settings.CACHE_REDIS_TTL_SECONDS,
+    # A replica is used while at most REPLICA_MAX_LAG_SECONDS behind, as of its last check
+    replica_lag=settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_CHECK_SECONDS if settings.DATABASE_REPLICA_URLS.strip() else 0,
+    enabled=settings.CACHE_ENABLED,
+)
@@ -12,14 +12,145 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "menu_service")
     
     DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    ASYNC_DATABASE_URL: str = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    
+    # Database pool settings (per engine, so per worker process)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 disables the timeout
+    
+    # Read replicas: comma-separated database URLs that read-only routes are spread over, round
+    # robin. Each is checked every REPLICA_CHECK_SECONDS and skipped while unreachable or more than
+    # REPLICA_MAX_LAG_SECONDS behind; with none usable, reads go to the primary. A client that
+    # wrote reads from the primary for READ_YOUR_WRITES_SECONDS (a cookie set on the write)
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_CHECK_SECONDS: float = float(os.getenv("REPLICA_CHECK_SECONDS", "5"))
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    
+    # Connecting through PgBouncer in transaction pooling mode: no server-side prepared statement
+    # caching and no startup parameters (set statement_timeout on the database role instead)
+    DB_PGBOUNCER_MODE: bool = os.getenv("DB_PGBOUNCER_MODE", "false").lower() == "true"
+    
+    # Readiness probe: not ready when the database does not answer in time or when this share of
+    # the pool (size + overflow) is checked out
+    READY_TIMEOUT_SECONDS: float = float(os.getenv("READY_TIMEOUT_SECONDS", "2"))
+    READY_MAX_POOL_USAGE: float = float(os.getenv("READY_MAX_POOL_USAGE", "1.0"))
+    
+    # Admission control. Rate limiting: a token bucket per API key (sent in RATE_LIMIT_KEY_HEADER)
+    # or per client address, refilled at RATE_LIMIT_PER_SECOND up to RATE_LIMIT_BURST; over the
+    # limit is a 429. The "memory" backend counts per worker, "redis" across workers and pods. Off
+    # by default (the Kubernetes manifests turn it on): behind proxies, every client without an API
+    # key shares the proxy's address, so set RATE_LIMIT_TRUSTED_PROXIES to the number of proxies in
+    # front of the service that append to X-Forwarded-For; the client is that many entries from the right
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "50"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "100"))
+    RATE_LIMIT_KEY_HEADER: str = os.getenv("RATE_LIMIT_KEY_HEADER", "X-API-Key")
+    RATE_LIMIT_TRUSTED_PROXIES: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+    # Load shedding: a 503 with Retry-After while a worker has SHED_MAX_INFLIGHT requests running
+    # or its recent pool checkouts waited over SHED_MAX_POOL_WAIT_SECONDS on average; 0 turns a check off
+    SHED_MAX_INFLIGHT: int = int(os.getenv("SHED_MAX_INFLIGHT", "200"))
+    SHED_MAX_POOL_WAIT_SECONDS: float = float(os.getenv("SHED_MAX_POOL_WAIT_SECONDS", "1"))
+    SHED_RETRY_AFTER_SECONDS: int = int(os.getenv("SHED_RETRY_AFTER_SECONDS", "1"))
+    # Largest limit a listing accepts; a streamed listing sent without a limit returns every row
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "1000"))
     
     # Redis settings
     REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     
+    # Menu cache settings
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", "10"))
+    CACHE_REDIS_ENABLED: bool = os.getenv("CACHE_REDIS_ENABLED", "false").lower() == "true"
+    CACHE_REDIS_TTL_SECONDS: int = int(os.getenv("CACHE_REDIS_TTL_SECONDS", "300"))
+    
+    # HTTP caching: Cache-Control sent with conditional GET responses, per route. "no-cache" lets
+    # clients keep a copy but revalidate it each time, which costs a 304 when nothing changed
+    HTTP_CACHE_CONTROL_MENU_ITEM: str = os.getenv("HTTP_CACHE_CONTROL_MENU_ITEM", "public, no-cache")
+    HTTP_CACHE_CONTROL_MENU_SNAPSHOT: str = os.getenv("HTTP_CACHE_CONTROL_MENU_SNAPSHOT", "public, no-cache")
+    
+    # Live menu events (Server-Sent Events). With Redis, changes made on one worker reach clients on all of them
+    EVENTS_REDIS_ENABLED: bool = os.getenv("EVENTS_REDIS_ENABLED", "false").lower() == "true"
+    EVENTS_HEARTBEAT_SECONDS: float = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+    EVENTS_QUEUE_SIZE: int = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))  # per client; a client further behind is reset
+    
+    # Request coalescing: concurrent identical reads share one database fetch; a request waits at
+    # most SINGLEFLIGHT_WAIT_SECONDS for it, then gets a 503 with SHED_RETRY_AFTER_SECONDS
+    SINGLEFLIGHT_ENABLED: bool = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+    SINGLEFLIGHT_WAIT_SECONDS: float = float(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", "5"))
+    
+    # Streamed listings (NDJSON or stream=true) fetch rows from a server-side cursor this many at a time
+    STREAM_BATCH_SIZE: int = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+    
+    # Response compression: bodies under COMPRESSION_MINIMUM_SIZE bytes are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    
+    # Idempotency-Key: responses to keyed writes are kept this long and replayed to retries. A retry
+    # waits up to IDEMPOTENCY_WAIT_SECONDS for a running original before getting a 409, and a claim
+    # left by a request that never answered is taken over after IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "60"))
+    IDEMPOTENCY_MAX_BODY_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "1048576"))  # larger responses are not kept
+    
+    # Change events outbox: each write records its changes in change_events, served by GET
+    # /changes?since=, and a relay publishes them to OUTBOX_SINK: "none", "redis" (a Redis stream)
+    # or "webhook" (POST to each of the comma-separated OUTBOX_WEBHOOK_URLS, each request timing out
+    # after OUTBOX_WEBHOOK_TIMEOUT_SECONDS). A batch not published within OUTBOX_PUBLISH_TIMEOUT_SECONDS
+    # is abandoned and sent again
+    OUTBOX_SINK: str = os.getenv("OUTBOX_SINK", "none")
+    OUTBOX_WEBHOOK_URLS: str = os.getenv("OUTBOX_WEBHOOK_URLS", "")
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS: float = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT_SECONDS", "5"))
+    OUTBOX_PUBLISH_TIMEOUT_SECONDS: float = float(os.getenv("OUTBOX_PUBLISH_TIMEOUT_SECONDS", "30"))
+    OUTBOX_REDIS_STREAM: str = os.getenv("OUTBOX_REDIS_STREAM", "menu:changes")
+    OUTBOX_REDIS_MAXLEN: int = int(os.getenv("OUTBOX_REDIS_MAXLEN", "100000"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    OUTBOX_RETENTION_HOURS: float = float(os.getenv("OUTBOX_RETENTION_HOURS", "168"))
+    
+    # Price and availability history: a background recorder copies menu item writes from
+    # change_events into the monthly partitioned menu_item_history table, HISTORY_BATCH_SIZE events
+    # at a time. Partitions are created HISTORY_PARTITIONS_AHEAD months ahead; with
+    # HISTORY_RETENTION_MONTHS above 0, older months are dropped
+    HISTORY_ENABLED: bool = os.getenv("HISTORY_ENABLED", "true").lower() == "true"
+    HISTORY_BATCH_SIZE: int = int(os.getenv("HISTORY_BATCH_SIZE", "1000"))
+    HISTORY_POLL_SECONDS: float = float(os.getenv("HISTORY_POLL_SECONDS", "5"))
+    HISTORY_PARTITIONS_AHEAD: int = int(os.getenv("HISTORY_PARTITIONS_AHEAD", "2"))
+    HISTORY_RETENTION_MONTHS: int = int(os.getenv("HISTORY_RETENTION_MONTHS", "0"))
+    
+    # Restaurant validation: menu writes must reference a restaurant that exists and is active in
+    # restaurant-service. Lookups are cached per worker; writes fail with 503 when it cannot answer
+    RESTAURANT_VALIDATION_ENABLED: bool = os.getenv("RESTAURANT_VALIDATION_ENABLED", "true").lower() == "true"
+    RESTAURANT_SERVICE_URL: str = os.getenv("RESTAURANT_SERVICE_URL", "http://localhost:8000")
+    RESTAURANT_CACHE_TTL_SECONDS: float = float(os.getenv("RESTAURANT_CACHE_TTL_SECONDS", "60"))
+    RESTAURANT_NEGATIVE_CACHE_TTL_SECONDS: float = float(os.getenv("RESTAURANT_NEGATIVE_CACHE_TTL_SECONDS", "5"))
+    RESTAURANT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESTAURANT_CACHE_MAX_ENTRIES", "100000"))
+    RESTAURANT_LOOKUP_TIMEOUT_SECONDS: float = float(os.getenv("RESTAURANT_LOOKUP_TIMEOUT_SECONDS", "2"))
+    RESTAURANT_LOOKUP_BATCH_SIZE: int = int(os.getenv("RESTAURANT_LOOKUP_BATCH_SIZE", "500"))
+    RESTAURANT_MAX_CONNECTIONS: int = int(os.getenv("RESTAURANT_MAX_CONNECTIONS", "20"))
+    RESTAURANT_RETRY_AFTER_SECONDS: int = int(os.getenv("RESTAURANT_RETRY_AFTER_SECONDS", "5"))
+    
+    # Bulk write settings
+    BULK_MAX_ROWS: int = int(os.getenv("BULK_MAX_ROWS", "50000"))
+    BULK_BATCH_SIZE: int = int(os.getenv("BULK_BATCH_SIZE", "1000"))
+    
     # Elasticsearch settings
     ELASTICSEARCH_HOST: str = os.getenv("ELASTICSEARCH_HOST", "localhost")
     ELASTICSEARCH_PORT: int = int(os.getenv("ELASTICSEARCH_PORT", "9200"))
+    ELASTICSEARCH_INDEX: str = os.getenv("ELASTICSEARCH_INDEX", "menu_items")
+    
+    # Search backend: "postgres" (tsvector + trigram) or "elasticsearch"
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "postgres")
     
     class Config:
         case_sensitive = True
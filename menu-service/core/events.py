@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# How long a disconnected EventSource waits before reconnecting
+RECONNECT_MILLISECONDS = 3000
+
+class Subscriber:
+    """One connected client: a bounded queue of encoded events for a single restaurant."""
+
+    def __init__(self, restaurant_id: int, queue_size: int):
+        self.restaurant_id = restaurant_id
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=queue_size)
+        # Set when the client fell so far behind that events were dropped; it has to refetch
+        self.overflowed = False
+
+    def offer(self, message: bytes):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+class MenuEvents:
+    """
+    Per-restaurant fan-out of menu change events to Server-Sent Events streams.
+
+    Without Redis, events reach the clients connected to this process only. With a Redis client
+    configured, every process publishes to a channel per restaurant and a single listener task per
+    process delivers what arrives on those channels to its local subscribers, so a change made on
+    one worker reaches storefronts connected to any of them.
+    """
+
+    def __init__(self, redis=None, prefix: str = "menu:events", queue_size: int = 100):
+        self.redis = redis
+        self.prefix = prefix
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscriber]] = defaultdict(set)
+        self._listener: Optional[asyncio.Task] = None
+
+    def _channel(self, restaurant_id: int) -> str:
+        return f"{self.prefix}:{restaurant_id}"
+
+    def _deliver(self, restaurant_id: int, message: bytes):
+        for subscriber in self._subscribers.get(restaurant_id, ()):
+            subscriber.offer(message)
+
+    async def publish(self, restaurant_id: int, event: str, data: Any):
+        message = f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+        if self.redis is not None:
+            try:
+                await self.redis.publish(self._channel(restaurant_id), message)
+                return
+            except Exception as exc:
+                # Local clients still get the event; clients on other workers catch up on reconnect
+                logger.warning("Menu events Redis publish failed: %s", exc)
+        self._deliver(restaurant_id, message)
+
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.psubscribe(f"{self.prefix}:*")
+                async for message in pubsub.listen():
+                    if message["type"] != "pmessage":
+                        continue
+                    channel = message["channel"]
+                    channel = channel.decode() if isinstance(channel, bytes) else channel
+                    self._deliver(int(channel.rsplit(":", 1)[1]), message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Menu events Redis subscription failed, retrying: %s", exc)
+                await asyncio.sleep(1)
+
+    async def subscribe(self, restaurant_id: int) -> Subscriber:
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+        subscriber = Subscriber(restaurant_id, self.queue_size)
+        self._subscribers[restaurant_id].add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.restaurant_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.restaurant_id]
+
+    async def stream(self, restaurant_id: int, heartbeat: float) -> AsyncIterator[bytes]:
+        """SSE body for one client; ends when the client disconnects or falls behind."""
+        subscriber = await self.subscribe(restaurant_id)
+        try:
+            yield f"retry: {RECONNECT_MILLISECONDS}\n\n".encode()
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line, keeps proxies and load balancers from closing an idle stream
+                    yield b": keepalive\n\n"
+                    continue
+                yield message
+                if subscriber.overflowed and subscriber.queue.empty():
+                    yield b"event: reset\ndata: {}\n\n"
+                    return
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+
+def _create_redis_client():
+    if not settings.EVENTS_REDIS_ENABLED:
+        return None
+    try:
+        from redis.asyncio import Redis
+    except ImportError:
+        logger.warning("EVENTS_REDIS_ENABLED is set but the redis package is not installed")
+        return None
+    return Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+
+menu_events = MenuEvents(redis=_create_redis_client(), queue_size=settings.EVENTS_QUEUE_SIZE)
@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.outbox import POSITION, _settled, table as events
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.history import MenuItemHistory, MenuItemHistoryPosition
+
+logger = logging.getLogger(__name__)
+
+table = MenuItemHistory.__table__
+position_table = MenuItemHistoryPosition.__table__
+
+# Only one recorder copies events at a time across workers and pods
+HISTORY_LOCK_KEY = 0x686973746F7279
+
+# Writes that carry one of these fields are kept
+HISTORY_FIELDS = ("price", "is_available")
+
+PARTITION_NAME = re.compile(r"menu_item_history_(\d{4})_(\d{2})")
+
+def month_start(moment: datetime, offset: int = 0) -> datetime:
+    month = moment.year * 12 + moment.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def history_rows(rows) -> Iterable[Dict[str, Any]]:
+    """History rows for the change events among `rows` that wrote a menu item's price or availability."""
+    for event in rows:
+        payload = event.payload or {}
+        if event.entity != "menu_item" or event.operation != "deleted" and not any(f in payload for f in HISTORY_FIELDS):
+            continue
+        yield {
+            "changed_at": event.created_at,
+            "event_id": event.id,
+            "menu_item_id": event.entity_id,
+            "restaurant_id": event.restaurant_id,
+            "operation": event.operation,
+            "price": payload.get("price"),
+            "is_available": payload.get("is_available"),
+        }
+
+async def read_history(
+    db: AsyncSession,
+    condition,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    cursor: Optional[str],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    History rows matching `condition` in [since, until), oldest first, and the cursor of the next
+    page. Bounds on changed_at let Postgres skip the partitions outside the range.
+    """
+    query = select(table).where(condition)
+    if since is not None:
+        query = query.where(table.c.changed_at >= since)
+    if until is not None:
+        query = query.where(table.c.changed_at < until)
+    if cursor:
+        changed_at, id = decode_cursor(cursor, 2, (str, int))
+        try:
+            changed_at = datetime.fromisoformat(changed_at)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(tuple_(table.c.changed_at, table.c.id) > tuple_(changed_at, id))
+    rows = (await db.execute(query.order_by(table.c.changed_at, table.c.id).limit(limit))).all()
+    if len(rows) < limit:
+        return rows, None
+    return rows, encode_cursor([rows[-1].changed_at.isoformat(), rows[-1].id])
+
+class HistoryRecorder:
+    """
+    Copies menu item price and availability writes from change_events into menu_item_history, in
+    batches and off the request path: writes only add their change event, as they already do. Every
+    worker runs a recorder, but a Postgres advisory lock lets one copy at a time. The position it
+    copied up to is kept in menu_item_history_position and moved on with each batch, so whichever
+    worker holds the lock next, or a restarted one, reads on from there.
+
+    The recorder also creates the partitions of the next `months_ahead` months and, with
+    `retention_months`, drops the months older than that. It has to keep up with the outbox
+    retention: events purged before being copied are missing from the history.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 1000,
+        poll_interval: float = 5,
+        months_ahead: int = 2,
+        retention_months: int = 0,
+        enabled: bool = True,
+    ):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.enabled = enabled
+        self.recorded = 0
+        self._task: Optional[asyncio.Task] = None
+        self._last_maintenance = 0.0
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = self.poll_interval
+        while True:
+            try:
+                if time.monotonic() - self._last_maintenance > 3600:
+                    await self.maintain_partitions()
+                copied = await self.record_batch()
+                delay = self.poll_interval
+                if copied == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("History recorder failed: %s", exc)
+                delay = min(delay * 2, 60)
+            await asyncio.sleep(delay)
+
+    async def record_batch(self) -> int:
+        """Copy the next batch of settled change events; returns how many events were read."""
+        async with async_engine.begin() as conn:
+            if not (await conn.execute(select(func.pg_try_advisory_xact_lock(HISTORY_LOCK_KEY)))).scalar():
+                return 0
+            position = (await conn.execute(select(position_table.c.transaction_id, position_table.c.event_id))).first() or (0, 0)
+            rows = (await conn.execute(
+                select(events.c.id, events.c.transaction_id, events.c.entity, events.c.entity_id, events.c.restaurant_id, events.c.operation, events.c.payload, events.c.created_at)
+                .where(tuple_(*POSITION) > tuple_(*position), _settled)
+                .order_by(*POSITION)
+                .limit(self.batch_size)
+            )).all()
+            if not rows:
+                return 0
+            values = list(history_rows(rows))
+            if values:
+                await conn.execute(insert(table).on_conflict_do_nothing(), values)
+            moved = insert(position_table).values(id=1, transaction_id=rows[-1].transaction_id, event_id=rows[-1].id)
+            await conn.execute(moved.on_conflict_do_update(
+                index_elements=[position_table.c.id],
+                set_={"transaction_id": moved.excluded.transaction_id, "event_id": moved.excluded.event_id, "updated_at": func.now()},
+            ))
+        self.recorded += len(values)
+        return len(rows)
+
+    async def maintain_partitions(self):
+        self._last_maintenance = time.monotonic()
+        now = datetime.now(timezone.utc)
+        async with async_engine.begin() as conn:
+            if not (await conn.execute(select(func.pg_try_advisory_xact_lock(HISTORY_LOCK_KEY)))).scalar():
+                return
+            for offset in range(self.months_ahead + 1):
+                start, end = month_start(now, offset), month_start(now, offset + 1)
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS menu_item_history_{start:%Y_%m} PARTITION OF menu_item_history "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+            if not self.retention_months:
+                return
+            cutoff = month_start(now, -self.retention_months)
+            partitions = (await conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = 'menu_item_history'::regclass"
+            ))).scalars().all()
+            for name in partitions:
+                match = PARTITION_NAME.fullmatch(name)
+                if match and datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc) < cutoff:
+                    logger.info("Dropping history partition %s", name)
+                    await conn.execute(text(f"DROP TABLE {name}"))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+history_recorder = HistoryRecorder(
+    batch_size=settings.HISTORY_BATCH_SIZE,
+    poll_interval=settings.HISTORY_POLL_SECONDS,
+    months_ahead=settings.HISTORY_PARTITIONS_AHEAD,
+    retention_months=settings.HISTORY_RETENTION_MONTHS,
+    enabled=settings.HISTORY_ENABLED,
+)
@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models.outbox import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+table = ChangeEvent.__table__
+
+EVENT_COLUMNS = (
+    table.c.id, table.c.entity, table.c.entity_id, table.c.restaurant_id, table.c.operation, table.c.payload, table.c.created_at
+)
+
+# Only one relay publishes at a time across workers and pods, which keeps events in order
+RELAY_LOCK_KEY = 0x6F7574626F78
+
+# How long a claim outlives the publish timeout, for the round trips to mark the batch published
+CLAIM_MARGIN_SECONDS = 10
+
+# Events of transactions that can no longer commit: every transaction still running or yet to
+# start has a transaction id at or above the snapshot's xmin
+_settled = table.c.transaction_id < func.txid_snapshot_xmin(func.txid_current_snapshot())
+
+# Feed order. Ids are drawn when a row is inserted, not when its transaction commits, so a lower
+# id can commit after a higher one. Transaction ids order the settled events for good: anything
+# that commits later has a transaction id above every settled one, so it sorts after them.
+POSITION = (table.c.transaction_id, table.c.id)
+
+def change(entity: str, operation: str, entity_id: int, restaurant_id: Optional[int] = None, payload: Any = None) -> Dict[str, Any]:
+    return {
+        "entity": entity,
+        "operation": operation,
+        "entity_id": entity_id,
+        "restaurant_id": restaurant_id,
+        "payload": jsonable_encoder(payload) if payload is not None else None,
+    }
+
+async def record_changes(db: AsyncSession, changes: Iterable[Dict[str, Any]]):
+    """Add change events to the session's transaction, so they commit or roll back with the write."""
+    changes = list(changes)
+    if changes:
+        await db.execute(insert(table), changes)
+
+async def read_changes(db: AsyncSession, since: int, limit: int) -> Dict[str, Any]:
+    """
+    Events after event `since`, in commit order (not always id order), and the `since` to ask for
+    next. A 410 tells a consumer that the last event it saw was purged, so events after it may have
+    been too, and it must resync.
+    """
+    query = select(*EVENT_COLUMNS).where(_settled)
+    if since > 0:
+        transaction_id = (await db.execute(select(table.c.transaction_id).where(table.c.id == since))).scalar()
+        if transaction_id is None:
+            if (await db.execute(select(table.c.id).limit(1))).first() is not None:
+                raise HTTPException(status_code=410, detail="Changes since this sequence number were purged, resync from the listings")
+            return {"events": [], "next_since": since}
+        query = query.where(tuple_(*POSITION) > tuple_(transaction_id, since))
+    rows = (await db.execute(query.order_by(*POSITION).limit(limit))).all()
+    return {"events": [dict(row._mapping) for row in rows], "next_since": rows[-1].id if rows else since}
+
+class RedisStreamSink:
+    """Appends each event to a Redis stream, trimmed to about `maxlen` entries."""
+
+    def __init__(self, redis, stream: str, maxlen: int = 100000):
+        self.redis = redis
+        self.stream = stream
+        self.maxlen = maxlen
+
+    async def publish(self, events: List[Dict[str, Any]]):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for event in events:
+                pipe.xadd(self.stream, {"event": json.dumps(event)}, maxlen=self.maxlen, approximate=True)
+            await pipe.execute()
+
+    async def close(self):
+        await self.redis.close()
+
+class WebhookSink:
+    """POSTs each batch as {"events": [...]} to every URL; a failed POST fails the batch so it is sent again."""
+
+    def __init__(self, urls: List[str], timeout: float = 5):
+        self.urls = urls
+        self.client = httpx.AsyncClient(timeout=timeout)
+
+    async def publish(self, events: List[Dict[str, Any]]):
+        for url in self.urls:
+            response = await self.client.post(url, json={"events": events})
+            response.raise_for_status()
+
+    async def close(self):
+        await self.client.aclose()
+
+class OutboxRelay:
+    """
+    Publishes change events to a sink in commit order, in batches, at least once: a batch is marked
+    published only after the sink accepted it, so a failure sends it again. Every worker runs a
+    relay, but one batch is out at a time across workers and pods. Writes call `wake` so events go
+    out right after the commit instead of at the next poll.
+
+    A batch is claimed in a short transaction under a Postgres advisory lock and published after
+    that transaction commits, so a slow sink holds no database connection and no lock. The claim
+    lasts `publish_timeout` seconds plus a margin: a publish that takes longer is abandoned, and a
+    claim left by a relay that died expires, so another relay sends the batch again.
+
+    Events older than `retention` are purged, once published when there is a sink.
+    """
+
+    def __init__(
+        self,
+        sink=None,
+        batch_size: int = 500,
+        poll_interval: float = 1,
+        retention: float = 168 * 3600,
+        publish_timeout: float = 30,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.publish_timeout = publish_timeout
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+
+    def wake(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            # Created here rather than at import: on Python 3.9 an Event is bound to the loop current
+            # at creation, and the server runs a loop of its own
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        delay = self.poll_interval
+        while True:
+            try:
+                published = await self.relay_batch()
+                if time.monotonic() - self._last_purge > 3600:
+                    await self.purge()
+                delay = self.poll_interval
+                if published == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Outbox relay failed: %s", exc)
+                delay = min(delay * 2, 60)
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def relay_batch(self) -> int:
+        """Publish the next batch of settled, unpublished events; returns how many were published."""
+        if self.sink is None:
+            return 0
+        rows = await self._claim()
+        if not rows:
+            return 0
+        ids = [row.id for row in rows]
+        try:
+            await asyncio.wait_for(self.sink.publish(jsonable_encoder([dict(row._mapping) for row in rows])), self.publish_timeout)
+        except Exception:
+            # Released so the next attempt sends the batch again; a cancelled relay's claim expires instead
+            await self._finish(ids, published=False)
+            raise
+        await self._finish(ids, published=True)
+        return len(rows)
+
+    async def _claim(self) -> List[Any]:
+        """The next batch, claimed in a transaction of its own; none while another relay's batch is still out."""
+        unpublished = table.c.published_at.is_(None)
+        async with async_engine.begin() as conn:
+            if not (await conn.execute(select(func.pg_try_advisory_xact_lock(RELAY_LOCK_KEY)))).scalar():
+                return []
+            if (await conn.execute(select(table.c.id).where(table.c.claimed_until > func.now()).limit(1))).first():
+                return []
+            rows = (await conn.execute(
+                select(*EVENT_COLUMNS).where(unpublished, _settled).order_by(*POSITION).limit(self.batch_size)
+            )).all()
+            if rows:
+                claimed_until = func.now() + timedelta(seconds=self.publish_timeout + CLAIM_MARGIN_SECONDS)
+                await conn.execute(update(table).where(table.c.id.in_([row.id for row in rows])).values(claimed_until=claimed_until))
+        return rows
+
+    async def _finish(self, ids: List[int], published: bool):
+        values = {"published_at": func.now(), "claimed_until": None} if published else {"claimed_until": None}
+        async with async_engine.begin() as conn:
+            await conn.execute(update(table).where(table.c.id.in_(ids)).values(**values))
+
+    async def purge(self):
+        self._last_purge = time.monotonic()
+        query = delete(table).where(table.c.created_at < datetime.now(timezone.utc) - timedelta(seconds=self.retention))
+        if self.sink is not None:
+            query = query.where(table.c.published_at.is_not(None))
+        async with async_engine.begin() as conn:
+            await conn.execute(query)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.sink is not None:
+            await self.sink.close()
+
+def _create_sink():
+    if settings.OUTBOX_SINK == "webhook":
+        return WebhookSink([url.strip() for url in settings.OUTBOX_WEBHOOK_URLS.split(",") if url.strip()], settings.OUTBOX_WEBHOOK_TIMEOUT_SECONDS)
+    if settings.OUTBOX_SINK == "redis":
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            logger.warning("OUTBOX_SINK is redis but the redis package is not installed; change events are not relayed")
+            return None
+        return RedisStreamSink(Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT), settings.OUTBOX_REDIS_STREAM, settings.OUTBOX_REDIS_MAXLEN)
+    return None
+
+outbox_relay = OutboxRelay(
+    sink=_create_sink(),
+    batch_size=settings.OUTBOX_BATCH_SIZE,
+    poll_interval=settings.OUTBOX_POLL_SECONDS,
+    retention=settings.OUTBOX_RETENTION_HOURS * 3600,
+    publish_timeout=settings.OUTBOX_PUBLISH_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,57 @@
+import base64
+import json
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+# Response header carrying the opaque cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row on a page into an opaque cursor."""
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _matches(value: Any, expected: type) -> bool:
+    # JSON has one number type: a float key may come back as an int, and a bool is never a number
+    if isinstance(value, bool):
+        return expected is bool
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+def decode_cursor(cursor: str, size: int, types: Optional[Sequence[type]] = None) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor`, rejecting anything malformed with a 400. With
+    `types`, every value must also be of its key's type, so a forged cursor never reaches the query.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if types is not None and not all(_matches(value, expected) for value, expected in zip(values, types)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def keyset_filter(keys: Sequence[Any], cursor: str, descending: bool = False):
+    """
+    Build the WHERE clause that starts a page right after the cursor position.
+
+    `keys` are the ORDER BY expressions (the last one must be unique, normally the primary key),
+    so the clause can be answered by an index seek instead of scanning skipped rows.
+    """
+    values = decode_cursor(cursor, len(keys), [key.type.python_type for key in keys])
+    if len(keys) == 1:
+        return keys[0] < values[0] if descending else keys[0] > values[0]
+    if descending:
+        return tuple_(*keys) < tuple_(*values)
+    return tuple_(*keys) > tuple_(*values)
+
+def next_cursor(rows: Sequence[Any], limit: int, key) -> Optional[str]:
+    """Return the cursor for the page after `rows`, or None when this was the last page."""
+    if not rows or len(rows) < limit:
+        return None
+    return encode_cursor(key(rows[-1]))
@@ -0,0 +1,140 @@
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.core.bulk import chunked
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RestaurantUnavailable(Exception):
+    """restaurant-service could not answer a lookup."""
+
+class RestaurantDirectory:
+    """
+    Which restaurants exist in restaurant-service and whether they are active, for validating the
+    restaurant_id of menu writes without an HTTP hop on every request.
+
+    Lookups go through one pooled keep-alive client and ask for many ids at once. Answers are
+    cached per worker: known restaurants for `ttl` seconds, unknown ids (negative cache) for the
+    shorter `negative_ttl` so a restaurant created moments ago is not refused for long.
+    restaurant-service's change events (its outbox webhook sink) drop changed restaurants here;
+    other workers pick the change up when their entry expires.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        ttl: float = 60,
+        negative_ttl: float = 5,
+        max_entries: int = 100000,
+        timeout: float = 2,
+        max_connections: int = 20,
+        enabled: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.known = LRUCache(max_entries, ttl)
+        self.missing = LRUCache(max_entries, negative_ttl)
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.enabled = enabled
+        # httpx's own by default; tests pass an httpx.MockTransport
+        self.transport = transport
+        self.hits = 0
+        self.misses = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=limits, transport=self.transport)
+        return self._client
+
+    async def _fetch(self, ids: List[int]) -> Dict[int, bool]:
+        params = {"ids": ",".join(map(str, ids)), "fields": "id,is_active", "limit": len(ids)}
+        try:
+            response = await self._get_client().get("/api/restaurants/", params=params)
+            response.raise_for_status()
+            return {row["id"]: row["is_active"] for row in response.json()}
+        except (httpx.HTTPError, ValueError, KeyError) as exc:
+            logger.warning("Restaurant lookup failed: %s", exc)
+            raise RestaurantUnavailable(str(exc) or type(exc).__name__) from exc
+
+    async def lookup(self, ids: Iterable[int]) -> Dict[int, Optional[bool]]:
+        """
+        `is_active` for each id, None for ids restaurant-service does not know. Only ids missing
+        from the cache are fetched. Raises RestaurantUnavailable when they cannot be.
+        """
+        found: Dict[int, Optional[bool]] = {}
+        unresolved = []
+        for restaurant_id in set(ids):
+            if not self.enabled:
+                found[restaurant_id] = True
+            elif self.known.get(restaurant_id) is not None:
+                found[restaurant_id] = self.known.get(restaurant_id)
+            elif self.missing.get(restaurant_id) is not None:
+                found[restaurant_id] = None
+            else:
+                unresolved.append(restaurant_id)
+        self.hits += len(found)
+        self.misses += len(unresolved)
+
+        for batch in chunked(sorted(unresolved), settings.RESTAURANT_LOOKUP_BATCH_SIZE):
+            fetched = await self._fetch(list(batch))
+            for restaurant_id in batch:
+                if restaurant_id in fetched:
+                    self.known.set(restaurant_id, fetched[restaurant_id])
+                    found[restaurant_id] = fetched[restaurant_id]
+                else:
+                    self.missing.set(restaurant_id, True)
+                    found[restaurant_id] = None
+        return found
+
+    def invalidate(self, ids: Iterable[int]):
+        for restaurant_id in ids:
+            self.known.delete(restaurant_id)
+            self.missing.delete(restaurant_id)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+def restaurant_error(active: Optional[bool]) -> Optional[str]:
+    """Why a menu cannot be attached to a restaurant with this lookup result, or None when it can."""
+    if active is None:
+        return "Restaurant not found"
+    if not active:
+        return "Restaurant is inactive"
+    return None
+
+async def lookup_restaurants(ids: Iterable[int]) -> Dict[int, Optional[bool]]:
+    """Look restaurants up for a write; fails closed with a 503 when restaurant-service cannot answer."""
+    try:
+        return await restaurant_directory.lookup(ids)
+    except RestaurantUnavailable:
+        raise HTTPException(
+            status_code=503,
+            detail="Restaurant service unavailable, cannot validate restaurant_id",
+            headers={"Retry-After": str(settings.RESTAURANT_RETRY_AFTER_SECONDS)},
+        )
+
+async def require_restaurant(restaurant_id: int):
+    """Reject a write with a 422 unless the restaurant exists and is active."""
+    error = restaurant_error((await lookup_restaurants([restaurant_id]))[restaurant_id])
+    if error:
+        raise HTTPException(status_code=422, detail=error)
+
+restaurant_directory = RestaurantDirectory(
+    base_url=settings.RESTAURANT_SERVICE_URL,
+    ttl=settings.RESTAURANT_CACHE_TTL_SECONDS,
+    negative_ttl=settings.RESTAURANT_NEGATIVE_CACHE_TTL_SECONDS,
+    max_entries=settings.RESTAURANT_CACHE_MAX_ENTRIES,
+    timeout=settings.RESTAURANT_LOOKUP_TIMEOUT_SECONDS,
+    max_connections=settings.RESTAURANT_MAX_CONNECTIONS,
+    enabled=settings.RESTAURANT_VALIDATION_ENABLED,
+)
@@ -0,0 +1,164 @@
+import logging
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bulk import chunked
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.menu import MenuItem as MenuItemModel, menu_item_search_document
+
+logger = logging.getLogger(__name__)
+
+def _filter_clauses(filters: Dict[str, Any]) -> list:
+    clauses = []
+    if filters.get("restaurant_id"):
+        clauses.append(MenuItemModel.restaurant_id == filters["restaurant_id"])
+    for flag in ("is_vegetarian", "is_vegan", "is_gluten_free", "is_available"):
+        if filters.get(flag) is not None:
+            clauses.append(getattr(MenuItemModel, flag) == filters[flag])
+    if filters.get("spice_level") is not None:
+        clauses.append(MenuItemModel.spice_level <= filters["spice_level"])
+    return clauses
+
+class SearchBackend(ABC):
+    """Interface for menu search backends."""
+
+    @abstractmethod
+    async def search(self, db: AsyncSession, q: str, filters: Dict[str, Any], limit: int) -> List[Tuple[MenuItemModel, float]]:
+        """Return matching items with their relevance score, best match first."""
+
+    async def sync_items(self, item_ids: Iterable[int]):
+        """Bring the index in line with the current database state of the given items; nothing to do for indexes the database maintains."""
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Search served by Postgres itself.
+
+    Every query word is matched as a prefix against the full-text document (GIN on to_tsvector), and
+    the whole query is also matched against item names by trigram word similarity (GIN on
+    gin_trgm_ops) so misspelled queries still find results. Both indexes are maintained by Postgres,
+    so there is nothing to sync.
+    """
+
+    async def search(self, db, q, filters, limit):
+        words = re.findall(r"\w+", q.lower())
+        if not words:
+            return []
+
+        tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), " & ".join(f"{word}:*" for word in words))
+        score = (func.ts_rank(menu_item_search_document, tsquery) + func.word_similarity(q, MenuItemModel.name)).label("score")
+        query = (
+            select(MenuItemModel, score)
+            .where(or_(menu_item_search_document.op("@@")(tsquery), MenuItemModel.name.op("%>")(q)))
+            .where(*_filter_clauses(filters))
+            .order_by(score.desc(), MenuItemModel.id)
+            .limit(limit)
+        )
+        return [(item, float(item_score)) for item, item_score in (await db.execute(query)).all()]
+
+class ElasticsearchSearchBackend(SearchBackend):
+    """
+    Search served by Elasticsearch, kept in sync incrementally from item writes.
+
+    Hits are resolved back to rows by primary key, so results always reflect committed data even if
+    the index lags behind by a write.
+    """
+
+    def __init__(self, client=None, index: str = "menu_items"):
+        if client is None:
+            from elasticsearch import AsyncElasticsearch
+            client = AsyncElasticsearch(f"http://{settings.ELASTICSEARCH_HOST}:{settings.ELASTICSEARCH_PORT}")
+        self.client = client
+        self.index = index
+
+    @staticmethod
+    def document(item: MenuItemModel) -> Dict[str, Any]:
+        return {
+            "name": item.name,
+            "description": item.description,
+            "restaurant_id": item.restaurant_id,
+            "price": item.price,
+            "is_vegetarian": item.is_vegetarian,
+            "is_vegan": item.is_vegan,
+            "is_gluten_free": item.is_gluten_free,
+            "is_available": item.is_available,
+            "spice_level": item.spice_level,
+        }
+
+    async def search(self, db, q, filters, limit):
+        es_filters = []
+        if filters.get("restaurant_id"):
+            es_filters.append({"term": {"restaurant_id": filters["restaurant_id"]}})
+        for flag in ("is_vegetarian", "is_vegan", "is_gluten_free", "is_available"):
+            if filters.get(flag) is not None:
+                es_filters.append({"term": {flag: filters[flag]}})
+        if filters.get("spice_level") is not None:
+            es_filters.append({"range": {"spice_level": {"lte": filters["spice_level"]}}})
+
+        response = await self.client.search(
+            index=self.index,
+            size=limit,
+            query={
+                "bool": {
+                    "must": {
+                        "multi_match": {
+                            "query": q,
+                            "type": "bool_prefix",
+                            "fields": ["name^3", "description"],
+                            "fuzziness": "AUTO",
+                        }
+                    },
+                    "filter": es_filters,
+                }
+            },
+            source=False,
+        )
+        scores = {int(hit["_id"]): hit["_score"] for hit in response["hits"]["hits"]}
+        if not scores:
+            return []
+        items = (await db.scalars(select(MenuItemModel).where(MenuItemModel.id.in_(scores)))).all()
+        return sorted(((item, scores[item.id]) for item in items), key=lambda hit: (-hit[1], hit[0].id))
+
+    async def sync_items(self, item_ids):
+        item_ids = set(item_ids)
+        if not item_ids:
+            return
+        from elasticsearch.helpers import async_bulk
+
+        try:
+            for batch in chunked(sorted(item_ids), settings.BULK_BATCH_SIZE):
+                async with AsyncSessionLocal() as db:
+                    items = (await db.scalars(select(MenuItemModel).where(MenuItemModel.id.in_(batch)))).all()
+                actions = [{"_op_type": "index", "_index": self.index, "_id": item.id, "_source": self.document(item)} for item in items]
+                # Anything no longer in the database was deleted
+                actions += [
+                    {"_op_type": "delete", "_index": self.index, "_id": item_id}
+                    for item_id in set(batch) - {item.id for item in items}
+                ]
+                await async_bulk(self.client, actions, raise_on_error=False)
+        except Exception as exc:
+            logger.warning("Search index sync failed for %d items: %s", len(item_ids), exc)
+
+    async def reindex(self, batch_size: int = 1000):
+        """Rebuild the whole index from Postgres, for the initial load or after an outage."""
+        last_id = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                ids = (await db.scalars(
+                    select(MenuItemModel.id).where(MenuItemModel.id > last_id).order_by(MenuItemModel.id).limit(batch_size)
+                )).all()
+            if not ids:
+                return
+            await self.sync_items(ids)
+            last_id = ids[-1]
+
+def _create_backend() -> SearchBackend:
+    if settings.SEARCH_BACKEND == "elasticsearch":
+        return ElasticsearchSearchBackend(index=settings.ELASTICSEARCH_INDEX)
+    return PostgresSearchBackend()
+
+search_backend = _create_backend()
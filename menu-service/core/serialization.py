@@ -0,0 +1,99 @@
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+import orjson
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.bulk import NDJSON_MEDIA_TYPES
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+
+def schema_columns(model, fields: Iterable[str]) -> list:
+    """Table columns backing a flat output schema, in the schema's field order."""
+    table = model.__table__
+    return [table.c[name] for name in fields]
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """
+    Field names asked for with `fields=id,name,...`, in schema order so equivalent requests share a
+    cache key; None when the parameter is absent. Unknown names are rejected with a 400.
+    """
+    if fields is None:
+        return None
+    allowed = list(allowed)
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = sorted(requested.difference(allowed))
+    if unknown or not requested:
+        detail = f"Unknown fields: {', '.join(unknown)}" if unknown else "No fields requested"
+        raise HTTPException(status_code=400, detail=detail)
+    return [name for name in allowed if name in requested]
+
+def projection(columns: Sequence, fields: Optional[List[str]], required: Sequence[str] = ()) -> list:
+    """
+    Columns to select for a sparse fieldset: the requested ones first, then any `required` ones
+    (sort keys the next cursor is built from) that were not requested. `dump_rows(rows, fields)`
+    leaves the trailing required columns out of the response.
+    """
+    if fields is None:
+        return list(columns)
+    by_name = {column.key: column for column in columns}
+    return [by_name[name] for name in fields + [name for name in required if name not in fields]]
+
+def dump_rows(rows: Sequence, fields: Optional[Sequence[str]] = None) -> bytes:
+    """
+    Encode rows from `select(*columns)` as a JSON array of objects keyed by column label, or only
+    the leading `fields` columns of each row when a sparse fieldset was selected with `projection`.
+
+    This is the trusted-output path for list endpoints: rows come straight from the database, whose
+    contents were validated on the way in, so the per-row pydantic validation and jsonable_encoder
+    pass that response_model would run are skipped.
+    """
+    if not rows:
+        return b"[]"
+    keys: List[str] = list(fields if fields is not None else rows[0]._fields)
+    return orjson.dumps([dict(zip(keys, row)) for row in rows])
+
+def stream_format(request: Request, stream: bool) -> Optional[str]:
+    """
+    "ndjson" when the client accepts newline-delimited JSON, "json" when it asked for `stream=true`,
+    None for the usual buffered response.
+    """
+    accept = request.headers.get("accept", "")
+    if any(media_type in accept for media_type in NDJSON_MEDIA_TYPES):
+        return "ndjson"
+    return "json" if stream else None
+
+async def _stream_chunks(query, fields: Optional[Sequence[str]], ndjson: bool, engine: Optional[AsyncEngine]) -> AsyncIterator[bytes]:
+    # The stream opens its own session rather than relying on the request's outliving the response.
+    # yield_per runs the query on a server-side cursor: rows arrive STREAM_BATCH_SIZE at a time and
+    # memory stays flat however many rows the listing has.
+    async with AsyncSessionLocal(bind=engine or async_engine) as db:
+        result = await db.stream(query.execution_options(yield_per=settings.STREAM_BATCH_SIZE))
+        keys: List[str] = list(fields if fields is not None else result.keys())
+        separator = b"" if ndjson else b"["
+        async for rows in result.partitions():
+            objects = [dict(zip(keys, row)) for row in rows]
+            if ndjson:
+                yield b"".join(orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE) for obj in objects)
+            else:
+                # One array per batch with its brackets stripped, joined by commas into a single array
+                yield separator + orjson.dumps(objects)[1:-1]
+                separator = b","
+        if not ndjson:
+            yield b"[]" if separator == b"[" else b"]"
+
+def stream_rows(
+    query,
+    fields: Optional[Sequence[str]] = None,
+    format: str = "ndjson",
+    engine: Optional[AsyncEngine] = None,
+) -> StreamingResponse:
+    """
+    Stream the rows of `select(*columns)` as NDJSON (one object per line) or as one chunked JSON
+    array, encoded the same way as `dump_rows`. The database connection is held until the last
+    row is sent, so slow clients keep it checked out for longer than a buffered page would.
+    `engine` picks the database, a replica for read-only routes; the primary by default.
+    """
+    media_type = NDJSON_MEDIA_TYPES[0] if format == "ndjson" else "application/json"
+    return StreamingResponse(_stream_chunks(query, fields, format == "ndjson", engine), media_type=media_type)
@@ -0,0 +1,75 @@
+"""
+Production server settings: gunicorn supervising uvicorn workers.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+The app is imported once in the master and forked into the workers, so they start fast and share
+the imported code. Every setting can be overridden from the environment; WEB_CONCURRENCY defaults
+to the CPUs the container may use. Connection pools are per worker, so the database sees up to
+workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections per pod.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+def available_cpus() -> int:
+    """CPUs this process may use: the cgroup CPU quota when there is one (containers), else the affinity mask."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+# The service directory is imported as the "app" package, so its parent has to be on the path
+pythonpath = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+# One event loop per CPU; async workers do not need the 2n+1 of blocking workers
+workers = int(os.getenv("WEB_CONCURRENCY", available_cpus()))
+preload_app = os.getenv("PRELOAD_APP", "true").lower() == "true"
+
+# Recycle workers after this many requests (jittered so they do not all restart together) to cap memory creep
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# On SIGTERM workers stop accepting and finish in-flight requests for up to graceful_timeout seconds
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = os.getenv("ACCESS_LOG", "-")
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+# Each worker writes its Prometheus samples here and /metrics aggregates them (see core/metrics.py).
+# Set before the app is imported, which is why it happens here rather than in a hook
+prometheus_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "prometheus-menu-service"))
+os.makedirs(prometheus_dir, exist_ok=True)
+
+def on_starting(server):
+    # Files left by a previous run would be counted again, so the directory starts empty. Done once
+    # as the master starts: this file is also read again on SIGHUP, while the workers write there
+    shutil.rmtree(prometheus_dir, ignore_errors=True)
+    os.makedirs(prometheus_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    # Pools copied from the master must not be used by the worker: sockets shared between processes
+    # corrupt both sides. close=False leaves them to the master and starts the worker with empty pools.
+    from app.core.database import async_engine, engine, replica_router
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in replica_router.engines:
+        replica.sync_engine.dispose(close=False)
+
+def child_exit(server, worker):
+    # Drops the live gauges (requests in flight) of the dead worker from the aggregate
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,66 @@
+"""Initial schema
+
+The categories and menu_items tables, with their search indexes, as previously created by
+Base.metadata.create_all. Existing databases are already at this revision and only need
+"alembic stamp 0001".
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.create_table(
+        "categories",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("display_order", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_categories_id", "categories", ["id"])
+    op.create_index("ix_categories_restaurant_id", "categories", ["restaurant_id"])
+    op.create_index("ix_categories_name", "categories", ["name"])
+
+    op.create_table(
+        "menu_items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("image_url", sa.String()),
+        sa.Column("category_id", sa.Integer(), sa.ForeignKey("categories.id")),
+        sa.Column("is_vegetarian", sa.Boolean()),
+        sa.Column("is_vegan", sa.Boolean()),
+        sa.Column("is_gluten_free", sa.Boolean()),
+        sa.Column("spice_level", sa.Integer()),
+        sa.Column("is_available", sa.Boolean()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_menu_items_id", "menu_items", ["id"])
+    op.create_index("ix_menu_items_restaurant_id", "menu_items", ["restaurant_id"])
+    op.create_index("ix_menu_items_name", "menu_items", ["name"])
+    op.create_index(
+        "ix_menu_items_search_document",
+        "menu_items",
+        [sa.text("to_tsvector('simple'::regconfig, name || ' ' || coalesce(description, ''))")],
+        postgresql_using="gin",
+    )
+    op.create_index("ix_menu_items_name_trgm", "menu_items", ["name"], postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"})
+
+def downgrade():
+    op.drop_table("menu_items")
+    op.drop_table("categories")
@@ -0,0 +1,37 @@
+"""Listing indexes
+
+Composite indexes matching the listing routes: available items of a restaurant, optionally within
+one category, and a restaurant's categories in display order. Each ends on id so keyset pages are
+read in index order. Dietary flags stay heap filters; they are too unselective to be worth a column.
+
+Indexes are built CONCURRENTLY so writes keep flowing while they build, which cannot happen inside a
+transaction. A concurrent build that fails leaves an invalid index behind, so each one is dropped
+first and re-running the migration after a failure simply starts that index over.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_menu_items_available_listing", "menu_items", ["restaurant_id", "category_id", "id"], sa.text("is_available")),
+    ("ix_categories_listing", "categories", ["restaurant_id", sa.text("coalesce(display_order, 0)"), "id"], None),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.create_index(name, table, columns, postgresql_where=where, postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _, _, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
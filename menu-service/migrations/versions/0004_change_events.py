@@ -0,0 +1,36 @@
+"""Change events outbox
+
+Every write records what it changed in change_events, in the same transaction as the change. The
+relay publishes the rows to the configured sink and GET /api/menus/changes?since= serves them as an
+incremental feed ordered by id. Rows are purged after OUTBOX_RETENTION_HOURS.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "change_events",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("entity", sa.String(32), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("restaurant_id", sa.Integer()),
+        sa.Column("operation", sa.String(16), nullable=False),
+        sa.Column("payload", sa.JSON()),
+        sa.Column("transaction_id", sa.BigInteger(), nullable=False, server_default=sa.text("txid_current()")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("published_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_change_events_unpublished", "change_events", ["id"], postgresql_where=sa.text("published_at IS NULL"))
+    op.create_index("ix_change_events_created_at", "change_events", ["created_at"])
+
+def downgrade():
+    op.drop_table("change_events")
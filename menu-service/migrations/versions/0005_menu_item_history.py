@@ -0,0 +1,61 @@
+"""Menu item price and availability history
+
+menu_item_history keeps every price and availability write to a menu item, partitioned by month of
+changed_at. The history recorder copies the writes from change_events in batches and creates the
+coming months' partitions as time goes on; this migration creates the previous, current and next
+two months, a default partition so a write never fails for lack of one, and seeds a snapshot of
+every item's current price and availability as the starting point.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def month_start(moment: datetime, offset: int = 0) -> datetime:
+    month = moment.year * 12 + moment.month - 1 + offset
+    return datetime(month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+def upgrade():
+    op.create_table(
+        "menu_item_history",
+        sa.Column("id", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("changed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_id", sa.BigInteger()),
+        sa.Column("menu_item_id", sa.Integer(), nullable=False),
+        sa.Column("restaurant_id", sa.Integer(), nullable=False),
+        sa.Column("operation", sa.String(16), nullable=False),
+        sa.Column("price", sa.Float()),
+        sa.Column("is_available", sa.Boolean()),
+        sa.PrimaryKeyConstraint("id", "changed_at"),
+        postgresql_partition_by="RANGE (changed_at)",
+    )
+    op.create_index("ix_menu_item_history_item", "menu_item_history", ["menu_item_id", "changed_at"])
+    op.create_index("ix_menu_item_history_restaurant", "menu_item_history", ["restaurant_id", "changed_at"])
+    op.create_index("ix_menu_item_history_event", "menu_item_history", ["event_id", "changed_at"], unique=True)
+
+    now = datetime.now(timezone.utc)
+    for offset in range(-1, 3):
+        start, end = month_start(now, offset), month_start(now, offset + 1)
+        op.execute(
+            f"CREATE TABLE menu_item_history_{start:%Y_%m} PARTITION OF menu_item_history "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+    op.execute("CREATE TABLE menu_item_history_default PARTITION OF menu_item_history DEFAULT")
+
+    op.execute(
+        "INSERT INTO menu_item_history (changed_at, menu_item_id, restaurant_id, operation, price, is_available) "
+        "SELECT now(), id, restaurant_id, 'snapshot', price, is_available FROM menu_items"
+    )
+
+def downgrade():
+    # Dropping the partitioned table drops its partitions with it
+    op.drop_table("menu_item_history")
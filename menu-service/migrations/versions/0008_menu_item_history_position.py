@@ -0,0 +1,35 @@
+"""Menu item history position
+
+The history recorder keeps the change_events position it has copied up to in a one-row table,
+read and moved on under its advisory lock, instead of each worker working it out for itself. The
+row starts at the newest event already in menu_item_history; with none, the recorder starts from
+the oldest event kept.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "menu_item_history_position",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("transaction_id", sa.BigInteger(), nullable=False),
+        sa.Column("event_id", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.execute(
+        "INSERT INTO menu_item_history_position (id, transaction_id, event_id) "
+        "SELECT 1, transaction_id, id FROM change_events "
+        "WHERE id = (SELECT max(event_id) FROM menu_item_history)"
+    )
+
+def downgrade():
+    op.drop_table("menu_item_history_position")
@@ -0,0 +1,45 @@
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Float, Identity, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class MenuItemHistory(Base):
+    """
+    Append-only record of menu item price and availability writes, copied from change_events by the
+    history recorder (core/history.py). Partitioned by month of changed_at: range queries only read
+    the months they cover and old months are dropped whole. price and is_available are None when
+    the write did not set them.
+    """
+
+    __tablename__ = "menu_item_history"
+
+    # The partition key has to be part of every unique constraint, the primary key included
+    id = Column(BigInteger, Identity(), primary_key=True)
+    changed_at = Column(DateTime(timezone=True), primary_key=True)
+    event_id = Column(BigInteger)  # the change_events row it was copied from; None for the initial snapshot
+    menu_item_id = Column(Integer, nullable=False)
+    restaurant_id = Column(Integer, nullable=False)
+    operation = Column(String(16), nullable=False)  # snapshot, created, updated or deleted
+    price = Column(Float)
+    is_available = Column(Boolean)
+
+    __table_args__ = (
+        Index("ix_menu_item_history_item", menu_item_id, changed_at),
+        Index("ix_menu_item_history_restaurant", restaurant_id, changed_at),
+        Index("ix_menu_item_history_event", event_id, changed_at, unique=True),
+        {"postgresql_partition_by": "RANGE (changed_at)"},
+    )
+
+class MenuItemHistoryPosition(Base):
+    """
+    The (transaction_id, id) position in change_events up to which the history recorder has read,
+    one row. It is read and moved on in the transaction that copies each batch, under the
+    recorder's advisory lock, so workers and restarts carry on from where the last batch ended.
+    """
+
+    __tablename__ = "menu_item_history_position"
+
+    id = Column(Integer, primary_key=True, default=1)
+    transaction_id = Column(BigInteger, nullable=False)
+    event_id = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
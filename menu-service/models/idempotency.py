@@ -0,0 +1,17 @@
+from sqlalchemy import JSON, Column, DateTime, Integer, LargeBinary, String
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class IdempotencyKey(Base):
+    """A write made with an Idempotency-Key header and the response it got, replayed to retries (core/idempotency.py)."""
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(320), primary_key=True)  # the client's id, a space, then the key it sent
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path, query string and body
+    status_code = Column(Integer)  # NULL while the first request is still running
+    headers = Column(JSON)
+    body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -1,9 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, DDL, Index, event, literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.core.database import Base
 
+def _search_document(name, description):
+    # Search queries must build the exact same expression for Postgres to use the GIN index on it
+    return func.to_tsvector(
+        literal_column("'simple'::regconfig"),
+        name + literal_column("' '") + func.coalesce(description, literal_column("''")),
+    )
+
+def _display_order_key(display_order):
+    # Listing queries must build the exact same expression for Postgres to use the index on it
+    return func.coalesce(display_order, literal_column("0"))
+
 class MenuItem(Base):
     __tablename__ = "menu_items"
     
@@ -23,6 +34,14 @@ class MenuItem(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     category = relationship("Category", back_populates="items")
+    
+    __table_args__ = (
+        Index("ix_menu_items_search_document", _search_document(name, description), postgresql_using="gin"),
+        Index("ix_menu_items_name_trgm", name, postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        # Customer listings only show available items; ending on id reads each restaurant/category
+        # in keyset order. Dietary flags are too unselective to be worth a key column.
+        Index("ix_menu_items_available_listing", restaurant_id, category_id, id, postgresql_where=is_available),
+    )
 
 class Category(Base):
     __tablename__ = "categories"
@@ -35,4 +54,17 @@ class Category(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    items = relationship("MenuItem", back_populates="category")
\ No newline at end of file
+    items = relationship("MenuItem", back_populates="category", order_by="MenuItem.id")
+    
+    __table_args__ = (
+        Index("ix_categories_listing", restaurant_id, _display_order_key(display_order), id),
+    )
+
+# Full-text search document for menu items
+menu_item_search_document = _search_document(MenuItem.__table__.c.name, MenuItem.__table__.c.description)
+
+# Sort key of category listings
+category_display_order_key = _display_order_key(Category.__table__.c.display_order)
+
+# Trigram operators used for typo-tolerant name matching come from pg_trgm
+event.listen(Base.metadata, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
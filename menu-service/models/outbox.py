@@ -0,0 +1,32 @@
+from sqlalchemy import JSON, BigInteger, Column, DateTime, Index, Integer, String, text
+from sqlalchemy.sql import func
+
+from app.core.database import Base
+
+class ChangeEvent(Base):
+    """
+    Outbox row written in the same transaction as the change it describes (core/outbox.py). The id
+    is the sequence number of GET /changes?since=, which serves events in (transaction_id, id) order;
+    the relay sets claimed_until while it publishes the event and published_at once a sink has it.
+    """
+
+    __tablename__ = "change_events"
+
+    id = Column(BigInteger, primary_key=True)
+    entity = Column(String(32), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    restaurant_id = Column(Integer)
+    operation = Column(String(16), nullable=False)  # created, updated or deleted
+    payload = Column(JSON)  # the fields written; None for deletes
+    # Writing transaction, so readers can hold back events of transactions that may still commit below them
+    transaction_id = Column(BigInteger, nullable=False, server_default=text("txid_current()"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    published_at = Column(DateTime(timezone=True))
+    claimed_until = Column(DateTime(timezone=True))  # set while a relay is publishing the event
+
+    __table_args__ = (
+        Index("ix_change_events_unpublished", id, postgresql_where=published_at.is_(None)),
+        Index("ix_change_events_created_at", created_at),
+        Index("ix_change_events_position", transaction_id, id),
+        Index("ix_change_events_claimed", claimed_until, postgresql_where=claimed_until.is_not(None)),
+    )
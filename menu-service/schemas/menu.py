@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, HttpUrl
 
 class CategoryBase(BaseModel):
@@ -61,8 +61,87 @@ class MenuItem(MenuItemBase):
     class Config:
         orm_mode = True
 
+# Availability toggles
+class MenuItemAvailability(BaseModel):
+    is_available: bool
+
+class MenuItemBulkAvailability(MenuItemAvailability):
+    # Items of the restaurant to change: the listed ids, the items of a category, or all of them
+    item_ids: Optional[List[int]] = None
+    category_id: Optional[int] = None
+
+class MenuItemAvailabilityResult(BaseModel):
+    id: int
+    restaurant_id: int
+    is_available: bool
+    updated_at: Optional[datetime] = None
+
+class MenuItemSearchResult(MenuItem):
+    score: float
+
 class MenuItemWithCategory(MenuItem):
     category: Optional[Category] = None
 
 class CategoryWithItems(Category):
-    items: List[MenuItem] = []
\ No newline at end of file
+    items: List[MenuItem] = []
+
+class MenuSnapshot(BaseModel):
+    restaurant_id: int
+    version: str
+    categories: List[CategoryWithItems] = []
+    uncategorized_items: List[MenuItem] = []
+
+# Bulk write payloads and results
+class CategoryBulkUpsert(CategoryCreate):
+    id: Optional[int] = None
+
+class MenuItemBulkUpsert(MenuItemCreate):
+    id: Optional[int] = None
+
+class MenuItemBulkUpdate(MenuItemUpdate):
+    id: int
+
+class ChangeEvent(BaseModel):
+    id: int
+    entity: str
+    entity_id: int
+    restaurant_id: Optional[int] = None
+    operation: str  # created, updated or deleted
+    payload: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+class ChangeFeed(BaseModel):
+    events: List[ChangeEvent]
+    next_since: int
+
+class ChangeBatch(BaseModel):
+    events: List[ChangeEvent]
+
+class MenuItemHistory(BaseModel):
+    id: int
+    menu_item_id: int
+    restaurant_id: int
+    operation: str  # snapshot, created, updated or deleted
+    price: Optional[float] = None  # None when this write did not set it
+    is_available: Optional[bool] = None
+    changed_at: datetime
+    event_id: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+class BulkDelete(BaseModel):
+    ids: List[int]
+
+class BulkRowResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    status: str  # created, updated, deleted, not_found or invalid
+    error: Optional[Any] = None
+
+class BulkResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+    results: List[BulkRowResult] = []
@@ -0,0 +1,77 @@
+"""
+Benchmark list serialization: ORM objects through the pydantic schemas against row tuples encoded
+with orjson, as GET /api/menus/items/ and /api/menus/categories/ now do.
+
+Reads pages of menu items from the configured database, first checks that both paths produce the
+same JSON, then reports rows per second for serialization alone and for query plus serialization:
+
+    python -m app.scripts.benchmark_serialization --page-size 100 --iterations 200
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+
+from app.api.routes import MENU_ITEM_COLUMNS
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.serialization import dump_rows
+from app.models.menu import MenuItem as MenuItemModel
+from app.schemas.menu import MenuItem
+
+def schema_json(items) -> bytes:
+    return json.dumps(jsonable_encoder([MenuItem.from_orm(item) for item in items]), separators=(",", ":")).encode()
+
+async def fetch_orm(db, page_size: int):
+    return (await db.scalars(select(MenuItemModel).order_by(MenuItemModel.id).limit(page_size))).all()
+
+async def fetch_rows(db, page_size: int):
+    return (await db.execute(select(*MENU_ITEM_COLUMNS).order_by(MenuItemModel.id).limit(page_size))).all()
+
+def report(label: str, rows: int, seconds: float):
+    print(f"{label:>39}: {rows / seconds:>12,.0f} rows/s  ({seconds / max(rows, 1) * 1e6:.2f} us/row)")
+
+async def main(page_size: int, iterations: int):
+    async with AsyncSessionLocal() as db:
+        orm_page = await fetch_orm(db, page_size)
+        row_page = await fetch_rows(db, page_size)
+        if not orm_page:
+            print("No menu items in the database")
+            return
+        if json.loads(schema_json(orm_page)) != json.loads(dump_rows(row_page)):
+            print("Outputs differ between the pydantic and orjson paths")
+            sys.exit(1)
+        rows = len(orm_page) * iterations
+        print(f"{len(orm_page)} rows per page, {iterations} pages; outputs identical")
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            schema_json(orm_page)
+        report("pydantic schemas (serialize)", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            dump_rows(row_page)
+        report("row tuples + orjson (serialize)", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            db.expunge_all()
+            schema_json(await fetch_orm(db, page_size))
+        report("pydantic schemas (query + serialize)", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            dump_rows(await fetch_rows(db, page_size))
+        report("row tuples + orjson (query + serialize)", rows, time.perf_counter() - started)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization paths")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.page_size, args.iterations))
@@ -0,0 +1,84 @@
+"""
+Check that the listing routes are served by the indexes meant for them.
+
+Each route below is called through the app, the SQL it runs is captured, and EXPLAIN is run on that
+exact statement. The check fails when none of a route's statements uses its expected index:
+
+    python -m app.scripts.check_query_plans
+    python -m app.scripts.check_query_plans --real-costs   # on production-sized data
+
+Filter values are taken from an existing categorized item. Small development databases are cheaper
+to scan sequentially than through any index, so sequential scans are disabled for the EXPLAIN unless
+--real-costs is given. The response cache is turned off so every request reaches the database.
+"""
+import argparse
+import asyncio
+import os
+import sys
+from typing import List, Tuple
+
+os.environ["CACHE_ENABLED"] = "false"
+
+import httpx
+from sqlalchemy import event, select
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.main import app
+from app.models.menu import MenuItem
+
+# (request path, index that should appear in the plan)
+CHECKS = [
+    ("/api/menus/items/?restaurant_id={restaurant_id}&category_id={category_id}&is_available=true", "ix_menu_items_available_listing"),
+    ("/api/menus/items/?restaurant_id={restaurant_id}&is_available=true&is_vegetarian=true", "ix_menu_items_available_listing"),
+    ("/api/menus/categories/?restaurant_id={restaurant_id}", "ix_categories_listing"),
+    ("/api/menus/restaurants/{restaurant_id}/menu", "ix_categories_listing"),
+]
+
+captured: List[Tuple[str, tuple]] = []
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT"):
+        captured.append((statement, parameters))
+
+async def sample_values() -> dict:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(MenuItem.restaurant_id, MenuItem.category_id).where(MenuItem.category_id.is_not(None)).limit(1)
+        )).first()
+    if row is None:
+        return {"restaurant_id": 1, "category_id": 1}
+    return row._asdict()
+
+async def explain(statement: str, parameters, real_costs: bool) -> str:
+    async with async_engine.connect() as conn:
+        if not real_costs:
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", tuple(parameters))
+        return "\n".join(row[0] for row in result)
+
+async def main(real_costs: bool) -> int:
+    failures = 0
+    values = await sample_values()
+    async with httpx.AsyncClient(app=app, base_url="http://check") as client:
+        for path, index in CHECKS:
+            path = path.format(**values)
+            captured.clear()
+            response = await client.get(path)
+            statements = list(captured)
+            plans = [await explain(statement, parameters, real_costs) for statement, parameters in statements]
+            if response.status_code == 200 and any(index in plan for plan in plans):
+                print(f"ok    {path} uses {index}")
+                continue
+            failures += 1
+            print(f"FAIL  {path} (HTTP {response.status_code}) does not use {index}")
+            for plan in plans:
+                print("      " + plan.replace("\n", "\n      "))
+    await async_engine.dispose()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the listing routes and check their indexes")
+    parser.add_argument("--real-costs", action="store_true", help="Leave sequential scans enabled")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.real_costs)) else 0)
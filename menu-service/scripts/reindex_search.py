@@ -0,0 +1,21 @@
+"""
+Rebuild the Elasticsearch menu index from Postgres.
+
+Item writes keep the index in sync incrementally; run this once when enabling the Elasticsearch
+backend, or after the cluster lost data:
+
+    SEARCH_BACKEND=elasticsearch python -m app.scripts.reindex_search
+"""
+import asyncio
+
+from app.core.search import ElasticsearchSearchBackend, search_backend
+
+async def main():
+    if not isinstance(search_backend, ElasticsearchSearchBackend):
+        print("SEARCH_BACKEND is not elasticsearch; the Postgres backend needs no reindex")
+        return
+    await search_backend.reindex()
+    print(f"Reindexed menu items into '{search_backend.index}'")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,103 @@
+"""
+Stand-in for restaurant-service, for running menu-service's restaurant validation locally without
+the real service and its database:
+
+    python -m app.scripts.stub_restaurant_service --restaurants 1-500 --inactive 7,9 --port 8000
+    RESTAURANT_SERVICE_URL=http://localhost:8000 uvicorn app.main:app --port 8001
+
+It answers the batch lookup menu-service sends (GET /api/restaurants/?ids=...) from an in-memory
+set of restaurants. --latency and --failure-rate make it slow or flaky, to watch the lookup cache
+and the 503 menu writes return when restaurants cannot be checked. PUT /api/restaurants/{id} with
+{"is_active": false} changes a restaurant and, with --notify-url, posts a change event the way
+restaurant-service's outbox webhook sink does. GET /stub/stats reports how many lookups reached
+the stub.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Query
+from pydantic import BaseModel
+
+class RestaurantState(BaseModel):
+    is_active: bool
+
+def parse_ranges(value: str) -> set:
+    """"1-100,250,300-310" -> the ids it names."""
+    ids = set()
+    for part in filter(None, (p.strip() for p in value.split(","))):
+        start, _, end = part.partition("-")
+        ids.update(range(int(start), int(end or start) + 1))
+    return ids
+
+def create_app(restaurants: Dict[int, bool], latency: float, failure_rate: float, notify_url: Optional[str]) -> FastAPI:
+    app = FastAPI(title="Restaurant Service stub")
+    stats = {"lookups": 0, "ids": 0, "failures": 0}
+    sequence = itertools.count(1)
+
+    async def notify(restaurant_id: int, operation: str, payload: Optional[dict]):
+        if not notify_url:
+            return
+        event = {
+            "id": next(sequence),
+            "entity": "restaurant",
+            "entity_id": restaurant_id,
+            "restaurant_id": restaurant_id,
+            "operation": operation,
+            "payload": payload,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        async with httpx.AsyncClient() as client:
+            await client.post(notify_url, json={"events": [event]})
+
+    @app.get("/api/restaurants/")
+    async def lookup(ids: str = Query(""), limit: int = 100):
+        stats["lookups"] += 1
+        await asyncio.sleep(latency)
+        if random.random() < failure_rate:
+            stats["failures"] += 1
+            raise HTTPException(status_code=503, detail="Stub failure")
+        requested = [int(value) for value in ids.split(",") if value]
+        stats["ids"] += len(requested)
+        return [{"id": i, "is_active": restaurants[i]} for i in requested if i in restaurants][:limit]
+
+    @app.put("/api/restaurants/{restaurant_id}")
+    async def update(restaurant_id: int, state: RestaurantState):
+        restaurants[restaurant_id] = state.is_active
+        await notify(restaurant_id, "updated", {"is_active": state.is_active})
+        return {"id": restaurant_id, "is_active": state.is_active}
+
+    @app.delete("/api/restaurants/{restaurant_id}")
+    async def delete(restaurant_id: int):
+        restaurants.pop(restaurant_id, None)
+        await notify(restaurant_id, "deleted", None)
+        return {"id": restaurant_id}
+
+    @app.get("/stub/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a stand-in restaurant-service for menu-service")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--restaurants", default="1-1000", help="Ids that exist, e.g. 1-1000,2000")
+    parser.add_argument("--inactive", default="", help="Ids that exist but are inactive")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every lookup")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of lookups answered with a 503")
+    parser.add_argument("--notify-url", help="menu-service change route, e.g. http://localhost:8001/api/menus/restaurants/changes")
+    args = parser.parse_args()
+
+    inactive = parse_ranges(args.inactive)
+    restaurants = {i: i not in inactive for i in parse_ranges(args.restaurants) | inactive}
+    app = create_app(restaurants, args.latency, args.failure_rate, args.notify_url)
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import sys
+import types
+from pathlib import Path
+
+# Settings are read at import, so point the service at its test database before anything imports
+# it. Tests that need Postgres truncate the tables they use; never run them against a real database.
+os.environ["POSTGRES_DB"] = os.environ.get("TEST_POSTGRES_DB", "menu_service_test")
+# Writes look their restaurant up in restaurant-service; tests of that build their own directory
+os.environ.setdefault("RESTAURANT_VALIDATION_ENABLED", "false")
+
+# The image runs this directory as the app package (app.main:app); import it under that name here too
+app_package = types.ModuleType("app")
+app_package.__path__ = [str(Path(__file__).resolve().parent.parent)]
+sys.modules.setdefault("app", app_package)
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.cache import menu_cache
+from app.core.config import settings
+from app.core.database import Base, async_engine
+from app.models import history, idempotency, menu, outbox  # noqa: F401  registers the tables
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def database():
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as exc:
+        pytest.skip(f"test database {settings.POSTGRES_DB} is not reachable: {exc}")
+    # Rebuilt every session, so the tables follow the models
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+async def db(database):
+    """Empty tables and cache for the test; the async engine's connections are dropped after it, with its event loop."""
+    with database.begin() as conn:
+        conn.execute(text(
+            "TRUNCATE menu_items, categories, change_events, idempotency_keys, menu_item_history, menu_item_history_position RESTART IDENTITY"
+        ))
+    menu_cache.clear()
+    yield async_engine
+    await async_engine.dispose()
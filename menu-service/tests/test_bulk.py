@@ -0,0 +1,65 @@
+import json
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.core.bulk import bulk_insert
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.main import app
+from app.models.menu import MenuItem as MenuItemModel
+
+pytestmark = pytest.mark.anyio
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def names_by_id(db):
+    async with db.connect() as conn:
+        return dict((await conn.execute(select(MenuItemModel.id, MenuItemModel.name))).all())
+
+async def test_inserted_ids_line_up_with_their_rows(db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_BATCH_SIZE", 700)
+    rows = [{"restaurant_id": 1 + i % 3, "name": f"item-{i}", "price": 1.0} for i in range(2500)]
+    async with AsyncSessionLocal() as session:
+        ids = await bulk_insert(session, MenuItemModel, rows)
+        await session.commit()
+    names = await names_by_id(db)
+    assert len(set(ids)) == len(rows)
+    assert [names[id] for id in ids] == [row["name"] for row in rows]
+
+async def test_bulk_upsert_reports_each_row(db):
+    async with client() as api:
+        created = (await api.post("/api/menus/items/bulk", json=[
+            {"restaurant_id": 1, "name": "Pho", "price": 11.5},
+            {"restaurant_id": 1, "price": 9.0},
+            {"restaurant_id": 2, "name": "Banh mi", "price": 7.0},
+        ])).json()
+        first, _, third = created["results"]
+        ndjson = "\n".join(json.dumps(row) for row in [
+            {"id": first["id"], "restaurant_id": 1, "name": "Pho bo", "price": 12.0},
+            {"id": 999, "restaurant_id": 1, "name": "Ghost", "price": 1.0},
+            {"id": first["id"], "restaurant_id": 1, "name": "Pho ga", "price": 12.0},
+        ])
+        updated = (await api.post("/api/menus/items/bulk", content=ndjson, headers={"Content-Type": "application/x-ndjson"})).json()
+
+    assert (created["created"], created["failed"]) == (2, 1)
+    assert [r["status"] for r in created["results"]] == ["created", "invalid", "created"]
+    assert [r["status"] for r in updated["results"]] == ["updated", "not_found", "invalid"]
+    assert await names_by_id(db) == {first["id"]: "Pho bo", third["id"]: "Banh mi"}
+
+async def test_bulk_update_and_delete(db):
+    async with client() as api:
+        created = (await api.post("/api/menus/items/bulk", json=[
+            {"restaurant_id": 1, "name": "Pho", "price": 11.5},
+            {"restaurant_id": 1, "name": "Bun", "price": 9.0},
+        ])).json()
+        pho, bun = (r["id"] for r in created["results"])
+        updated = (await api.patch("/api/menus/items/bulk", json=[{"id": pho, "price": 13.0}, {"id": 999, "price": 1.0}])).json()
+        deleted = (await api.post("/api/menus/items/bulk-delete", json={"ids": [bun, 999]})).json()
+
+    assert [r["status"] for r in updated["results"]] == ["updated", "not_found"]
+    assert [r["status"] for r in deleted["results"]] == ["deleted", "not_found"]
+    async with db.connect() as conn:
+        assert (await conn.execute(select(MenuItemModel.id, MenuItemModel.price))).all() == [(pho, 13.0)]
@@ -0,0 +1,107 @@
+import asyncio
+
+import fakeredis
+from fakeredis.aioredis import FakeRedis
+import pytest
+
+from app.core import cache
+from app.core.cache import ALL_RESTAURANTS, LRUCache, MenuCache, decode_response, encode_response
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+def redis_cache(server, **options) -> MenuCache:
+    return MenuCache(redis=FakeRedis(server=server), **options)
+
+def test_lru_evicts_the_least_recently_used_entry():
+    lru = LRUCache(max_entries=2, ttl=60)
+    lru.set("a", 1, "r1")
+    lru.set("b", 2, "r1")
+    assert lru.get("a") == 1  # b is now the least recently used
+    lru.set("c", 3, "r2")
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+    assert lru._tags == {"r1": {"a"}, "r2": {"c"}}
+
+def test_lru_entries_expire(clock):
+    lru = LRUCache(max_entries=10, ttl=5)
+    lru.set("a", 1, "r1")
+    clock[0] += 6
+    assert lru.get("a") is None
+    assert len(lru) == 0 and lru._tags == {}
+
+def test_lru_delete_tag_only_drops_that_tag():
+    lru = LRUCache(max_entries=10, ttl=60)
+    lru.set("a", 1, "r1")
+    lru.set("b", 2, "r2")
+    lru.set("a", 3, "r2")  # re-tagged
+    lru.delete_tag("r1")
+    assert (lru.get("a"), lru.get("b")) == (3, 2)
+    lru.delete_tag("r2")
+    assert len(lru) == 0 and lru._tags == {}
+
+def test_responses_round_trip_with_their_headers():
+    value = encode_response(b'{"id":1}\n', {"ETag": '"v1"'})
+    assert decode_response(value) == (b'{"id":1}\n', {"ETag": '"v1"'})
+
+@pytest.mark.anyio
+async def test_invalidation_drops_the_restaurant_and_cross_restaurant_entries(server):
+    menus = redis_cache(server)
+    await menus.set("menu:item:1", b"one", restaurant_id=1)
+    await menus.set("menu:item:2", b"two", restaurant_id=2)
+    await menus.set("menu:items:all", b"all")
+
+    await menus.invalidate_restaurant(1)
+
+    redis = FakeRedis(server=server)
+    assert await redis.exists("menu:item:1", "menu:items:all") == 0
+    assert await redis.get("menu:item:2") == b"two"
+    assert await redis.smembers(f"menu:tag:{ALL_RESTAURANTS}") == set()
+    assert menus.local.get("menu:item:1") is None and menus.local.get("menu:items:all") is None
+    assert await menus.get("menu:item:2") == b"two"
+
+@pytest.mark.anyio
+async def test_redis_entries_fill_the_local_tier_as_cross_restaurant(server):
+    writer, reader = redis_cache(server), redis_cache(server)
+    await writer.set("menu:item:1", b"one", restaurant_id=1)
+    assert await reader.get("menu:item:1") == b"one"
+    assert reader.local.get("menu:item:1") == b"one"
+    assert (reader.hits, reader.misses) == (1, 0)
+
+    # Any restaurant's write evicts an entry whose restaurant this worker does not know
+    await reader.invalidate_restaurant(2)
+    assert reader.local.get("menu:item:1") is None
+
+@pytest.mark.anyio
+async def test_invalidation_is_repeated_after_the_replica_lag():
+    menus = MenuCache(replica_lag=0.05)
+    await menus.set("menu:item:1", b"fresh", restaurant_id=1)
+    await menus.invalidate_restaurant(1)
+    # A read served by a replica that has not replayed the write yet refills the entry
+    await menus.set("menu:item:1", b"stale", restaurant_id=1)
+    assert await menus.get("menu:item:1") == b"stale"
+    await asyncio.gather(*menus._repeats)
+    assert await menus.get("menu:item:1") is None
+
+@pytest.mark.anyio
+async def test_unavailable_redis_falls_back_to_the_local_tier(server):
+    menus = redis_cache(server)
+    server.connected = False
+    await menus.set("menu:item:1", b"one", restaurant_id=1)
+    assert await menus.get("menu:item:1") == b"one"
+    await menus.invalidate_restaurant(1)
+    assert await menus.get("menu:item:1") is None
+    assert (menus.hits, menus.misses) == (1, 1)
+
+@pytest.mark.anyio
+async def test_disabled_cache_stores_nothing():
+    menus = MenuCache(enabled=False)
+    await menus.set("menu:item:1", b"one", restaurant_id=1)
+    assert await menus.get("menu:item:1") is None
+    assert len(menus.local) == 0
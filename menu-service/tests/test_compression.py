@@ -0,0 +1,125 @@
+import gzip
+import json
+import zlib
+
+import httpx
+import pytest
+
+from app.core import compression
+from app.core.bulk import bulk_insert
+from app.core.compression import CompressionMiddleware, negotiate_encoding
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.main import app
+from app.models.menu import MenuItem as MenuItemModel
+
+pytestmark = pytest.mark.anyio
+
+BODY = b'{"name":"Pho bo","price":12.0}' * 100
+
+def responder(chunks, status=200, headers=()):
+    """ASGI app sending `chunks` as the body, one message each."""
+
+    async def asgi(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json"), *headers]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return asgi
+
+async def fetch(asgi_app, accept_encoding="gzip", method="GET"):
+    """Headers and body as sent, without httpx decoding the body."""
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://test") as client:
+        async with client.stream(method, "/", headers={"Accept-Encoding": accept_encoding}) as response:
+            return response.headers, b"".join([chunk async for chunk in response.aiter_raw()])
+
+@pytest.mark.parametrize("accept_encoding, encoding", [
+    ("gzip", "gzip"),
+    ("gzip, br", "br"),
+    ("br;q=0.5, gzip", "gzip"),
+    ("*", "br"),
+    ("br;q=0, gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+def test_negotiate_encoding(accept_encoding, encoding):
+    assert negotiate_encoding(accept_encoding) == encoding
+
+def test_negotiate_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert negotiate_encoding("br, gzip") == "gzip"
+    assert negotiate_encoding("br") is None
+
+async def test_large_bodies_are_gzipped():
+    headers, body = await fetch(CompressionMiddleware(responder([BODY], headers=[(b"etag", b'"v1"')]), minimum_size=1024))
+    assert headers["content-encoding"] == "gzip"
+    assert headers["vary"] == "Accept-Encoding"
+    assert int(headers["content-length"]) == len(body) < len(BODY)
+    assert gzip.decompress(body) == BODY
+    # The compressed body is not byte-identical to the identity one, so its validator is weak
+    assert headers["etag"] == 'W/"v1"'
+
+async def test_brotli_is_preferred_when_available():
+    brotli = pytest.importorskip("brotli")
+    headers, body = await fetch(CompressionMiddleware(responder([BODY]), minimum_size=1024), accept_encoding="gzip, br")
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(body) == BODY
+
+async def test_small_bodies_are_sent_as_they_are():
+    headers, body = await fetch(CompressionMiddleware(responder([b"{}"]), minimum_size=1024))
+    assert "content-encoding" not in headers
+    assert headers["vary"] == "Accept-Encoding"
+    assert body == b"{}"
+
+@pytest.mark.parametrize("app_options, method", [
+    ({"headers": [(b"content-type", b"text/event-stream")]}, "GET"),
+    ({"headers": [(b"content-encoding", b"gzip")]}, "GET"),
+    ({"status": 304}, "GET"),
+    ({}, "HEAD"),
+])
+async def test_responses_that_must_not_be_compressed_pass_through(app_options, method):
+    headers, body = await fetch(CompressionMiddleware(responder([BODY], **app_options), minimum_size=10), method=method)
+    assert "vary" not in headers
+    assert body == (b"" if method == "HEAD" else BODY)
+
+async def test_streamed_chunks_are_flushed_as_they_come():
+    sent = []
+    chunks = [b'{"id":1}\n' * 50, b'{"id":2}\n' * 50, b""]
+
+    async def capture(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(responder(chunks), minimum_size=10)(scope, None, capture)
+    bodies = [message["body"] for message in sent if message["type"] == "http.response.body"]
+    assert len(bodies) == 3
+    assert b"content-length" not in dict(sent[0]["headers"])
+    # Each chunk decodes on its own, before the stream ends
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(bodies[0]) == chunks[0]
+    assert decoder.decompress(bodies[1]) == chunks[1]
+    assert decoder.decompress(bodies[2]) + decoder.flush() == b""
+    assert decoder.eof
+
+@pytest.fixture
+async def items(db, monkeypatch):
+    monkeypatch.setattr(settings, "STREAM_BATCH_SIZE", 100)
+    async with AsyncSessionLocal() as session:
+        ids = await bulk_insert(session, MenuItemModel, [{"restaurant_id": 1, "name": f"item-{i}", "price": 1.0} for i in range(250)])
+        await session.commit()
+    return ids
+
+async def test_listing_streams_every_row_as_ndjson(items):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/menus/items/", params={"fields": "id,name"}, headers={"Accept": "application/x-ndjson", "Accept-Encoding": "gzip"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-encoding"] == "gzip"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == items
+    assert rows[0] == {"id": items[0], "name": "item-0"}
+
+@pytest.mark.parametrize("restaurant_id, expected", [(1, 250), (2, 0)])
+async def test_listing_streams_one_json_array(items, restaurant_id, expected):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/menus/items/", params={"stream": "true", "restaurant_id": restaurant_id})
+    assert len(response.json()) == expected
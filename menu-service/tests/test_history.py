@@ -0,0 +1,82 @@
+import httpx
+import pytest
+from sqlalchemy import func, select, text
+
+from app.core.history import HistoryRecorder, position_table, table as history
+from app.core.outbox import change, table as events
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+@pytest.fixture
+async def recorder(db):
+    recorder = HistoryRecorder(batch_size=100)
+    await recorder.maintain_partitions()
+    return recorder
+
+async def write(db, *changes):
+    async with db.begin() as conn:
+        await conn.execute(events.insert(), list(changes))
+
+async def copied(db):
+    async with db.connect() as conn:
+        rows = (await conn.execute(select(history.c.menu_item_id, history.c.price, history.c.is_available).order_by(history.c.event_id))).all()
+    return [tuple(row) for row in rows]
+
+async def test_price_and_availability_writes_are_copied(db, recorder):
+    await write(
+        db,
+        change("menu_item", "updated", 1, 7, {"price": 9.5}),
+        change("menu_item", "updated", 1, 7, {"name": "Pho"}),
+        change("category", "updated", 3, 7, {"price": 1.0}),
+        change("menu_item", "updated", 2, 7, {"is_available": False}),
+    )
+    assert await recorder.record_batch() == 4
+    assert await copied(db) == [(1, 9.5, None), (2, None, False)]
+    assert recorder.recorded == 2
+
+async def test_workers_and_restarts_carry_on_from_the_stored_position(db, recorder):
+    await write(db, change("menu_item", "updated", 1, 7, {"price": 9.5}))
+    assert await recorder.record_batch() == 1
+
+    # Another worker, or this one restarted, has nothing left to read
+    other = HistoryRecorder(batch_size=100)
+    assert await other.record_batch() == 0
+    await write(db, change("menu_item", "updated", 1, 7, {"price": 10.0}))
+    assert await other.record_batch() == 1
+    assert await recorder.record_batch() == 0
+
+    async with db.connect() as conn:
+        last = (await conn.execute(select(func.max(events.c.id)))).scalar()
+        assert (await conn.execute(select(position_table.c.event_id))).scalar() == last
+    assert await copied(db) == [(1, 9.5, None), (1, 10.0, None)]
+
+async def test_lower_id_committed_late_is_still_copied(db, recorder):
+    first, second = await db.connect(), await db.connect()
+    try:
+        early, late = await first.begin(), await second.begin()
+        await first.execute(text("SELECT txid_current()"))
+        await second.execute(events.insert(), [change("menu_item", "updated", 1, 7, {"price": 1.0})])
+        await first.execute(events.insert(), [change("menu_item", "updated", 2, 7, {"price": 2.0})])
+        await early.commit()
+        assert await recorder.record_batch() == 1
+        await late.commit()
+    finally:
+        await first.close()
+        await second.close()
+    assert await recorder.record_batch() == 1
+    assert sorted(await copied(db)) == [(1, 1.0, None), (2, 2.0, None)]
+
+async def test_item_history_pages_oldest_first(db, recorder):
+    await write(db, *[change("menu_item", "updated", 1, 7, {"price": float(price)}) for price in range(5)])
+    await recorder.record_batch()
+    prices, cursor = [], None
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as api:
+        while True:
+            response = await api.get("/api/menus/items/1/history", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+            prices += [row["price"] for row in response.json()]
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if cursor is None:
+                break
+    assert prices == [0.0, 1.0, 2.0, 3.0, 4.0]
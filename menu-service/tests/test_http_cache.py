@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from app.api import routes
+from app.core.cache import menu_cache
+from app.core.config import settings
+from app.core.http_cache import etag_matches, row_version
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+@pytest.mark.parametrize("if_none_match, etag, matches", [
+    ('W/"item-1-5"', 'W/"item-1-5"', True),
+    ('"item-1-5"', 'W/"item-1-5"', True),
+    ('"item-1-4", W/"item-1-5"', 'W/"item-1-5"', True),
+    ("*", 'W/"item-1-5"', True),
+    ('W/"item-1-4"', 'W/"item-1-5"', False),
+    ("*", None, False),
+])
+def test_etag_matches_compares_weakly(if_none_match, etag, matches):
+    assert etag_matches(if_none_match, etag) is matches
+
+def test_row_version_is_the_latest_change():
+    created = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    item = SimpleNamespace(created_at=created, updated_at=None)
+    category = SimpleNamespace(created_at=created, updated_at=created + timedelta(days=1))
+    assert row_version(item) == created
+    assert row_version(item, category, None) == created + timedelta(days=1)
+    assert row_version(None) is None
+
+@pytest.fixture
+async def item(db):
+    async with client() as api:
+        response = await api.post("/api/menus/items/", json={"restaurant_id": 1, "name": "Pho", "price": 11.5})
+    return response.json()
+
+async def test_item_carries_validators(item):
+    async with client() as api:
+        response = await api.get(f"/api/menus/items/{item['id']}")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith(f'W/"item-{item["id"]}-')
+    assert response.headers["last-modified"].endswith(" GMT")
+    assert response.headers["cache-control"] == settings.HTTP_CACHE_CONTROL_MENU_ITEM
+
+@pytest.mark.parametrize("cached", [False, True], ids=["loaded", "cached"])
+async def test_matching_etag_gets_a_304_without_serializing(item, monkeypatch, cached):
+    async with client() as api:
+        etag = (await api.get(f"/api/menus/items/{item['id']}")).headers["etag"]
+        if not cached:
+            menu_cache.clear()
+        serialized = []
+        encode_json = routes._encode_json
+        monkeypatch.setattr(routes, "_encode_json", lambda payload: serialized.append(payload) or encode_json(payload))
+        response = await api.get(f"/api/menus/items/{item['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert serialized == []
+
+async def test_if_modified_since(item):
+    async with client() as api:
+        last_modified = (await api.get(f"/api/menus/items/{item['id']}")).headers["last-modified"]
+        unchanged = await api.get(f"/api/menus/items/{item['id']}", headers={"If-Modified-Since": last_modified})
+        older = format_datetime(datetime(2000, 1, 1, tzinfo=timezone.utc), usegmt=True)
+        changed = await api.get(f"/api/menus/items/{item['id']}", headers={"If-Modified-Since": older})
+        # If-None-Match takes precedence when both are sent
+        both = await api.get(f"/api/menus/items/{item['id']}", headers={"If-None-Match": 'W/"stale"', "If-Modified-Since": last_modified})
+    assert (unchanged.status_code, changed.status_code, both.status_code) == (304, 200, 200)
+
+async def test_updates_change_the_etag(item):
+    async with client() as api:
+        before = (await api.get(f"/api/menus/items/{item['id']}")).headers["etag"]
+        await api.put(f"/api/menus/items/{item['id']}", json={"price": 12.5})
+        response = await api.get(f"/api/menus/items/{item['id']}", headers={"If-None-Match": before})
+    assert response.status_code == 200
+    assert response.headers["etag"] != before
+    assert response.json()["price"] == 12.5
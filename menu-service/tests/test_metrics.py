@@ -0,0 +1,25 @@
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.metrics import UNMATCHED_ROUTE
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+def requests_seen(route: str, status: int) -> float:
+    labels = {"method": "GET", "route": route, "status": str(status)}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0.0
+
+@pytest.mark.parametrize("path, route, status", [
+    ("/api/menus/items/12345", "/api/menus/items/{item_id}", 404),
+    ("/api/menus/restaurants/7/history", "/api/menus/restaurants/{restaurant_id}/history", 200),
+    ("/health", "/health", 200),
+    ("/api/nothing/here", UNMATCHED_ROUTE, 404),
+])
+async def test_requests_are_labelled_with_their_route_template(db, path, route, status):
+    before = requests_seen(route, status)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(path)
+    assert response.status_code == status
+    assert requests_seen(route, status) == before + 1
@@ -0,0 +1,33 @@
+import httpx
+import pytest
+
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+async def test_writes_are_served_by_the_change_feed_in_order(db):
+    async with client() as api:
+        category = (await api.post("/api/menus/categories/", json={"name": "Mains", "restaurant_id": 7})).json()
+        item = (await api.post("/api/menus/items/", json={"name": "Pho", "price": 11.5, "restaurant_id": 7, "category_id": category["id"]})).json()
+        await api.patch(f"/api/menus/items/{item['id']}/availability", json={"is_available": False})
+        await api.delete(f"/api/menus/items/{item['id']}")
+
+        first = (await api.get("/api/menus/changes", params={"limit": 2})).json()
+        rest = (await api.get("/api/menus/changes", params={"since": first["next_since"]})).json()
+
+    events = first["events"] + rest["events"]
+    assert [(e["entity"], e["operation"]) for e in events] == [
+        ("category", "created"), ("menu_item", "created"), ("menu_item", "updated"), ("menu_item", "deleted"),
+    ]
+    assert events[2]["payload"] == {"is_available": False}
+    assert all(e["restaurant_id"] == 7 for e in events)
+    assert rest["next_since"] == events[-1]["id"]
+
+async def test_purged_since_is_a_410(db):
+    async with client() as api:
+        await api.post("/api/menus/categories/", json={"name": "Mains", "restaurant_id": 7})
+        response = await api.get("/api/menus/changes", params={"since": 999})
+    assert response.status_code == 410
@@ -0,0 +1,59 @@
+import time
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import READ_PRIMARY_COOKIE, ReplicaRouter, async_engine
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+def client(**kwargs) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", **kwargs)
+
+def pinned() -> dict:
+    return {READ_PRIMARY_COOKIE: str(time.time() + 5)}
+
+@pytest.fixture
+async def checkouts(db, monkeypatch):
+    """Routes reads to a replica engine on the test database and counts the connections each engine hands out."""
+    router = ReplicaRouter([settings.DATABASE_URL])
+    monkeypatch.setattr("app.core.database.replica_router", router)
+    counts = {"primary": 0, "replica": 0}
+    listeners = []
+    for name, engine in (("primary", async_engine), ("replica", router.engines[0])):
+        def count(*args, name=name):
+            counts[name] += 1
+        event.listen(engine.sync_engine, "checkout", count)
+        listeners.append((engine.sync_engine, count))
+    yield counts
+    for target, count in listeners:
+        event.remove(target, "checkout", count)
+    await router.close()
+
+@pytest.fixture
+async def item_id(checkouts) -> int:
+    async with client() as api:
+        response = await api.post("/api/menus/items/", json={"restaurant_id": 1, "name": "Pho", "price": 11.5})
+    assert response.status_code == 200
+    checkouts.update(primary=0, replica=0)
+    return response.json()["id"]
+
+@pytest.mark.parametrize("path", ["/api/menus/items/{id}", "/api/menus/items/?restaurant_id=1", "/api/menus/restaurants/1/menu"])
+async def test_reads_go_to_the_replica(item_id, checkouts, path):
+    async with client() as api:
+        response = await api.get(path.format(id=item_id))
+    assert response.status_code == 200
+    assert checkouts == {"primary": 0, "replica": 1}
+
+@pytest.mark.parametrize("path", ["/api/menus/items/{id}", "/api/menus/items/?restaurant_id=1", "/api/menus/restaurants/1/menu"])
+async def test_reads_with_the_read_your_writes_cookie_go_to_the_primary(item_id, checkouts, path):
+    async with client() as api:
+        # Cached by the first read, which a client that just wrote must not be served
+        await api.get(path.format(id=item_id))
+        checkouts.update(primary=0, replica=0)
+        response = await api.get(path.format(id=item_id), cookies=pinned())
+    assert response.status_code == 200
+    assert checkouts == {"primary": 1, "replica": 0}
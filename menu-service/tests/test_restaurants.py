@@ -0,0 +1,118 @@
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from app.core import cache
+from app.core.config import settings
+from app.core.restaurants import RestaurantDirectory, RestaurantUnavailable
+from app.main import app
+from app.models.menu import MenuItem as MenuItemModel
+
+pytestmark = pytest.mark.anyio
+
+ITEM = {"restaurant_id": 1, "name": "Pho", "price": 11.5}
+
+class RestaurantService:
+    """Answers GET /api/restaurants/?ids= like restaurant-service, from a dict of id -> is_active, and records the calls."""
+
+    def __init__(self, restaurants, fail: bool = False):
+        self.restaurants = restaurants
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls.append(dict(request.url.params))
+        if self.fail:
+            raise httpx.ConnectError("connection refused", request=request)
+        ids = [int(id) for id in request.url.params["ids"].split(",")]
+        return httpx.Response(200, json=[{"id": id, "is_active": self.restaurants[id]} for id in ids if id in self.restaurants])
+
+    def directory(self, **options) -> RestaurantDirectory:
+        return RestaurantDirectory("http://restaurants", transport=httpx.MockTransport(self), **options)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    return now
+
+async def test_unknown_ids_are_looked_up_in_one_request():
+    service = RestaurantService({1: True, 2: False})
+    directory = service.directory()
+    assert await directory.lookup([3, 1, 2, 1]) == {1: True, 2: False, 3: None}
+    assert service.calls == [{"ids": "1,2,3", "fields": "id,is_active", "limit": "3"}]
+    await directory.close()
+
+async def test_large_lookups_are_split_into_batches(monkeypatch):
+    monkeypatch.setattr(settings, "RESTAURANT_LOOKUP_BATCH_SIZE", 2)
+    service = RestaurantService({1: True, 2: True, 3: True})
+    directory = service.directory()
+    assert await directory.lookup([1, 2, 3]) == {1: True, 2: True, 3: True}
+    assert [call["ids"] for call in service.calls] == ["1,2", "3"]
+    await directory.close()
+
+async def test_answers_are_cached_and_only_the_rest_is_fetched(clock):
+    service = RestaurantService({1: True, 2: False, 4: True})
+    directory = service.directory(ttl=60, negative_ttl=5)
+    await directory.lookup([1, 2, 3])
+    assert await directory.lookup([1, 2, 3, 4]) == {1: True, 2: False, 3: None, 4: True}
+    assert [call["ids"] for call in service.calls] == ["1,2,3", "4"]
+    assert (directory.hits, directory.misses) == (3, 4)
+    await directory.close()
+
+async def test_unknown_ids_are_asked_again_sooner_than_known_ones(clock):
+    service = RestaurantService({1: True})
+    directory = service.directory(ttl=60, negative_ttl=5)
+    await directory.lookup([1, 2])
+    service.restaurants[2] = True  # created in restaurant-service meanwhile
+    clock[0] += 6
+    assert await directory.lookup([1, 2]) == {1: True, 2: True}
+    assert [call["ids"] for call in service.calls] == ["1,2", "2"]
+    clock[0] += 61
+    await directory.lookup([1, 2])
+    assert [call["ids"] for call in service.calls] == ["1,2", "2", "1,2"]
+    await directory.close()
+
+async def test_invalidated_ids_are_fetched_again():
+    service = RestaurantService({1: True, 2: True})
+    directory = service.directory()
+    await directory.lookup([1, 2])
+    service.restaurants[1] = False
+    directory.invalidate([1])
+    assert await directory.lookup([1, 2]) == {1: False, 2: True}
+    assert [call["ids"] for call in service.calls] == ["1,2", "1"]
+    await directory.close()
+
+@pytest.mark.parametrize("response", [httpx.Response(502), httpx.Response(200, text="<html>"), httpx.Response(200, json=[{"id": 1}])])
+async def test_bad_answers_raise_restaurant_unavailable(response):
+    directory = RestaurantDirectory("http://restaurants", transport=httpx.MockTransport(lambda request: response))
+    with pytest.raises(RestaurantUnavailable):
+        await directory.lookup([1])
+    await directory.close()
+
+async def test_disabled_directory_accepts_every_id():
+    service = RestaurantService({})
+    directory = service.directory(enabled=False)
+    assert await directory.lookup([1, 2]) == {1: True, 2: True}
+    assert service.calls == []
+
+async def item_count(db) -> int:
+    async with db.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(MenuItemModel))).scalar()
+
+async def create_item(service: RestaurantService, monkeypatch, item) -> httpx.Response:
+    monkeypatch.setattr("app.core.restaurants.restaurant_directory", service.directory())
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as api:
+        return await api.post("/api/menus/items/", json=item)
+
+async def test_writes_fail_closed_with_a_503_when_restaurant_service_is_down(db, monkeypatch):
+    response = await create_item(RestaurantService({1: True}, fail=True), monkeypatch, ITEM)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(settings.RESTAURANT_RETRY_AFTER_SECONDS)
+    assert await item_count(db) == 0
+
+@pytest.mark.parametrize("restaurants, status", [({1: True}, 200), ({1: False}, 422), ({}, 422)])
+async def test_writes_need_an_active_restaurant(db, monkeypatch, restaurants, status):
+    response = await create_item(RestaurantService(restaurants), monkeypatch, ITEM)
+    assert response.status_code == status
+    assert await item_count(db) == (status == 200)
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import insert
+
+from app.core.database import AsyncSessionLocal
+from app.core.search import ElasticsearchSearchBackend, PostgresSearchBackend, SearchBackend
+from app.models.menu import MenuItem as MenuItemModel
+
+pytestmark = pytest.mark.anyio
+
+ITEMS = [
+    {"restaurant_id": 1, "name": "Pho bo", "description": "Beef noodle soup", "price": 12.0, "is_vegan": False, "spice_level": 1},
+    {"restaurant_id": 1, "name": "Pho chay", "description": "Tofu noodle soup", "price": 11.0, "is_vegan": True, "spice_level": 1},
+    {"restaurant_id": 2, "name": "Cheeseburger", "description": "With fries", "price": 9.5, "is_vegan": False, "spice_level": 0},
+    {"restaurant_id": 2, "name": "Spicy chicken burger", "description": "Hot sauce", "price": 10.0, "is_vegan": False, "spice_level": 4},
+]
+
+@pytest.fixture
+async def items(db):
+    async with db.begin() as conn:
+        ids = (await conn.execute(insert(MenuItemModel).returning(MenuItemModel.id, sort_by_parameter_order=True), ITEMS)).scalars().all()
+    return dict(zip((item["name"] for item in ITEMS), ids))
+
+async def names(backend: SearchBackend, q: str, **filters):
+    async with AsyncSessionLocal() as db:
+        return [item.name for item, score in await backend.search(db, q, filters, 10)]
+
+def test_backends_must_implement_search():
+    class Incomplete(SearchBackend):
+        async def sync_items(self, item_ids):
+            pass
+
+    with pytest.raises(TypeError):
+        SearchBackend()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+async def test_postgres_search_matches_word_prefixes(items):
+    backend = PostgresSearchBackend()
+    assert await names(backend, "pho") == ["Pho bo", "Pho chay"]
+    assert await names(backend, "noodle tof") == ["Pho chay"]
+    assert await names(backend, "   ") == []
+
+async def test_postgres_search_tolerates_typos(items):
+    assert "Cheeseburger" in await names(PostgresSearchBackend(), "cheesburger")
+
+async def test_postgres_search_applies_filters(items):
+    backend = PostgresSearchBackend()
+    assert await names(backend, "pho", is_vegan=True) == ["Pho chay"]
+    assert await names(backend, "burger", spice_level=2) == ["Cheeseburger"]
+    assert await names(backend, "pho", restaurant_id=2) == []
+
+class FakeElasticsearch:
+    def __init__(self, hits):
+        self.hits = hits
+        self.queries = []
+
+    async def search(self, **request):
+        self.queries.append(request)
+        return {"hits": {"hits": [{"_id": str(id), "_score": score} for id, score in self.hits]}}
+
+async def test_elasticsearch_hits_are_resolved_to_rows_best_first(items):
+    # The index can lag behind: a hit deleted from the database meanwhile is dropped
+    client = FakeElasticsearch([(items["Pho chay"], 1.5), (999, 9.0), (items["Pho bo"], 2.5)])
+    backend = ElasticsearchSearchBackend(client=client)
+    assert await names(backend, "pho", restaurant_id=1, is_vegan=None) == ["Pho bo", "Pho chay"]
+    assert client.queries[0]["query"]["bool"]["filter"] == [{"term": {"restaurant_id": 1}}]
@@ -0,0 +1,110 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.core.database import async_engine
+from app.core.singleflight import Once, SingleFlight
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+class Loader:
+    """Counts its runs and finishes when the test releases it."""
+
+    def __init__(self, result="menu"):
+        self.result = result
+        self.runs = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.runs += 1
+        await self.release.wait()
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+async def started(*calls):
+    tasks = [asyncio.ensure_future(call) for call in calls]
+    await asyncio.sleep(0)
+    return tasks
+
+async def test_concurrent_calls_share_one_run():
+    flight, loader = SingleFlight(), Loader()
+    tasks = await started(*(flight.do("item:1", loader) for _ in range(5)))
+    assert len(flight) == 1
+    loader.release.set()
+    assert await asyncio.gather(*tasks) == ["menu"] * 5
+    assert (loader.runs, flight.leaders, flight.followers) == (1, 1, 4)
+
+async def test_nothing_is_kept_once_the_run_finishes():
+    flight, loader = SingleFlight(), Loader()
+    loader.release.set()
+    await flight.do("item:1", loader)
+    await flight.do("item:1", loader)
+    await flight.do("item:2", loader)
+    assert loader.runs == 3 and len(flight) == 0
+
+async def test_errors_reach_every_caller():
+    flight, loader = SingleFlight(), Loader(RuntimeError("database down"))
+    tasks = await started(*(flight.do("item:1", loader) for _ in range(3)))
+    loader.release.set()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert [type(result) for result in results] == [RuntimeError] * 3
+    assert len(flight) == 0
+
+async def test_followers_give_up_with_a_503_after_the_wait_timeout():
+    flight, loader = SingleFlight(wait_timeout=0.05, retry_after=3), Loader()
+    leader, = await started(flight.do("item:1", loader))
+    with pytest.raises(HTTPException) as error:
+        await flight.do("item:1", loader)
+    assert error.value.status_code == 503
+    assert error.value.headers == {"Retry-After": "3"}
+    assert flight.timeouts == 1
+    # The run itself goes on for the caller that started it
+    loader.release.set()
+    assert await leader == "menu"
+
+async def test_leader_going_away_does_not_fail_the_followers():
+    flight, loader = SingleFlight(), Loader()
+    leader, follower = await started(flight.do("item:1", loader), flight.do("item:1", loader))
+    leader.cancel()
+    await asyncio.sleep(0)
+    loader.release.set()
+    assert await follower == "menu"
+    assert loader.runs == 1
+
+async def test_disabled_runs_every_call():
+    flight, loader = SingleFlight(enabled=False), Loader()
+    loader.release.set()
+    await asyncio.gather(*(flight.do("item:1", loader) for _ in range(3)))
+    assert loader.runs == 3 and flight.leaders == 0
+
+async def test_once_computes_for_the_first_get_only():
+    runs = []
+
+    async def serialize():
+        runs.append(1)
+        await asyncio.sleep(0)
+        return b"{}"
+
+    once = Once(serialize)
+    assert await asyncio.gather(once.get(), once.get()) == [b"{}", b"{}"]
+    assert await once.get() == b"{}"
+    assert len(runs) == 1
+
+async def test_concurrent_reads_of_an_item_run_one_query(db):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as api:
+        item = (await api.post("/api/menus/items/", json={"restaurant_id": 1, "name": "Pho", "price": 11.5})).json()
+        checkouts = []
+        listener = lambda *args: checkouts.append(1)
+        event.listen(async_engine.sync_engine, "checkout", listener)
+        try:
+            responses = await asyncio.gather(*(api.get(f"/api/menus/items/{item['id']}") for _ in range(10)))
+        finally:
+            event.remove(async_engine.sync_engine, "checkout", listener)
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert len(checkouts) == 1
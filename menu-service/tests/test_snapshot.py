@@ -0,0 +1,63 @@
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core.database import async_engine
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+@pytest.fixture
+async def menu(db):
+    """Three categories of restaurant 1, two items in each, one item outside them, and another restaurant's category."""
+    async with client() as api:
+        categories = {}
+        for name, display_order in (("Drinks", 2), ("Starters", None), ("Mains", 1)):
+            category = (await api.post("/api/menus/categories/", json={"restaurant_id": 1, "name": name, "display_order": display_order})).json()
+            categories[name] = category["id"]
+            for dish in ("a", "b"):
+                await api.post("/api/menus/items/", json={"restaurant_id": 1, "category_id": category["id"], "name": f"{name} {dish}", "price": 5.0})
+        await api.post("/api/menus/items/", json={"restaurant_id": 1, "name": "Daily special", "price": 9.0})
+        await api.post("/api/menus/categories/", json={"restaurant_id": 2, "name": "Elsewhere"})
+    return categories
+
+async def test_snapshot_has_the_whole_menu_in_display_order(menu):
+    async with client() as api:
+        snapshot = (await api.get("/api/menus/restaurants/1/menu")).json()
+    assert [category["name"] for category in snapshot["categories"]] == ["Starters", "Mains", "Drinks"]
+    assert [item["name"] for item in snapshot["categories"][1]["items"]] == ["Mains a", "Mains b"]
+    assert [item["name"] for item in snapshot["uncategorized_items"]] == ["Daily special"]
+
+async def test_snapshot_loads_in_three_queries_however_many_categories(menu):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        async with client() as api:
+            response = await api.get("/api/menus/restaurants/1/menu")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert response.status_code == 200
+    assert len(statements) == 3
+
+async def test_version_changes_with_the_menu_and_revalidates(menu):
+    async with client() as api:
+        first = await api.get("/api/menus/restaurants/1/menu")
+        version = first.json()["version"]
+        # Weakened when the response was compressed
+        assert first.headers["etag"] in (f'"{version}"', f'W/"{version}"')
+        revalidated = await api.get("/api/menus/restaurants/1/menu", headers={"If-None-Match": first.headers["etag"]})
+        # Another restaurant's change leaves this menu's version alone
+        await api.post("/api/menus/items/", json={"restaurant_id": 2, "name": "Elsewhere special", "price": 9.0})
+        unchanged = await api.get("/api/menus/restaurants/1/menu")
+        await api.put(f"/api/menus/categories/{menu['Drinks']}", json={"name": "Beverages"})
+        changed = await api.get("/api/menus/restaurants/1/menu", headers={"If-None-Match": first.headers["etag"]})
+
+    assert (revalidated.status_code, revalidated.content) == (304, b"")
+    assert unchanged.json()["version"] == version
+    assert changed.status_code == 200
+    assert changed.json()["version"] != version
+    assert changed.json()["categories"][2]["name"] == "Beverages"
@@ -1,70 +1,223 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Literal, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
 
-from app.core.database import get_db
-from app.models.restaurant import Restaurant as RestaurantModel
-from app.schemas.restaurant import Restaurant, RestaurantCreate, RestaurantUpdate
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_async_db, get_read_db, read_engine, reads_primary
+from app.core.facets import facet_counts, facet_refresher
+from app.core.geo import distance_km, nearby_filter
+from app.core.http_cache import is_not_modified, not_modified, row_version, validator_headers, version_etag
+from app.core.outbox import change, outbox_relay, read_changes, record_changes
+from app.core.pagination import NEXT_CURSOR_HEADER, keyset_filter, next_cursor
+from app.core.serialization import dump_rows, parse_fields, projection, schema_columns, stream_format, stream_rows
+from app.core.singleflight import Once, restaurant_reads
+from app.models.restaurant import Restaurant as RestaurantModel, restaurant_rating_key
+from app.schemas.restaurant import ChangeFeed, Restaurant, RestaurantCreate, RestaurantFacets, RestaurantNearby, RestaurantUpdate
 
 restaurant_router = APIRouter()
 
+# List endpoints select these columns as plain rows and encode them with orjson (see core/serialization.py)
+RESTAURANT_COLUMNS = schema_columns(RestaurantModel, Restaurant.model_fields)
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        return [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+
+def _json_rows(rows, cursor_value: Optional[str] = None, fields: Optional[List[str]] = None) -> Response:
+    headers = {NEXT_CURSOR_HEADER: cursor_value} if cursor_value else None
+    return Response(content=dump_rows(rows, fields), media_type="application/json", headers=headers)
+
 @restaurant_router.post("/", response_model=Restaurant)
-def create_restaurant(restaurant: RestaurantCreate, db: Session = Depends(get_db)):
-    db_restaurant = RestaurantModel(**restaurant.dict())
+async def create_restaurant(restaurant: RestaurantCreate, db: AsyncSession = Depends(get_async_db)):
+    data = restaurant.dict()
+    db_restaurant = RestaurantModel(**data)
     db.add(db_restaurant)
-    db.commit()
-    db.refresh(db_restaurant)
+    await db.flush()
+    await record_changes(db, [change("restaurant", "created", db_restaurant.id, db_restaurant.id, data)])
+    await db.commit()
+    await db.refresh(db_restaurant)
+    facet_refresher.mark_dirty()
+    outbox_relay.wake()
     return db_restaurant
 
 @restaurant_router.get("/", response_model=List[Restaurant])
-def get_restaurants(
-    skip: int = 0, 
-    limit: int = 100, 
+async def get_restaurants(
+    request: Request,
+    skip: int = 0,
+    limit: Optional[int] = Query(None, ge=1, le=settings.MAX_PAGE_SIZE, description="Rows to return; 100 by default, all when streamed"),
     cuisine_type: Optional[str] = None,
     city: Optional[str] = None,
-    db: Session = Depends(get_db)
+    ids: Optional[str] = Query(None, description="Comma-separated restaurant ids to look up"),
+    sort: Literal["id", "rating"] = "id",
+    is_active: Optional[bool] = Query(None, description="Only active (true) or inactive (false) restaurants; both by default"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; replaces skip"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,rating,cuisine_type"),
+    stream: bool = Query(False, description="Stream the rows as one chunked JSON array; Accept: application/x-ndjson streams NDJSON"),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(RestaurantModel)
-    
+    # Only the requested columns are selected; the sort keys are added when missing so the cursor can be built
+    selected = parse_fields(fields, Restaurant.model_fields)
+    query = select(*projection(RESTAURANT_COLUMNS, selected, required=("rating", "id") if sort == "rating" else ("id",)))
+
+    if is_active is not None:
+        query = query.where(RestaurantModel.is_active == is_active)
+
     if cuisine_type:
-        query = query.filter(RestaurantModel.cuisine_type == cuisine_type)
-    
+        query = query.where(RestaurantModel.cuisine_type == cuisine_type)
+
     if city:
-        query = query.filter(RestaurantModel.city == city)
-    
-    return query.offset(skip).limit(limit).all()
+        query = query.where(RestaurantModel.city == city)
 
-@restaurant_router.get("/{restaurant_id}", response_model=Restaurant)
-def get_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    db_restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
+    if ids:
+        query = query.where(RestaurantModel.id.in_(_parse_ids(ids)))
+
+    # Keyset ordering: (id) ascending, or (rating, id) descending for best-rated first
+    if sort == "rating":
+        keys = [restaurant_rating_key, RestaurantModel.id]
+        query = query.order_by(keys[0].desc(), keys[1].desc())
+        key = lambda r: [r.rating or 0.0, r.id]
+    else:
+        keys = [RestaurantModel.id]
+        query = query.order_by(RestaurantModel.id)
+        key = lambda r: [r.id]
+
+    if cursor:
+        query = query.where(keyset_filter(keys, cursor, descending=sort == "rating"))
+    else:
+        query = query.offset(skip)
+
+    # Streamed listings (exports) are read from a server-side cursor and have no page size unless asked for
+    format = stream_format(request, stream)
+    if format is not None:
+        return stream_rows(query if limit is None else query.limit(limit), selected, format, read_engine(request))
+
+    limit = 100 if limit is None else limit
+    rows = (await db.execute(query.limit(limit))).all()
+    return _json_rows(rows, next_cursor(rows, limit, key), selected)
+
+@restaurant_router.get("/nearby", response_model=List[RestaurantNearby])
+async def get_nearby_restaurants(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(5.0, gt=0, le=settings.NEARBY_MAX_RADIUS_KM, description="Search radius in kilometres"),
+    limit: int = Query(20, ge=1, le=settings.MAX_PAGE_SIZE),
+    cuisine_type: Optional[str] = None,
+    is_active: Optional[bool] = Query(None, description="Only active (true) or inactive (false) restaurants; both by default"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    distance = distance_km(RestaurantModel.latitude, RestaurantModel.longitude, lat, lng)
+    query = (
+        select(*RESTAURANT_COLUMNS, distance.label("distance_km"))
+        .where(nearby_filter(RestaurantModel.latitude, RestaurantModel.longitude, RestaurantModel.geohash, lat, lng, radius))
+        .order_by(distance, RestaurantModel.id)
+    )
+
+    if cuisine_type:
+        query = query.where(RestaurantModel.cuisine_type == cuisine_type)
+
+    if is_active is not None:
+        query = query.where(RestaurantModel.is_active == is_active)
+
+    # Pages continue after the (distance, id) of the last row, closest first
+    if cursor:
+        query = query.where(keyset_filter([distance, RestaurantModel.id], cursor))
+
+    rows = (await db.execute(query.limit(limit))).all()
+    return _json_rows(rows, next_cursor(rows, limit, lambda row: [row.distance_km, row.id]))
+
+@restaurant_router.get("/facets", response_model=RestaurantFacets)
+async def get_restaurant_facets(
+    cuisine_type: Optional[str] = None,
+    price_range: Optional[str] = None,
+    city: Optional[str] = None,
+    size: int = Query(20, ge=1, le=500, description="Buckets returned per facet, largest first"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Counts and average rating of active restaurants per cuisine type, price range and city, for
+    any combination of those filters. Served from a summary refreshed a few seconds after writes
+    (FACETS_REFRESH_DELAY_SECONDS), so counts can briefly lag behind.
+    """
+    filters = {"cuisine_type": cuisine_type, "price_range": price_range, "city": city}
+    return await facet_counts(db, filters, size)
+
+@restaurant_router.get("/changes", response_model=ChangeFeed)
+async def get_restaurant_changes(
+    since: int = Query(0, ge=0, description="Last sequence number already processed; 0 for the oldest kept"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Restaurant changes after `since`, oldest first, for consumers syncing incrementally instead of
+    re-reading the listings. Events are kept OUTBOX_RETENTION_HOURS; a 410 means the consumer fell
+    further behind than that and must resync.
+    """
+    return await read_changes(db, since, limit)
+
+async def _load_restaurant(restaurant_id: int, engine: AsyncEngine) -> Optional[Tuple[Optional[datetime], Once]]:
+    # Runs on behalf of every coalesced request, so it uses its own session rather than one of theirs
+    async with AsyncSessionLocal(bind=engine) as db:
+        db_restaurant = await db.get(RestaurantModel, restaurant_id)
     if db_restaurant is None:
+        return None
+
+    async def serialize() -> bytes:
+        return Restaurant.model_validate(db_restaurant).model_dump_json().encode()
+
+    return row_version(db_restaurant), Once(serialize)
+
+@restaurant_router.get("/{restaurant_id}", response_model=Restaurant)
+async def get_restaurant(restaurant_id: int, request: Request):
+    # Concurrent requests for one restaurant (a featured one) share a single fetch; clients that
+    # just wrote only share one from the primary
+    loaded = await restaurant_reads.do(
+        (restaurant_id, reads_primary(request)), lambda: _load_restaurant(restaurant_id, read_engine(request))
+    )
+    if loaded is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    return db_restaurant
+
+    # Revalidating clients get their 304 before anything is serialized; the others share one serialization
+    version, body = loaded
+    headers = validator_headers(version_etag("restaurant", restaurant_id, version), version, settings.HTTP_CACHE_CONTROL_RESTAURANT)
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return Response(content=await body.get(), media_type="application/json", headers=headers)
 
 @restaurant_router.put("/{restaurant_id}", response_model=Restaurant)
-def update_restaurant(
-    restaurant_id: int, 
-    restaurant: RestaurantUpdate, 
-    db: Session = Depends(get_db)
+async def update_restaurant(
+    restaurant_id: int,
+    restaurant: RestaurantUpdate,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
+    db_restaurant = await db.get(RestaurantModel, restaurant_id)
     if db_restaurant is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    
+
     update_data = restaurant.dict(exclude_unset=True)
     for key, value in update_data.items():
         setattr(db_restaurant, key, value)
-    
-    db.commit()
-    db.refresh(db_restaurant)
+
+    await record_changes(db, [change("restaurant", "updated", restaurant_id, restaurant_id, update_data)])
+    await db.commit()
+    await db.refresh(db_restaurant)
+    facet_refresher.mark_dirty()
+    outbox_relay.wake()
     return db_restaurant
 
 @restaurant_router.delete("/{restaurant_id}", response_model=Restaurant)
-def delete_restaurant(restaurant_id: int, db: Session = Depends(get_db)):
-    db_restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
+async def delete_restaurant(restaurant_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_restaurant = await db.get(RestaurantModel, restaurant_id)
     if db_restaurant is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
-    
-    db.delete(db_restaurant)
-    db.commit()
-    return db_restaurant
\ No newline at end of file
+
+    await db.delete(db_restaurant)
+    await record_changes(db, [change("restaurant", "deleted", restaurant_id, restaurant_id)])
+    await db.commit()
+    facet_refresher.mark_dirty()
+    outbox_relay.wake()
+    return db_restaurant
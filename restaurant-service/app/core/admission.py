@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Probes and scrapes are never limited or shed, so an overloaded pod still reports why
+EXEMPT_PATHS = ("/health", "/ready", "/metrics")
+
+# One token bucket per Redis key: refilled at ARGV[1] tokens a second up to ARGV[2]. Returns the
+# seconds until a token is available, 0 when one was taken. Uses the Redis clock so every worker
+# and pod agrees on the refill.
+TAKE_TOKEN_SCRIPT = """
+local rate, burst = tonumber(ARGV[1]), tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+class MemoryBuckets:
+    """Token buckets in this worker's memory, the least recently seen clients dropped past `max_clients`."""
+
+    def __init__(self, max_clients: int = 100000):
+        self.max_clients = max_clients
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # client -> (tokens, updated)
+
+    async def take(self, client: str, rate: float, burst: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+class RedisBuckets:
+    """Token buckets in Redis, shared by every worker and pod. Requests are let through while Redis is down."""
+
+    def __init__(self, redis, prefix: str = "ratelimit:restaurant:"):
+        self.prefix = prefix
+        self._take = redis.register_script(TAKE_TOKEN_SCRIPT)
+
+    async def take(self, client: str, rate: float, burst: float) -> float:
+        try:
+            return float(await self._take(keys=[self.prefix + client], args=[rate, burst]))
+        except Exception as exc:
+            logger.warning("Rate limit Redis call failed, letting the request through: %s", exc)
+            return 0.0
+
+def client_id(scope, key_header: str, trusted_proxies: int = 0) -> str:
+    """
+    The API key sent in `key_header` (hashed, never kept as is), else the client address. Behind
+    `trusted_proxies` proxies that each append the address they got the request from to
+    X-Forwarded-For, the client is that many entries from the right: anything further left was sent
+    by the client itself, which can put any address there to get a fresh bucket on every request.
+    """
+    api_key = None
+    forwarded = []
+    for name, value in scope["headers"]:
+        if name == key_header.lower().encode():
+            api_key = value
+        elif name == b"x-forwarded-for" and trusted_proxies > 0:
+            forwarded += [entry.strip() for entry in value.decode("latin-1").split(",")]
+    if api_key:
+        return "key:" + hashlib.sha256(api_key).hexdigest()[:32]
+    if len(forwarded) >= trusted_proxies > 0:
+        return "ip:" + forwarded[-trusted_proxies]
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+class RateLimitMiddleware:
+    """
+    Token bucket rate limiting per client: `rate` requests a second with bursts of up to `burst`,
+    per API key or per address for clients without one. Requests over the limit get a 429 with a
+    Retry-After telling the client when its next token is due.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend,
+        rate: float = 100,
+        burst: float = 200,
+        key_header: str = "X-API-Key",
+        trusted_proxies: int = 0,
+        enabled: bool = True,
+    ):
+        self.app = app
+        self.backend = backend
+        self.rate = rate
+        self.burst = burst
+        self.key_header = key_header
+        self.trusted_proxies = trusted_proxies
+        self.enabled = enabled and rate > 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        wait = await self.backend.take(client_id(scope, self.key_header, self.trusted_proxies), self.rate, self.burst)
+        if wait > 0:
+            response = JSONResponse(
+                {"detail": "Rate limit exceeded, retry later"},
+                status_code=429,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+class LoadShedMiddleware:
+    """
+    Answers 503 with Retry-After instead of queueing more work once this worker is overloaded:
+    `max_inflight` requests already running, or database checkouts recently waiting longer than
+    `max_pool_wait` seconds on average. A threshold of 0 turns that check off.
+
+    A request counts as running until its response starts. Streamed responses (Server-Sent Events
+    subscribers, exports) would otherwise count for as long as they stay open, and a few hundred
+    subscribers would shed every other request.
+    """
+
+    def __init__(
+        self,
+        app,
+        pool_wait: Callable[[], float],
+        max_inflight: int = 200,
+        max_pool_wait: float = 1,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.pool_wait = pool_wait
+        self.max_inflight = max_inflight
+        self.max_pool_wait = max_pool_wait
+        self.retry_after = retry_after
+        self.inflight = 0
+
+    def overloaded(self) -> bool:
+        if self.max_inflight and self.inflight >= self.max_inflight:
+            return True
+        return bool(self.max_pool_wait) and self.pool_wait() > self.max_pool_wait
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        if self.overloaded():
+            response = JSONResponse(
+                {"detail": "Service overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        running = True
+        self.inflight += 1
+
+        async def send_started(message):
+            nonlocal running
+            if running and message["type"] == "http.response.start":
+                running = False
+                self.inflight -= 1
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_started)
+        finally:
+            if running:
+                self.inflight -= 1
+
+def create_rate_limit_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            from redis.asyncio import Redis
+        except ImportError:
+            logger.warning("RATE_LIMIT_BACKEND is redis but the redis package is not installed; limiting per worker")
+            return MemoryBuckets()
+        return RedisBuckets(Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT))
+    return MemoryBuckets()
@@ -0,0 +1,154 @@
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Streams whose events must reach the client as they are sent; a compressor would hold them back
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream",)
+
+def _accepted_encodings(accept_encoding: str) -> List[Tuple[str, float]]:
+    encodings = []
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            encodings.append((name.strip().lower(), quality))
+    return encodings
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, preferring br on equal quality; None for identity."""
+    available = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_quality = None, 0.0
+    for name, quality in _accepted_encodings(accept_encoding):
+        candidates = available if name == "*" else [name]
+        for candidate in candidates:
+            if candidate in available and quality > best_quality:
+                best, best_quality = candidate, quality
+            elif candidate in available and quality == best_quality and best == "gzip" and candidate == "br":
+                best = candidate
+    return best
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._zlib = None
+        else:
+            # wbits 31 writes a gzip header and trailer around the deflate stream
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._brotli = None
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Compress a chunk; every chunk is flushed so streamed rows reach the client as they are produced."""
+        if self._zlib is not None:
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        out = self._brotli.process(data)
+        return out + (self._brotli.finish() if final else self._brotli.flush())
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing response bodies with brotli (when the brotli package is installed) or
+    gzip, as negotiated with Accept-Encoding. Complete bodies under `minimum_size` bytes are sent as
+    they are, since compressing them costs more CPU than the bytes saved. Streamed bodies (NDJSON
+    exports) are compressed chunk by chunk; Server-Sent Events and already encoded responses are
+    passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict((key.lower(), value) for key, value in scope["headers"])
+        encoding = negotiate_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                response_headers = dict((key.lower(), value) for key, value in message.get("headers", []))
+                media_type = response_headers.get(b"content-type", b"").split(b";")[0].decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in response_headers
+                    or media_type in UNCOMPRESSED_MEDIA_TYPES
+                    or message["status"] < 200
+                    or message["status"] in (204, 304)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    # Small complete response: not worth compressing
+                    passthrough = True
+                    _add_vary(start_message)
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                start_headers = [
+                    (key, _weak_etag(value) if key.lower() == b"etag" else value)
+                    for key, value in start_message.get("headers", [])
+                    if key.lower() != b"content-length"
+                ]
+                start_headers.append((b"content-encoding", encoding.encode()))
+                compressed = compressor.compress(body, final=not more_body)
+                if not more_body:
+                    start_headers.append((b"content-length", str(len(compressed)).encode()))
+                start_message["headers"] = start_headers
+                _add_vary(start_message)
+                await send(start_message)
+                await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+                return
+
+            await send({"type": "http.response.body", "body": compressor.compress(body, final=not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+def _weak_etag(etag: bytes) -> bytes:
+    """
+    A strong ETag promises byte-identical bodies, which the compressed and identity bodies are not.
+    Weakened, it still matches If-None-Match, which compares weakly.
+    """
+    return etag if etag.startswith(b"W/") else b"W/" + etag
+
+def _add_vary(start_message):
+    """Responses differ by Accept-Encoding, so shared caches must key on it."""
+    headers = list(start_message.get("headers", []))
+    for index, (key, value) in enumerate(headers):
+        if key.lower() == b"vary":
+            if b"accept-encoding" not in value.lower():
+                headers[index] = (key, value + b", Accept-Encoding")
+            break
+    else:
+        headers.append((b"vary", b"Accept-Encoding"))
+    start_message["headers"] = headers
@@ -13,6 +13,104 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "restaurant_service")
     
     DATABASE_URL: str = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    ASYNC_DATABASE_URL: str = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    
+    # Database pool settings (per engine, so per worker process)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))  # 0 disables the timeout
+    
+    # Read replicas: comma-separated database URLs that read-only routes are spread over, round
+    # robin. Each is checked every REPLICA_CHECK_SECONDS and skipped while unreachable or more than
+    # REPLICA_MAX_LAG_SECONDS behind; with none usable, reads go to the primary. A client that
+    # wrote reads from the primary for READ_YOUR_WRITES_SECONDS (a cookie set on the write)
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_CHECK_SECONDS: float = float(os.getenv("REPLICA_CHECK_SECONDS", "5"))
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    
+    # Connecting through PgBouncer in transaction pooling mode: no server-side prepared statement
+    # caching and no startup parameters (set statement_timeout on the database role instead)
+    DB_PGBOUNCER_MODE: bool = os.getenv("DB_PGBOUNCER_MODE", "false").lower() == "true"
+    
+    # Readiness probe: not ready when the database does not answer in time or when this share of
+    # the pool (size + overflow) is checked out
+    READY_TIMEOUT_SECONDS: float = float(os.getenv("READY_TIMEOUT_SECONDS", "2"))
+    READY_MAX_POOL_USAGE: float = float(os.getenv("READY_MAX_POOL_USAGE", "1.0"))
+    
+    # Admission control. Rate limiting: a token bucket per API key (sent in RATE_LIMIT_KEY_HEADER)
+    # or per client address, refilled at RATE_LIMIT_PER_SECOND up to RATE_LIMIT_BURST; over the
+    # limit is a 429. The "memory" backend counts per worker, "redis" across workers and pods. Off
+    # by default (the Kubernetes manifests turn it on): behind proxies, every client without an API
+    # key shares the proxy's address, so set RATE_LIMIT_TRUSTED_PROXIES to the number of proxies in
+    # front of the service that append to X-Forwarded-For; the client is that many entries from the right
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true"
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_PER_SECOND: float = float(os.getenv("RATE_LIMIT_PER_SECOND", "50"))
+    RATE_LIMIT_BURST: float = float(os.getenv("RATE_LIMIT_BURST", "100"))
+    RATE_LIMIT_KEY_HEADER: str = os.getenv("RATE_LIMIT_KEY_HEADER", "X-API-Key")
+    RATE_LIMIT_TRUSTED_PROXIES: int = int(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "0"))
+    # Load shedding: a 503 with Retry-After while a worker has SHED_MAX_INFLIGHT requests running
+    # or its recent pool checkouts waited over SHED_MAX_POOL_WAIT_SECONDS on average; 0 turns a check off
+    SHED_MAX_INFLIGHT: int = int(os.getenv("SHED_MAX_INFLIGHT", "200"))
+    SHED_MAX_POOL_WAIT_SECONDS: float = float(os.getenv("SHED_MAX_POOL_WAIT_SECONDS", "1"))
+    SHED_RETRY_AFTER_SECONDS: int = int(os.getenv("SHED_RETRY_AFTER_SECONDS", "1"))
+    # Largest limit a listing accepts; a streamed listing sent without a limit returns every row
+    MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+    
+    # HTTP caching: Cache-Control sent with conditional GET responses, per route. "no-cache" lets
+    # clients keep a copy but revalidate it each time, which costs a 304 when nothing changed
+    HTTP_CACHE_CONTROL_RESTAURANT: str = os.getenv("HTTP_CACHE_CONTROL_RESTAURANT", "public, no-cache")
+    
+    # Request coalescing: concurrent identical reads share one database fetch; a request waits at
+    # most SINGLEFLIGHT_WAIT_SECONDS for it, then gets a 503 with SHED_RETRY_AFTER_SECONDS
+    SINGLEFLIGHT_ENABLED: bool = os.getenv("SINGLEFLIGHT_ENABLED", "true").lower() == "true"
+    SINGLEFLIGHT_WAIT_SECONDS: float = float(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", "5"))
+    
+    # Streamed listings (NDJSON or stream=true) fetch rows from a server-side cursor this many at a time
+    STREAM_BATCH_SIZE: int = int(os.getenv("STREAM_BATCH_SIZE", "1000"))
+    
+    # Response compression: bodies under COMPRESSION_MINIMUM_SIZE bytes are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    
+    # Facet counts are served from a materialized view refreshed this many seconds after a write
+    FACETS_REFRESH_DELAY_SECONDS: float = float(os.getenv("FACETS_REFRESH_DELAY_SECONDS", "5"))
+    
+    # Idempotency-Key: responses to keyed writes are kept this long and replayed to retries. A retry
+    # waits up to IDEMPOTENCY_WAIT_SECONDS for a running original before getting a 409, and a claim
+    # left by a request that never answered is taken over after IDEMPOTENCY_LOCK_TIMEOUT_SECONDS
+    IDEMPOTENCY_ENABLED: bool = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: float = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", "60"))
+    IDEMPOTENCY_MAX_BODY_BYTES: int = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "1048576"))  # larger responses are not kept
+    
+    # Change events outbox: each write records its changes in change_events, served by GET
+    # /changes?since=, and a relay publishes them to OUTBOX_SINK: "none", "redis" (a Redis stream)
+    # or "webhook" (POST to each of the comma-separated OUTBOX_WEBHOOK_URLS, each request timing out
+    # after OUTBOX_WEBHOOK_TIMEOUT_SECONDS). A batch not published within OUTBOX_PUBLISH_TIMEOUT_SECONDS
+    # is abandoned and sent again
+    OUTBOX_SINK: str = os.getenv("OUTBOX_SINK", "none")
+    OUTBOX_WEBHOOK_URLS: str = os.getenv("OUTBOX_WEBHOOK_URLS", "")
+    OUTBOX_WEBHOOK_TIMEOUT_SECONDS: float = float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT_SECONDS", "5"))
+    OUTBOX_PUBLISH_TIMEOUT_SECONDS: float = float(os.getenv("OUTBOX_PUBLISH_TIMEOUT_SECONDS", "30"))
+    OUTBOX_REDIS_STREAM: str = os.getenv("OUTBOX_REDIS_STREAM", "restaurant:changes")
+    OUTBOX_REDIS_MAXLEN: int = int(os.getenv("OUTBOX_REDIS_MAXLEN", "100000"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "500"))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "1"))
+    OUTBOX_RETENTION_HOURS: float = float(os.getenv("OUTBOX_RETENTION_HOURS", "168"))
+    
+    # Redis, for OUTBOX_SINK=redis
+    REDIS_HOST: str = os.getenv("REDIS_HOST", "localhost")
+    REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
+    
+    # Geo search settings
+    NEARBY_MAX_RADIUS_KM: float = float(os.getenv("NEARBY_MAX_RADIUS_KM", "50"))
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key")
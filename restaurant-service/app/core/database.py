@@ -1,18 +1,290 @@
-from sqlalchemy import create_engine
+import asyncio
+import itertools
+import logging
+import math
+import re
+import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import observe_query
+
+logger = logging.getLogger(__name__)
+
+# Recent wait: moving average over checkouts, decaying with this time constant (seconds) when idle
+RECENT_WAIT_WEIGHT = 0.1
+RECENT_WAIT_DECAY_SECONDS = 10
+
+class PoolWaitStats:
+    """How long requests waited to get a connection from the pool, for /health/pool, metrics and load shedding."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+        self._recent = 0.0
+        self._recent_at = time.monotonic()
+
+    def record(self, seconds: float):
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        recent = self.recent_wait()
+        self._recent = recent + RECENT_WAIT_WEIGHT * (seconds - recent)
+        self._recent_at = time.monotonic()
+
+    def recent_wait(self) -> float:
+        """Average checkout wait of late; decays towards 0 while no checkouts happen, e.g. when all are shed."""
+        return self._recent * math.exp((self._recent_at - time.monotonic()) / RECENT_WAIT_DECAY_SECONDS)
+
+pool_wait_stats = PoolWaitStats()
+
+class TimedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited, including opening new connections."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_wait_stats.timeouts += 1
+            raise
+        finally:
+            pool_wait_stats.record(time.perf_counter() - started)
+
+def _pool_options() -> Dict[str, Any]:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        # Test connections on checkout so ones broken by a failover are replaced instead of failing a request
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def _sync_connect_args() -> Dict[str, Any]:
+    if settings.DB_STATEMENT_TIMEOUT_MS and not settings.DB_PGBOUNCER_MODE:
+        return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return {}
 
-engine = create_engine(settings.DATABASE_URL)
+def _async_connect_args() -> Dict[str, Any]:
+    if settings.DB_PGBOUNCER_MODE:
+        # A transaction pooler hands each transaction a different server connection, so prepared
+        # statements must not be cached and their names must be unique across clients
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+        }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return {}
+
+engine = create_engine(settings.DATABASE_URL, connect_args=_sync_connect_args(), **_pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine used by the API routes; the sync engine above is kept for scripts
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncPool,
+    connect_args=_async_connect_args(),
+    **_pool_options(),
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
+def _instrument(sync_engine):
+    """Time every statement for the SQL metrics; start times are stacked per connection."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        observe_query(time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _handle_error(exception_context):
+        started = exception_context.connection.info.get("query_started") if exception_context.connection else None
+        if started:
+            observe_query(time.perf_counter() - started.pop())
+
+_instrument(engine)
+_instrument(async_engine.sync_engine)
+
+# Replication lag in seconds: 0 while the replica has replayed all the WAL it received (also for a
+# server that is not a replica, e.g. a second local instance), else the age of the last replay
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+def _async_url(url: str) -> str:
+    """Replica URLs may be given as postgresql://...; the async engine needs the asyncpg driver."""
+    return re.sub(r"^postgres(ql)?(\+\w+)?://", "postgresql+asyncpg://", url.strip())
+
+class ReplicaRouter:
+    """
+    Spreads read-only sessions over the replicas round robin. A background check every
+    `check_interval` seconds takes a replica out while it is unreachable or more than `max_lag`
+    seconds behind the primary, and puts it back once it recovers. With no replica usable, reads
+    go to the primary.
+    """
+
+    def __init__(self, urls: List[str], check_interval: float = 5, max_lag: float = 10):
+        self.engines = [
+            create_async_engine(_async_url(url), poolclass=TimedAsyncPool, connect_args=_async_connect_args(), **_pool_options())
+            for url in urls
+        ]
+        for replica in self.engines:
+            _instrument(replica.sync_engine)
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.healthy = [True] * len(self.engines)
+        self.lag: List[Optional[float]] = [None] * len(self.engines)
+        self._turn = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+
+    def engine(self) -> AsyncEngine:
+        usable = [replica for replica, healthy in zip(self.engines, self.healthy) if healthy]
+        if not usable:
+            return async_engine
+        return usable[next(self._turn) % len(usable)]
+
+    def start(self):
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    async def check(self):
+        for index, replica in enumerate(self.engines):
+            try:
+                lag, reason = await asyncio.wait_for(_replica_lag(replica), self.check_interval), None
+            except Exception as exc:
+                lag, reason = None, exc
+            healthy = lag is not None and lag <= self.max_lag
+            # Logged when the state changes rather than on every failed check
+            if healthy != self.healthy[index]:
+                state = "is back" if healthy else "taken out"
+                logger.warning("Replica %s %s: %s", replica.url.render_as_string(), state, reason or f"{lag:.1f}s behind")
+            self.lag[index], self.healthy[index] = lag, healthy
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [
+            {"url": replica.url.render_as_string(), "healthy": healthy, "lag_seconds": lag, "checked_out": replica.pool.checkedout()}
+            for replica, healthy, lag in zip(self.engines, self.healthy, self.lag)
+        ]
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.engines:
+            await replica.dispose()
+
+async def _replica_lag(replica: AsyncEngine) -> float:
+    async with replica.connect() as conn:
+        return float((await conn.execute(REPLICA_LAG_QUERY)).scalar())
+
+replica_router = ReplicaRouter(
+    [url for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()],
+    check_interval=settings.REPLICA_CHECK_SECONDS,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+)
+
+# Read-your-writes: after a write, the client's reads go to the primary until this cookie's time
+READ_PRIMARY_COOKIE = "read_primary_until"
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+class ReadYourWritesMiddleware:
+    """
+    Sets the read_primary_until cookie on every successful write, so for `window` seconds the
+    client's reads go to the primary and it sees its own write while the replicas catch up.
+    """
+
+    def __init__(self, app, window: float = 5, enabled: bool = True):
+        self.app = app
+        self.window = window
+        self.enabled = enabled and window > 0
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def pin(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{READ_PRIMARY_COOKIE}={time.time() + self.window:.3f}; "
+                    f"Max-Age={math.ceil(self.window)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        await self.app(scope, receive, pin)
+
+def reads_primary(request: Request) -> bool:
+    """Whether the client wrote recently enough that its reads must see the primary."""
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def read_engine(request: Request) -> AsyncEngine:
+    """Engine for a read-only request: a replica, or the primary for a client that just wrote."""
+    return async_engine if reads_primary(request) else replica_router.engine()
+
+def pool_status() -> Dict[str, Any]:
+    """Snapshot of the async pool: connections in use and overflow, checkout wait times, and replica health."""
+    pool = async_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": pool_wait_stats.checkouts,
+        "timeouts": pool_wait_stats.timeouts,
+        "wait_seconds_total": round(pool_wait_stats.wait_seconds_total, 6),
+        "max_wait_seconds": round(pool_wait_stats.max_wait_seconds, 6),
+        "recent_wait_seconds": round(pool_wait_stats.recent_wait(), 6),
+        "replicas": replica_router.status(),
+    }
+
+async def ping_database():
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency for read-only routes: a session on a replica, or on the primary right after a write
+async def get_read_db(request: Request):
+    async with AsyncSessionLocal(bind=read_engine(request)) as db:
+        yield db
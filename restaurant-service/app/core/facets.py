@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import BigInteger, cast, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.models.restaurant import FACET_DIMENSIONS, restaurant_facets
+
+logger = logging.getLogger(__name__)
+
+async def refresh_facets():
+    # CONCURRENTLY keeps the view readable while it is rebuilt
+    async with async_engine.begin() as conn:
+        await conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY restaurant_facets"))
+
+def _average(rating_sum, rated_count) -> Optional[float]:
+    return round(rating_sum / rated_count, 2) if rated_count else None
+
+async def facet_counts(db: AsyncSession, filters: Dict[str, Optional[str]], size: int) -> Dict[str, Any]:
+    """
+    Restaurant counts and average rating per value of each facet dimension, plus the overall
+    totals, for the restaurants matching `filters`. One GROUPING SETS query over the summary view
+    answers all dimensions at once; buckets are largest first, `size` per dimension.
+    """
+    view = restaurant_facets.c
+    dimensions = [view[name] for name in FACET_DIMENSIONS]
+    query = (
+        select(
+            *dimensions,
+            func.grouping(*dimensions).label("grouping"),
+            cast(func.sum(view.restaurant_count), BigInteger).label("count"),
+            cast(func.sum(view.rated_count), BigInteger).label("rated_count"),
+            func.sum(view.rating_sum).label("rating_sum"),
+        )
+        .where(*[view[name] == value for name, value in filters.items() if value is not None])
+        .group_by(func.grouping_sets(*[tuple_(dimension) for dimension in dimensions], tuple_()))
+    )
+
+    # grouping() sets a bit for every dimension rolled up in the row, first dimension highest
+    all_bits = (1 << len(dimensions)) - 1
+    dimension_of = {all_bits ^ (1 << (len(dimensions) - 1 - index)): name for index, name in enumerate(FACET_DIMENSIONS)}
+    result: Dict[str, Any] = {"total": 0, "average_rating": None, **{name: [] for name in FACET_DIMENSIONS}}
+    for row in (await db.execute(query)).all():
+        if row.grouping == all_bits:
+            result["total"] = row.count or 0
+            result["average_rating"] = _average(row.rating_sum, row.rated_count)
+        else:
+            name = dimension_of[row.grouping]
+            result[name].append({"value": row._mapping[name], "count": row.count, "average_rating": _average(row.rating_sum, row.rated_count)})
+    for name in FACET_DIMENSIONS:
+        result[name] = sorted(result[name], key=lambda bucket: (-bucket["count"], bucket["value"] or ""))[:size]
+    return result
+
+class FacetRefresher:
+    """
+    Debounced refresh of the restaurant_facets view: a write schedules one refresh `delay` seconds
+    later, and every write until then is covered by it. A write made while a refresh is running
+    schedules the next one, so the view is never left behind the last write.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._pending: Optional[asyncio.Task] = None
+
+    def mark_dirty(self):
+        if self._pending is None:
+            self._pending = asyncio.create_task(self._refresh_later())
+
+    async def _refresh_later(self):
+        await asyncio.sleep(self.delay)
+        self._pending = None
+        try:
+            await refresh_facets()
+        except Exception as exc:
+            logger.warning("Restaurant facets refresh failed: %s", exc)
+
+facet_refresher = FacetRefresher(settings.FACETS_REFRESH_DELAY_SECONDS)
@@ -0,0 +1,100 @@
+import math
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LNG = 111.320
+
+# Geohash precision stored on each row (cells of roughly 5 m x 5 m)
+GEOHASH_PRECISION = 9
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+def encode_geohash(lat: float, lng: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode a coordinate as a geohash; nearby points share a common prefix."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """Return the (latitude, longitude) size in degrees of a geohash cell at the given precision."""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+def covering_precision(lat: float, radius_km: float) -> Optional[int]:
+    """
+    Pick the longest geohash prefix whose cells are at least `radius_km` across at this latitude,
+    so the 3 x 3 block of cells around the centre is guaranteed to contain the whole search circle.
+    Returns None when even single-character cells are too small.
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_deg, lng_deg = cell_size(precision)
+        height_km = lat_deg * KM_PER_DEGREE_LAT
+        width_km = lng_deg * KM_PER_DEGREE_LNG * math.cos(math.radians(lat))
+        if min(height_km, width_km) >= radius_km:
+            return precision
+    return None
+
+def neighbor_prefixes(lat: float, lng: float, precision: int) -> List[str]:
+    """Geohash prefixes of the cell containing the point and its eight neighbours."""
+    lat_deg, lng_deg = cell_size(precision)
+    prefixes = set()
+    for dlat in (-1, 0, 1):
+        for dlng in (-1, 0, 1):
+            cell_lat = min(max(lat + dlat * lat_deg, -90.0), 90.0 - 1e-9)
+            cell_lng = (lng + dlng * lng_deg + 180.0) % 360.0 - 180.0
+            prefixes.add(encode_geohash(cell_lat, cell_lng, precision))
+    return sorted(prefixes)
+
+def bounding_box(lat: float, lng: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Return (min_lat, max_lat, min_lng, max_lng) enclosing the search circle."""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(radius_km / (KM_PER_DEGREE_LNG * cos_lat), 180.0)
+    return max(lat - dlat, -90.0), min(lat + dlat, 90.0), lng - dlng, lng + dlng
+
+def distance_km(lat_column, lng_column, lat: float, lng: float):
+    """SQL expression for the great-circle (haversine) distance between a row and a point, in km."""
+    dlat = func.radians(lat_column - lat) / 2
+    dlng = func.radians(lng_column - lng) / 2
+    a = func.power(func.sin(dlat), 2) + math.cos(math.radians(lat)) * func.cos(func.radians(lat_column)) * func.power(func.sin(dlng), 2)
+    # least() guards asin against rounding just above 1 for antipodal points
+    return 2 * EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(a, 1.0)))
+
+def nearby_filter(lat_column, lng_column, geohash_column, lat: float, lng: float, radius_km: float):
+    """
+    WHERE clause keeping rows within `radius_km` of the point.
+
+    The geohash prefixes of the 3 x 3 cell block around the point narrow candidates through the
+    geohash index; radii too large for any geohash cell fall back to the latitude/longitude bounding
+    box alone. The haversine distance then makes the result exact.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    clauses = [lat_column.between(min_lat, max_lat)]
+    # A box crossing the antimeridian cannot be expressed as a single longitude range
+    if min_lng >= -180.0 and max_lng <= 180.0:
+        clauses.append(lng_column.between(min_lng, max_lng))
+
+    precision = covering_precision(lat, radius_km)
+    if precision is not None:
+        clauses.append(or_(*(geohash_column.like(f"{prefix}%") for prefix in neighbor_prefixes(lat, lng, precision))))
+
+    clauses.append(distance_km(lat_column, lng_column, lat, lng) <= radius_km)
+    return and_(*clauses)
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from fastapi import Request, Response
+
+def row_version(*rows) -> Optional[datetime]:
+    """Latest change of the given rows: updated_at, or created_at for rows never updated."""
+    versions = [row.updated_at or row.created_at for row in rows if row is not None]
+    versions = [version for version in versions if version is not None]
+    return max(versions) if versions else None
+
+def version_etag(resource: str, resource_id: int, version: Optional[datetime]) -> str:
+    # Weak: the tag names a row version, not a byte-exact body
+    stamp = int(version.timestamp() * 1_000_000) if version else 0
+    return f'W/"{resource}-{resource_id}-{stamp}"'
+
+def validator_headers(etag: str, last_modified: Optional[datetime], cache_control: str) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    return headers
+
+def etag_matches(if_none_match: str, etag: Optional[str]) -> bool:
+    if etag is None:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix on either side is ignored
+    strip_weak = lambda tag: tag[2:] if tag.startswith("W/") else tag
+    candidates = [strip_weak(tag.strip()) for tag in if_none_match.split(",")]
+    return "*" in candidates or strip_weak(etag) in candidates
+
+def is_not_modified(request: Optional[Request], headers: Mapping[str, str]) -> bool:
+    """Whether the request's validators show the client already holds the response with these headers."""
+    if request is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # When both are sent, If-None-Match wins and If-Modified-Since is ignored (RFC 9110 13.2.2)
+        return etag_matches(if_none_match, headers.get("ETag"))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = headers.get("Last-Modified")
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def not_modified(headers: Mapping[str, str]) -> Response:
+    return Response(status_code=304, headers=dict(headers))
@@ -0,0 +1,241 @@
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.responses import JSONResponse
+
+from app.core.admission import client_id
+from app.core.database import async_engine
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENT_METHODS = ("POST", "PUT", "PATCH")
+MAX_KEY_LENGTH = 255
+
+# Responses a client is expected to retry are not kept, so the retry runs the request again
+RETRYABLE_STATUS = 429
+
+# (fingerprint, status code, headers, body)
+StoredResponse = Tuple[str, int, List[List[str]], bytes]
+
+table = IdempotencyKey.__table__
+
+class IdempotencyMiddleware:
+    """
+    Runs a write sent with an Idempotency-Key header once and replays its response to any retry
+    with the same key, without touching the service's own tables again.
+
+    Keys are claimed in the idempotency_keys table, so retries landing on another worker or pod
+    are deduplicated too. Concurrent requests with one key on this worker wait for the running
+    one and share its response; on other workers they poll the table for up to `wait_timeout`
+    seconds and then get a 409. A claim whose request died without answering can be taken over
+    after `lock_timeout` seconds. Reusing a key for a different request is rejected with a 422.
+
+    Keys belong to the client that sent them, identified as for rate limiting (by API key in
+    `key_header`, else by address), so two clients picking the same key never see each other's
+    responses.
+    """
+
+    def __init__(
+        self,
+        app,
+        ttl: float = 86400,
+        lock_timeout: float = 60,
+        wait_timeout: float = 10,
+        max_body_size: int = 1048576,
+        key_header: str = "X-API-Key",
+        trusted_proxies: int = 0,
+        enabled: bool = True,
+    ):
+        self.app = app
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.max_body_size = max_body_size
+        self.key_header = key_header
+        self.trusted_proxies = trusted_proxies
+        self.enabled = enabled
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._last_purge = 0.0
+        self._purge: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict((key.lower(), value) for key, value in scope["headers"])
+        key = headers.get(IDEMPOTENCY_KEY_HEADER.lower().encode(), b"").decode("latin-1").strip()
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await _error(scope, receive, send, 400, f"{IDEMPOTENCY_KEY_HEADER} is longer than {MAX_KEY_LENGTH} characters")
+            return
+        key = client_id(scope, self.key_header, self.trusted_proxies) + " " + key
+
+        body = await _read_body(receive)
+        fingerprint = hashlib.sha256(
+            b"\0".join([scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body])
+        ).hexdigest()
+
+        running = self._inflight.get(key)
+        if running is not None:
+            # Same key already running on this worker: share its response rather than claim again
+            await self._replay(await asyncio.shield(running), fingerprint, scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        stored: Optional[StoredResponse] = None
+        try:
+            if await self._claim(key, fingerprint):
+                stored = await self._execute(key, fingerprint, scope, body, receive, send)
+                return
+            stored = await self._wait(key)
+            await self._replay(stored, fingerprint, scope, receive, send)
+        finally:
+            del self._inflight[key]
+            future.set_result(stored)
+
+    async def _execute(self, key: str, fingerprint: str, scope, body: bytes, receive, send) -> Optional[StoredResponse]:
+        status_code, response_headers, chunks = 500, [], []
+
+        async def capture(message):
+            nonlocal status_code, response_headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                response_headers = [[k.decode("latin-1"), v.decode("latin-1")] for k, v in message.get("headers", [])]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, _replay_receive(body, receive), capture)
+        except BaseException:
+            await self._release(key)
+            raise
+
+        response_body = b"".join(chunks)
+        if status_code >= 500 or status_code == RETRYABLE_STATUS or len(response_body) > self.max_body_size:
+            await self._release(key)
+            return None
+        stored = (fingerprint, status_code, response_headers, response_body)
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(
+                    update(table)
+                    .where(table.c.key == key)
+                    .values(status_code=status_code, headers=response_headers, body=response_body)
+                )
+        except Exception as exc:
+            logger.warning("Storing the response for idempotency key %r failed: %s", key, exc)
+        return stored
+
+    async def _claim(self, key: str, fingerprint: str) -> bool:
+        """Insert the key, or take over an expired or abandoned one; False when another request holds it."""
+        now = datetime.now(timezone.utc)
+        self._maybe_purge()
+        statement = insert(table).values(
+            key=key, fingerprint=fingerprint, created_at=now, expires_at=now + timedelta(seconds=self.ttl)
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "fingerprint": statement.excluded.fingerprint,
+                "status_code": None,
+                "headers": None,
+                "body": None,
+                "created_at": statement.excluded.created_at,
+                "expires_at": statement.excluded.expires_at,
+            },
+            where=or_(
+                table.c.expires_at < now,
+                and_(table.c.status_code.is_(None), table.c.created_at < now - timedelta(seconds=self.lock_timeout)),
+            ),
+        ).returning(table.c.key)
+        async with async_engine.begin() as conn:
+            return (await conn.execute(statement)).first() is not None
+
+    async def _wait(self, key: str) -> Optional[StoredResponse]:
+        """Poll for the response of a request holding the key elsewhere; None if it does not finish in time."""
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while True:
+            async with async_engine.connect() as conn:
+                row = (await conn.execute(
+                    select(table.c.fingerprint, table.c.status_code, table.c.headers, table.c.body).where(table.c.key == key)
+                )).first()
+            if row is not None and row.status_code is not None:
+                return (row.fingerprint, row.status_code, row.headers, row.body)
+            if row is None or time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    async def _replay(self, stored: Optional[StoredResponse], fingerprint: str, scope, receive, send):
+        if stored is None:
+            await _error(scope, receive, send, 409, "A request with this Idempotency-Key is in progress, retry later")
+            return
+        stored_fingerprint, status_code, headers, body = stored
+        if stored_fingerprint != fingerprint:
+            await _error(scope, receive, send, 422, "Idempotency-Key was already used for a different request")
+            return
+        raw_headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        raw_headers.append((REPLAYED_HEADER.lower().encode(), b"true"))
+        await send({"type": "http.response.start", "status": status_code, "headers": raw_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _release(self, key: str):
+        """Drop an unfinished claim so a retry runs the request again."""
+        try:
+            async with async_engine.begin() as conn:
+                await conn.execute(delete(table).where(table.c.key == key, table.c.status_code.is_(None)))
+        except Exception as exc:
+            logger.warning("Releasing idempotency key %r failed: %s", key, exc)
+
+    def _maybe_purge(self):
+        # At most one purge of expired keys per worker and TTL/100 seconds, off the request path
+        if time.monotonic() - self._last_purge < min(self.ttl / 100, 3600):
+            return
+        self._last_purge = time.monotonic()
+        self._purge = asyncio.create_task(_purge_expired())
+
+async def _purge_expired():
+    try:
+        async with async_engine.begin() as conn:
+            await conn.execute(delete(table).where(table.c.expires_at < datetime.now(timezone.utc)))
+    except Exception as exc:
+        logger.warning("Purging expired idempotency keys failed: %s", exc)
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+def _replay_receive(body: bytes, receive):
+    """A receive that hands the already read body to the app once, then waits for the disconnect."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+async def _error(scope, receive, send, status_code: int, detail: str):
+    await JSONResponse({"detail": detail}, status_code=status_code)(scope, receive, send)
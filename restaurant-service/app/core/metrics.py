@@ -0,0 +1,150 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route template",
+    ["method", "route", "status"],
+)
+# Summed over the live worker processes when running under gunicorn
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served", multiprocess_mode="livesum")
+REQUEST_ERRORS = Counter("http_request_errors_total", "Requests that raised instead of returning a response", ["method", "route"])
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Duration of single SQL statements",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while serving a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_TIME_PER_REQUEST = Histogram("db_time_per_request_seconds", "Time spent in SQL while serving a request", ["route"])
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class _QueryStats:
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# SQL statements run on behalf of the current request; None outside of requests (scripts, startup)
+_query_stats: ContextVar[Optional[_QueryStats]] = ContextVar("query_stats", default=None)
+
+def observe_query(seconds: float):
+    """Record one SQL statement, called from the engine event hooks in core/database.py."""
+    DB_QUERY_DURATION.observe(seconds)
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+
+def _route_label(scope) -> str:
+    """
+    Route template of the request, e.g. /api/restaurants/{restaurant_id}, so ids in URLs do not
+    explode the series count. Taken from the route the router matched; requests no route matched
+    share one label.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    # Newer FastAPI matches an included router's routes by their own path, without the router's
+    # prefix; the prefix is then what the request path has in front of the template's segments
+    return scope["path"].rsplit("/", template.count("/"))[0] + template
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request and the SQL it runs."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = {"code": 500}
+        stats = _QueryStats()
+        token = _query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            REQUEST_ERRORS.labels(method, _route_label(scope)).inc()
+            raise
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            route = _route_label(scope)
+            REQUEST_LATENCY.labels(method, route, str(status["code"])).observe(time.perf_counter() - started)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.seconds)
+            _query_stats.reset(token)
+
+class PoolCollector:
+    """Exports the async connection pool state from `pool_status()` at scrape time."""
+
+    def __init__(self, pool_status: Callable[[], Dict[str, Any]]):
+        self.pool_status = pool_status
+
+    def collect(self):
+        status = self.pool_status()
+        for name in ("size", "checked_out", "overflow", "max_overflow"):
+            yield GaugeMetricFamily(f"db_pool_{name}", f"Connection pool {name.replace('_', ' ')}", value=status[name])
+        yield CounterMetricFamily("db_pool_checkouts", "Connections handed out by the pool", value=status["checkouts"])
+        yield CounterMetricFamily("db_pool_timeouts", "Checkouts that gave up waiting for a connection", value=status["timeouts"])
+        yield CounterMetricFamily("db_pool_wait_seconds", "Time spent waiting for a connection", value=status["wait_seconds_total"])
+        yield GaugeMetricFamily("db_pool_recent_wait_seconds", "Recent average wait for a connection, as seen by load shedding", value=status["recent_wait_seconds"])
+        yield GaugeMetricFamily("db_replicas_healthy", "Read replicas currently taking reads", value=sum(r["healthy"] for r in status["replicas"]))
+
+class SingleFlightCollector:
+    """Exports how many reads a SingleFlight ran and how many were collapsed onto another one."""
+
+    def __init__(self, name: str, flight):
+        self.name = name
+        self.flight = flight
+
+    def collect(self):
+        leaders, followers = self.flight.leaders, self.flight.followers
+        yield CounterMetricFamily(f"{self.name}_singleflight_loads", f"{self.name} reads that ran the query", value=leaders)
+        yield CounterMetricFamily(f"{self.name}_singleflight_collapsed", f"{self.name} reads that shared another read's query", value=followers)
+        yield CounterMetricFamily(f"{self.name}_singleflight_timeouts", f"{self.name} reads that stopped waiting and got a 503", value=self.flight.timeouts)
+        yield GaugeMetricFamily(f"{self.name}_singleflight_collapse_ratio", f"{self.name} share of reads collapsed since start", value=followers / (leaders + followers) if leaders + followers else 0.0)
+
+# Collectors reading this process's own state at scrape time (pool, cache)
+_process_collectors: List[Any] = []
+
+def register_collector(collector):
+    REGISTRY.register(collector)
+    _process_collectors.append(collector)
+
+def metrics_response() -> Response:
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
+
+    # Under gunicorn (see gunicorn.conf.py) every worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+    # and the worker answering the scrape aggregates them. Pool and cache state only exists inside each
+    # process, so those series describe the worker that answered.
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _process_collectors:
+        registry.register(collector)
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent calls with the same key share one run of the loader and its
+    result, so a burst of identical reads costs one database query instead of one per request.
+
+    The loader runs as its own task, so the request that started it can go away (client
+    disconnect) without failing the others; loaders therefore open their own session rather than
+    using the request's. A caller waits at most `wait_timeout` seconds for someone else's run and
+    then gets a 503 with Retry-After: a slow run means the database is struggling, and running the
+    loader again for every caller that gave up would only add to its load. Nothing is kept once
+    the run finishes: this collapses concurrent requests, caching is a separate concern.
+    """
+
+    def __init__(self, wait_timeout: float = 5, retry_after: int = 1, enabled: bool = True):
+        self.wait_timeout = wait_timeout
+        self.retry_after = retry_after
+        self.enabled = enabled
+        self.leaders = 0  # calls that ran the loader
+        self.followers = 0  # calls that shared another call's run
+        self.timeouts = 0  # followers that gave up waiting and were answered with a 503
+        self._runs: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await loader()
+
+        run = self._runs.get(key)
+        if run is not None:
+            self.followers += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(run), self.wait_timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                logger.warning("Gave up waiting %ss for a coalesced load of %r", self.wait_timeout, key)
+                raise HTTPException(
+                    status_code=503,
+                    detail="Service overloaded, retry later",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+
+        self.leaders += 1
+        run = asyncio.ensure_future(loader())
+        self._runs[key] = run
+        run.add_done_callback(lambda _: self._finished(key, run))
+        return await asyncio.shield(run)
+
+    def _finished(self, key: Hashable, run: asyncio.Task):
+        self._runs.pop(key, None)
+        # Mark the outcome as retrieved even when every caller went away before it finished
+        if not run.cancelled():
+            run.exception()
+
+    def __len__(self) -> int:
+        return len(self._runs)
+
+class Once:
+    """
+    Work shared by coalesced requests that only some of them need, such as serializing a body
+    that a 304 does not send: it runs on the first `get` and later calls get the same result.
+    """
+
+    def __init__(self, compute: Callable[[], Awaitable[Any]]):
+        self._compute = compute
+        self._run: Optional[asyncio.Future] = None
+
+    async def get(self) -> Any:
+        if self._run is None:
+            self._run = asyncio.ensure_future(self._compute())
+        return await asyncio.shield(self._run)
+
+# GET /api/restaurants/{id}
+restaurant_reads = SingleFlight(
+    wait_timeout=settings.SINGLEFLIGHT_WAIT_SECONDS,
+    retry_after=settings.SHED_RETRY_AFTER_SECONDS,
+    enabled=settings.SINGLEFLIGHT_ENABLED,
+)
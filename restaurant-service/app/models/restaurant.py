@@ -1,7 +1,12 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, Float, Boolean, Text, DateTime, DDL, Index, MetaData, Table, event, literal_column
 from sqlalchemy.sql import func
 
 from app.core.database import Base
+from app.core.geo import encode_geohash
+
+def _rating_key(rating):
+    # Listing queries must build the exact same expression for Postgres to use the index on it
+    return func.coalesce(rating, literal_column("0.0"))
 
 class Restaurant(Base):
     __tablename__ = "restaurants"
@@ -21,5 +26,62 @@ class Restaurant(Base):
     price_range = Column(String)
     rating = Column(Float, default=0.0)
     is_active = Column(Boolean, default=True)
+    latitude = Column(Float)
+    longitude = Column(Float)
+    geohash = Column(String(12))  # derived from latitude/longitude, see _set_geohash
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # text_pattern_ops lets "geohash LIKE 'prefix%'" use the index whatever the database collation
+        Index("ix_restaurants_geohash", geohash, postgresql_ops={"geohash": "text_pattern_ops"}),
+        # Listings only show active restaurants; partial indexes keep inactive rows out and end on id
+        # so each filter combination is read in keyset order without a sort
+        Index("ix_restaurants_active_city_cuisine", city, cuisine_type, id, postgresql_where=is_active),
+        Index("ix_restaurants_active_rating", _rating_key(rating).desc(), id.desc(), postgresql_where=is_active),
+    )
+
+# Sort key of the best-rated-first listing
+restaurant_rating_key = _rating_key(Restaurant.__table__.c.rating)
+
+@event.listens_for(Restaurant, "before_insert")
+@event.listens_for(Restaurant, "before_update")
+def _set_geohash(mapper, connection, target):
+    if target.latitude is not None and target.longitude is not None:
+        target.geohash = encode_geohash(target.latitude, target.longitude)
+    else:
+        target.geohash = None
+
+# Grouping columns of the facet summary, in the order GET /api/restaurants/facets reports them
+FACET_DIMENSIONS = ("cuisine_type", "price_range", "city")
+
+# Active restaurants counted per (city, cuisine_type, price_range), so facet queries aggregate a few
+# thousand summary rows instead of scanning the table. It is a materialized view refreshed by
+# core/facets.py after writes, declared on its own MetaData so create_all does not make a table of it.
+restaurant_facets = Table(
+    "restaurant_facets",
+    MetaData(),
+    Column("city", String),
+    Column("cuisine_type", String),
+    Column("price_range", String),
+    Column("restaurant_count", BigInteger),
+    Column("rated_count", BigInteger),
+    Column("rating_sum", Float),
+)
+
+CREATE_RESTAURANT_FACETS = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS restaurant_facets AS
+SELECT city, cuisine_type, price_range,
+       count(*) AS restaurant_count,
+       count(rating) AS rated_count,
+       coalesce(sum(rating), 0) AS rating_sum
+FROM restaurants
+WHERE is_active
+GROUP BY city, cuisine_type, price_range
+"""
+# REFRESH ... CONCURRENTLY needs a unique index covering every row of the view
+CREATE_RESTAURANT_FACETS_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS ux_restaurant_facets ON restaurant_facets (city, cuisine_type, price_range)"
+
+event.listen(Base.metadata, "after_create", DDL(CREATE_RESTAURANT_FACETS).execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "after_create", DDL(CREATE_RESTAURANT_FACETS_INDEX).execute_if(dialect="postgresql"))
+event.listen(Base.metadata, "before_drop", DDL("DROP MATERIALIZED VIEW IF EXISTS restaurant_facets").execute_if(dialect="postgresql"))
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -23,6 +23,8 @@ class RestaurantBase(BaseModel):
     price_range: Optional[str] = Field(None, description="Price range category")
     rating: Optional[float] = Field(None, ge=0, le=5, description="Average rating (0-5)")
     is_active: bool = Field(default=True, description="Whether the restaurant is currently active")
+    latitude: Optional[float] = Field(None, ge=-90, le=90, description="Latitude in decimal degrees")
+    longitude: Optional[float] = Field(None, ge=-180, le=180, description="Longitude in decimal degrees")
 
 class RestaurantCreate(RestaurantBase):
     pass
@@ -43,3 +45,31 @@ class Restaurant(RestaurantBase):
     
     class Config:
         from_attributes = True  # This enables ORM model -> Pydantic model conversion
+
+class RestaurantNearby(Restaurant):
+    distance_km: float = Field(..., description="Great-circle distance from the search point in kilometres")
+
+class FacetBucket(BaseModel):
+    value: Optional[str] = Field(None, description="Facet value; null groups restaurants without one")
+    count: int = Field(..., description="Number of matching active restaurants")
+    average_rating: Optional[float] = Field(None, description="Average rating of the rated ones")
+
+class RestaurantFacets(BaseModel):
+    total: int = Field(..., description="Number of matching active restaurants")
+    average_rating: Optional[float] = Field(None, description="Average rating of the rated ones")
+    cuisine_type: List[FacetBucket] = Field(default_factory=list, description="Counts per cuisine type")
+    price_range: List[FacetBucket] = Field(default_factory=list, description="Counts per price range")
+    city: List[FacetBucket] = Field(default_factory=list, description="Counts per city")
+
+class ChangeEvent(BaseModel):
+    id: int = Field(..., description="Sequence number; pass the last one seen as since")
+    entity: str
+    entity_id: int
+    restaurant_id: Optional[int] = None
+    operation: str = Field(..., description="created, updated or deleted")
+    payload: Optional[Dict[str, Any]] = Field(None, description="Fields written by the change; null for deletes")
+    created_at: datetime
+
+class ChangeFeed(BaseModel):
+    events: List[ChangeEvent]
+    next_since: int = Field(..., description="since for the next request")
@@ -1,8 +1,19 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.api.routes import restaurant_router
+from app.core.admission import LoadShedMiddleware, RateLimitMiddleware, create_rate_limit_backend
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.database import ReadYourWritesMiddleware, ping_database, pool_status, pool_wait_stats, replica_router
+from app.core.idempotency import REPLAYED_HEADER, IdempotencyMiddleware
+from app.core.metrics import MetricsMiddleware, PoolCollector, SingleFlightCollector, metrics_response, register_collector
+from app.core.outbox import outbox_relay
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.singleflight import restaurant_reads
 
 app = FastAPI(
     title="Restaurant Service",
@@ -10,6 +21,45 @@ app = FastAPI(
     version="0.1.0"
 )
 
+# Idempotency-Key handling sits innermost, so it stores responses before CORS and compression touch them
+app.add_middleware(
+    IdempotencyMiddleware,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS,
+    wait_timeout=settings.IDEMPOTENCY_WAIT_SECONDS,
+    max_body_size=settings.IDEMPOTENCY_MAX_BODY_BYTES,
+    key_header=settings.RATE_LIMIT_KEY_HEADER,
+    trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
+    enabled=settings.IDEMPOTENCY_ENABLED,
+)
+
+# Successful writes pin the client's reads to the primary for a few seconds; outside idempotency so
+# a replayed write pins them again
+app.add_middleware(
+    ReadYourWritesMiddleware,
+    window=settings.READ_YOUR_WRITES_SECONDS,
+    enabled=bool(replica_router.engines),
+)
+
+# Admission control sits inside CORS, so browsers can read its 429s and 503s, and outside
+# idempotency, so rejected writes are not stored: shed load first, then limit each client's rate
+app.add_middleware(
+    RateLimitMiddleware,
+    backend=create_rate_limit_backend(),
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    key_header=settings.RATE_LIMIT_KEY_HEADER,
+    trusted_proxies=settings.RATE_LIMIT_TRUSTED_PROXIES,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
+app.add_middleware(
+    LoadShedMiddleware,
+    pool_wait=pool_wait_stats.recent_wait,
+    max_inflight=settings.SHED_MAX_INFLIGHT,
+    max_pool_wait=settings.SHED_MAX_POOL_WAIT_SECONDS,
+    retry_after=settings.SHED_RETRY_AFTER_SECONDS,
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -17,15 +67,59 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, REPLAYED_HEADER, "Retry-After"],
 )
 
+# gzip/brotli compression of responses above COMPRESSION_MINIMUM_SIZE, negotiated with Accept-Encoding
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+)
+
+# Prometheus metrics: request latency and SQL per route, pool state, collapsed reads
+app.add_middleware(MetricsMiddleware)
+register_collector(PoolCollector(pool_status))
+register_collector(SingleFlightCollector("restaurant", restaurant_reads))
+
 # Include routers
 app.include_router(restaurant_router, prefix="/api/restaurants", tags=["restaurants"])
 
+@app.on_event("startup")
+async def startup():
+    outbox_relay.start()
+    replica_router.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await outbox_relay.close()
+    await replica_router.close()
+
 @app.get("/health", tags=["health"])
 async def health_check():
-    return {"status": "healthyyeah2"}
+    return {"status": "healthy"}
+
+@app.get("/health/pool", tags=["health"])
+async def pool_health():
+    return pool_status()
+
+@app.get("/ready", tags=["health"])
+async def readiness_check():
+    pool = pool_status()
+    if pool["checked_out"] >= (pool["size"] + pool["max_overflow"]) * settings.READY_MAX_POOL_USAGE:
+        return JSONResponse(status_code=503, content={"status": "saturated", "pool": pool})
+    try:
+        await asyncio.wait_for(ping_database(), settings.READY_TIMEOUT_SECONDS)
+    except Exception as exc:
+        return JSONResponse(status_code=503, content={"status": "database unavailable", "detail": str(exc) or type(exc).__name__})
+    return {"status": "ready", "pool": pool}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
 
+# Development server; production runs gunicorn with gunicorn.conf.py
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""Initial schema
+
+The restaurants table as previously created by Base.metadata.create_all. Existing databases are
+already at this revision and only need "alembic stamp 0001".
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "restaurants",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("city", sa.String(), nullable=False),
+        sa.Column("state", sa.String(), nullable=False),
+        sa.Column("postal_code", sa.String(), nullable=False),
+        sa.Column("country", sa.String(), nullable=False),
+        sa.Column("phone", sa.String()),
+        sa.Column("email", sa.String()),
+        sa.Column("website", sa.String()),
+        sa.Column("cuisine_type", sa.String()),
+        sa.Column("price_range", sa.String()),
+        sa.Column("rating", sa.Float()),
+        sa.Column("is_active", sa.Boolean()),
+        sa.Column("latitude", sa.Float()),
+        sa.Column("longitude", sa.Float()),
+        sa.Column("geohash", sa.String(12)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_restaurants_id", "restaurants", ["id"])
+    op.create_index("ix_restaurants_name", "restaurants", ["name"])
+    op.create_index("ix_restaurants_geohash", "restaurants", ["geohash"], postgresql_ops={"geohash": "text_pattern_ops"})
+
+def downgrade():
+    op.drop_table("restaurants")
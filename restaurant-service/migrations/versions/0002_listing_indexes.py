@@ -0,0 +1,37 @@
+"""Partial listing indexes
+
+Composite indexes matching GET /api/restaurants/ for active restaurants: by city and cuisine, and
+best-rated first. Each ends on id so keyset pages are read in index order. Cuisine alone is not
+selective enough to beat walking the primary key under the page LIMIT, so it gets no index of its own.
+
+Indexes are built CONCURRENTLY so writes keep flowing while they build, which cannot happen inside a
+transaction. A concurrent build that fails leaves an invalid index behind, so each one is dropped
+first and re-running the migration after a failure simply starts that index over.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_restaurants_active_city_cuisine", ["city", "cuisine_type", "id"]),
+    ("ix_restaurants_active_rating", [sa.text("coalesce(rating, 0.0) DESC"), sa.text("id DESC")]),
+]
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            op.create_index(name, "restaurants", columns, postgresql_where=sa.text("is_active"), postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
@@ -0,0 +1,34 @@
+"""Restaurant facets summary
+
+Materialized view behind GET /api/restaurants/facets: active restaurants counted per city, cuisine
+and price range, with the rating sum and count so averages can be combined across rows. The service
+refreshes it CONCURRENTLY after writes, which needs the unique index.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW IF NOT EXISTS restaurant_facets AS
+        SELECT city, cuisine_type, price_range,
+               count(*) AS restaurant_count,
+               count(rating) AS rated_count,
+               coalesce(sum(rating), 0) AS rating_sum
+        FROM restaurants
+        WHERE is_active
+        GROUP BY city, cuisine_type, price_range
+        """
+    )
+    op.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_restaurant_facets ON restaurant_facets (city, cuisine_type, price_range)")
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS restaurant_facets")
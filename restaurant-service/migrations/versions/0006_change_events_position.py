@@ -0,0 +1,25 @@
+"""Change events position index
+
+GET /api/restaurants/changes?since= and the relay read change events in (transaction_id, id)
+order, which unlike id order never puts an event behind one already served.
+This index serves that order. It is built CONCURRENTLY, as in 0002, so writes keep flowing.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_change_events_position")
+        op.create_index("ix_change_events_position", "change_events", ["transaction_id", "id"], postgresql_concurrently=True)
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_change_events_position")
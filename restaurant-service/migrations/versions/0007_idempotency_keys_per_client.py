@@ -0,0 +1,25 @@
+"""Idempotency keys per client
+
+Keys are stored prefixed with the id of the client that sent them, so two clients sending the
+same key no longer share a stored response. Widening a varchar does not rewrite the table. Keys
+stored before this expire as usual; a retry of one of them runs once more.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.alter_column("idempotency_keys", "key", type_=sa.String(320), existing_type=sa.String(255))
+
+def downgrade():
+    # Client-prefixed keys may not fit the old width; they are only kept for retries
+    op.execute("DELETE FROM idempotency_keys")
+    op.alter_column("idempotency_keys", "key", type_=sa.String(255), existing_type=sa.String(320))
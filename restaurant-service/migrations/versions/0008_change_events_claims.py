@@ -0,0 +1,36 @@
+"""Change event claims
+
+The relay claims a batch of change events in a short transaction, publishes it after that commits
+and then marks it published, so a slow sink holds no connection or lock. claimed_until is set
+while a batch is out; the partial index holds only those rows, so checking for a batch in flight
+is cheap. Adding a nullable column does not rewrite the table, and the index is built
+CONCURRENTLY, as in 0002.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("change_events", sa.Column("claimed_until", sa.DateTime(timezone=True)))
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_change_events_claimed")
+        op.create_index(
+            "ix_change_events_claimed",
+            "change_events",
+            ["claimed_until"],
+            postgresql_where=sa.text("claimed_until IS NOT NULL"),
+            postgresql_concurrently=True,
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_change_events_claimed")
+    op.drop_column("change_events", "claimed_until")
@@ -0,0 +1,94 @@
+"""
+Concurrency benchmark for the restaurant and menu HTTP APIs.
+
+Fires GET requests at one or more running service instances with a rising number of
+concurrent clients and reports throughput and latency percentiles for each level. Point
+`--baseline-url` at a build with the old sync handlers and `--url` at the async build
+(both backed by the same local Postgres) to see where each one stops scaling:
+
+    python scripts/benchmark_concurrency.py \\
+        --baseline-url http://localhost:8000/api/restaurants/ \\
+        --url http://localhost:8010/api/restaurants/ \\
+        --concurrency 8 32 128 512 --requests 4000
+
+Requires httpx (installed with fastapi[standard]).
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List, Optional
+
+import httpx
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run_level(url: str, concurrency: int, total: int, timeout: float) -> dict:
+    """Issue `total` requests against `url` with at most `concurrency` in flight."""
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        async def worker():
+            nonlocal remaining, errors
+            while remaining > 0:
+                remaining -= 1
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "rps": total / elapsed,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        "errors": errors,
+    }
+
+async def benchmark(label: str, url: str, levels: List[int], total: int, timeout: float):
+    print(f"\n{label}: {url}")
+    print(f"{'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'mean ms':>10} {'errors':>8}")
+    best: Optional[dict] = None
+    for concurrency in levels:
+        result = await run_level(url, concurrency, total, timeout)
+        print(
+            f"{result['concurrency']:>8} {result['rps']:>10.1f} {result['p50_ms']:>10.1f} "
+            f"{result['p99_ms']:>10.1f} {result['mean_ms']:>10.1f} {result['errors']:>8}"
+        )
+        if best is None or result["rps"] > best["rps"]:
+            best = result
+    # The concurrency ceiling is where throughput stops growing with more clients
+    print(f"peak throughput {best['rps']:.1f} req/s at {best['concurrency']} concurrent clients")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the concurrency ceiling of a service endpoint")
+    parser.add_argument("--url", required=True, help="Endpoint to benchmark")
+    parser.add_argument("--baseline-url", help="Optional endpoint to benchmark first for comparison")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64, 128, 256, 512])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    args = parser.parse_args()
+
+    if args.baseline_url:
+        asyncio.run(benchmark("baseline", args.baseline_url, args.concurrency, args.requests, args.timeout))
+    asyncio.run(benchmark("candidate", args.url, args.concurrency, args.requests, args.timeout))
+
+if __name__ == "__main__":
+    main()
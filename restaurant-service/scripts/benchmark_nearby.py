@@ -0,0 +1,128 @@
+"""
+Benchmark for the "restaurants near me" query.
+
+Loads synthetic restaurants clustered around metro areas (COPY, so a million rows take seconds),
+then times the geohash-indexed nearby query used by GET /api/restaurants/nearby against a naive
+query that computes the distance to every row:
+
+    python scripts/benchmark_nearby.py --rows 1000000 --queries 500
+    python scripts/benchmark_nearby.py --skip-load --queries 500
+
+Synthetic rows are tagged with country 'Synthetic' and can be removed with --cleanup.
+"""
+import argparse
+import io
+import random
+import statistics
+import sys
+import os
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.geo import distance_km, encode_geohash, nearby_filter
+from app.models.restaurant import Restaurant
+
+SYNTHETIC_COUNTRY = "Synthetic"
+
+def metro_centres(count: int, rng: random.Random) -> List[tuple]:
+    return [(rng.uniform(-50, 60), rng.uniform(-125, 150)) for _ in range(count)]
+
+def load_rows(rows: int, metros: List[tuple], rng: random.Random, chunk_size: int = 100000):
+    """Stream synthetic restaurants into the table with COPY."""
+    columns = ("name", "address", "city", "state", "postal_code", "country", "cuisine_type", "rating", "is_active", "latitude", "longitude", "geohash")
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        written = 0
+        while written < rows:
+            buffer = io.StringIO()
+            for n in range(written, min(rows, written + chunk_size)):
+                metro = n % len(metros)
+                lat = max(-89.9, min(89.9, rng.gauss(metros[metro][0], 0.15)))
+                lng = max(-179.9, min(179.9, rng.gauss(metros[metro][1], 0.2)))
+                buffer.write(
+                    f"Synthetic {n}\t{n} Main St\tMetro {metro}\tState\t{n % 99999:05d}\t{SYNTHETIC_COUNTRY}\t"
+                    f"Cuisine {n % 15}\t{round(rng.uniform(1, 5), 1)}\tt\t{lat}\t{lng}\t{encode_geohash(lat, lng)}\n"
+                )
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY restaurants ({', '.join(columns)}) FROM STDIN", buffer)
+            written = min(rows, written + chunk_size)
+            print(f"  loaded {written}/{rows}")
+        raw.commit()
+        cursor.execute("ANALYZE restaurants")
+        raw.commit()
+    finally:
+        raw.close()
+
+def time_queries(label: str, build_query, points: List[tuple]):
+    latencies = []
+    results = 0
+    with SessionLocal() as db:
+        for lat, lng, radius in points:
+            started = time.perf_counter()
+            results += len(db.execute(build_query(lat, lng, radius)).all())
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{label:>10}: {len(points)} queries, p50 {statistics.median(latencies) * 1000:.2f} ms, "
+        f"p99 {p99 * 1000:.2f} ms, {results / len(points):.1f} rows/query"
+    )
+
+def indexed_query(lat: float, lng: float, radius: float, limit: int = 20):
+    distance = distance_km(Restaurant.latitude, Restaurant.longitude, lat, lng)
+    return (
+        select(Restaurant.id, distance.label("distance_km"))
+        .where(nearby_filter(Restaurant.latitude, Restaurant.longitude, Restaurant.geohash, lat, lng, radius))
+        .order_by(distance, Restaurant.id)
+        .limit(limit)
+    )
+
+def naive_query(lat: float, lng: float, radius: float, limit: int = 20):
+    distance = distance_km(Restaurant.latitude, Restaurant.longitude, lat, lng)
+    return select(Restaurant.id, distance.label("distance_km")).where(distance <= radius).order_by(distance, Restaurant.id).limit(limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the nearby restaurants query")
+    parser.add_argument("--rows", type=int, default=1000000, help="Synthetic restaurants to load")
+    parser.add_argument("--metros", type=int, default=200, help="Number of metro areas the rows cluster around")
+    parser.add_argument("--queries", type=int, default=200, help="Indexed queries to time")
+    parser.add_argument("--baseline-queries", type=int, default=10, help="Naive full-scan queries to time")
+    parser.add_argument("--radius", type=float, nargs="+", default=[1.0, 5.0, 10.0], help="Radii in km to sample from")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-load", action="store_true", help="Reuse previously loaded synthetic rows")
+    parser.add_argument("--cleanup", action="store_true", help="Delete the synthetic rows afterwards")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    metros = metro_centres(args.metros, rng)
+    Base.metadata.create_all(bind=engine)
+
+    if not args.skip_load:
+        print(f"Loading {args.rows} synthetic restaurants...")
+        started = time.perf_counter()
+        load_rows(args.rows, metros, rng)
+        print(f"  done in {time.perf_counter() - started:.1f}s")
+
+    def sample(count):
+        return [
+            (rng.gauss(lat, 0.05), rng.gauss(lng, 0.05), rng.choice(args.radius))
+            for lat, lng in (rng.choice(metros) for _ in range(count))
+        ]
+
+    time_queries("geohash", indexed_query, sample(args.queries))
+    if args.baseline_queries:
+        time_queries("full scan", naive_query, sample(args.baseline_queries))
+
+    if args.cleanup:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM restaurants WHERE country = :country"), {"country": SYNTHETIC_COUNTRY})
+        print("Removed synthetic rows")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark list serialization: ORM objects through the response_model against row tuples encoded
+with orjson, as GET /api/restaurants/ now does.
+
+Reads pages from the configured database, first checks that both paths produce the same JSON, then
+reports rows per second for serialization alone and for query plus serialization:
+
+    python scripts/benchmark_serialization.py --page-size 100 --iterations 200
+"""
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.api.routes import RESTAURANT_COLUMNS
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.serialization import dump_rows
+from app.models.restaurant import Restaurant as RestaurantModel
+from app.schemas.restaurant import Restaurant
+
+# What FastAPI does with response_model=List[Restaurant]: validate every object, then dump to JSON
+page_adapter = TypeAdapter(List[Restaurant])
+
+def response_model_json(restaurants) -> bytes:
+    return json.dumps(page_adapter.dump_python(page_adapter.validate_python(restaurants, from_attributes=True), mode="json")).encode()
+
+async def fetch_orm(db, page_size: int):
+    return (await db.scalars(select(RestaurantModel).order_by(RestaurantModel.id).limit(page_size))).all()
+
+async def fetch_rows(db, page_size: int):
+    return (await db.execute(select(*RESTAURANT_COLUMNS).order_by(RestaurantModel.id).limit(page_size))).all()
+
+def report(label: str, rows: int, seconds: float):
+    print(f"{label:>39}: {rows / seconds:>12,.0f} rows/s  ({seconds / max(rows, 1) * 1e6:.2f} us/row)")
+
+async def main(page_size: int, iterations: int):
+    async with AsyncSessionLocal() as db:
+        orm_page = await fetch_orm(db, page_size)
+        row_page = await fetch_rows(db, page_size)
+        if not orm_page:
+            print("No restaurants in the database; load some with scripts/create_mock_data.py first")
+            return
+        if json.loads(response_model_json(orm_page)) != json.loads(dump_rows(row_page)):
+            print("Outputs differ between the response_model and orjson paths")
+            sys.exit(1)
+        rows = len(orm_page) * iterations
+        print(f"{len(orm_page)} rows per page, {iterations} pages; outputs identical")
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            response_model_json(orm_page)
+        report("response_model (serialize)", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            dump_rows(row_page)
+        report("row tuples + orjson (serialize)", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            db.expunge_all()
+            response_model_json(await fetch_orm(db, page_size))
+        report("response_model (query + serialize)", rows, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            dump_rows(await fetch_rows(db, page_size))
+        report("row tuples + orjson (query + serialize)", rows, time.perf_counter() - started)
+    await async_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization paths")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.page_size, args.iterations))
@@ -0,0 +1,85 @@
+"""
+Check that the listing routes are served by the indexes meant for them.
+
+Each route below is called through the app, the SQL it runs is captured, and EXPLAIN is run on that
+exact statement. The check fails when none of a route's statements uses its expected index:
+
+    python scripts/check_query_plans.py
+    python scripts/check_query_plans.py --real-costs   # on production-sized data
+
+Filter values are taken from an existing active restaurant. Small development databases are cheaper to scan sequentially than through any index, so sequential
+scans are disabled for the EXPLAIN unless --real-costs is given.
+"""
+import argparse
+import asyncio
+import sys
+import os
+from typing import List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import event, select
+
+from main import app
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models.restaurant import Restaurant
+
+# (request path, index that should appear in the plan)
+CHECKS = [
+    ("/api/restaurants/?is_active=true&city={city}&cuisine_type={cuisine_type}", "ix_restaurants_active_city_cuisine"),
+    ("/api/restaurants/?is_active=true&sort=rating", "ix_restaurants_active_rating"),
+    ("/api/restaurants/nearby?lat={latitude}&lng={longitude}&radius=2", "ix_restaurants_geohash"),
+]
+
+captured: List[Tuple[str, tuple]] = []
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _capture(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT"):
+        captured.append((statement, parameters))
+
+async def explain(statement: str, parameters, real_costs: bool) -> str:
+    async with async_engine.connect() as conn:
+        if not real_costs:
+            await conn.exec_driver_sql("SET enable_seqscan = off")
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", tuple(parameters))
+        return "\n".join(row[0] for row in result)
+
+async def sample_values() -> dict:
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(
+            select(Restaurant.city, Restaurant.cuisine_type, Restaurant.latitude, Restaurant.longitude)
+            .where(Restaurant.is_active == True, Restaurant.cuisine_type.is_not(None), Restaurant.latitude.is_not(None))
+            .limit(1)
+        )).first()
+    if row is None:
+        return {"city": "Springfield", "cuisine_type": "Italian", "latitude": 40.7128, "longitude": -74.0060}
+    return row._asdict()
+
+async def main(real_costs: bool) -> int:
+    failures = 0
+    values = await sample_values()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as client:
+        for path, index in CHECKS:
+            path = path.format(**values)
+            captured.clear()
+            response = await client.get(path)
+            statements = list(captured)
+            plans = [await explain(statement, parameters, real_costs) for statement, parameters in statements]
+            if response.status_code == 200 and any(index in plan for plan in plans):
+                print(f"ok    {path} uses {index}")
+                continue
+            failures += 1
+            print(f"FAIL  {path} (HTTP {response.status_code}) does not use {index}")
+            for plan in plans:
+                print("      " + plan.replace("\n", "\n      "))
+    await async_engine.dispose()
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="EXPLAIN the listing routes and check their indexes")
+    parser.add_argument("--real-costs", action="store_true", help="Leave sequential scans enabled")
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(main(args.real_costs)) else 0)
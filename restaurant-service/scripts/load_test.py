@@ -0,0 +1,261 @@
+"""
+Load test replaying a browse-heavy read/write mix against the restaurant and menu services.
+
+Each scenario is one kind of request a storefront or kitchen makes, picked at random in
+proportion to its weight. Ids, cities and coordinates are sampled from the data already in the
+services (see scripts/create_mock_data.py), so requests hit real rows with a realistic spread:
+
+    python scripts/load_test.py --restaurant-url http://localhost:8000 --menu-url http://localhost:8001 \\
+        --concurrency 64 --duration 60
+    python scripts/load_test.py --rate 500 --duration 120 --mix browse=10 menu=6 toggle_availability=1
+    python scripts/load_test.py --read-only --json results.json
+
+By default requests are closed-loop: --concurrency clients each send the next request as soon as
+the previous one answers. With --rate requests start on a fixed schedule instead, and latency is
+measured from the scheduled start, so a slow server shows up as queueing in p99 rather than as
+fewer requests being sent. Write scenarios change data (availability flags and ratings); leave them
+out with --read-only. Requires httpx (installed with fastapi[standard]).
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmark_concurrency import percentile
+
+class Sample:
+    """Rows sampled from the running services that scenarios pick their parameters from."""
+
+    def __init__(self, restaurants: List[dict], items: List[dict]):
+        self.restaurants = restaurants
+        self.items = items
+        self.cities = sorted({r["city"] for r in restaurants})
+        self.cuisines = sorted({r["cuisine_type"] for r in restaurants if r["cuisine_type"]})
+        self.etags: Dict[int, str] = {}
+
+async def sample_rows(client: httpx.AsyncClient, url: str, fields: str, size: int, rng: random.Random) -> List[dict]:
+    """
+    `size` rows picked uniformly from the whole listing at `url`, read as an NDJSON stream and kept
+    with reservoir sampling, so ids come from the full range rather than the first page.
+    """
+    rows: List[dict] = []
+    seen = 0
+    async with client.stream("GET", url, params={"fields": fields}, headers={"Accept": "application/x-ndjson"}) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            seen += 1
+            if len(rows) < size:
+                rows.append(json.loads(line))
+            else:
+                index = rng.randrange(seen)
+                if index < size:
+                    rows[index] = json.loads(line)
+    return rows
+
+async def load_sample(client: httpx.AsyncClient, args, rng: random.Random) -> Sample:
+    restaurants = await sample_rows(
+        client, f"{args.restaurant_url}/api/restaurants/", "id,city,cuisine_type,latitude,longitude", args.sample_size, rng
+    )
+    items = await sample_rows(client, f"{args.menu_url}/api/menus/items/", "id,restaurant_id,name,is_available", args.sample_size, rng)
+    if not restaurants or not items:
+        raise SystemExit("The services have no data to sample; run scripts/create_mock_data.py first")
+    return Sample(restaurants, items)
+
+# Scenarios: each sends one request and returns the response
+Scenario = Callable[[httpx.AsyncClient, Sample, random.Random, argparse.Namespace], Awaitable[httpx.Response]]
+
+async def browse(client, sample, rng, args):
+    params = {"limit": 20, "fields": "id,name,rating,cuisine_type,price_range", "city": rng.choice(sample.cities), "is_active": "true"}
+    if rng.random() < 0.5:
+        params["cuisine_type"] = rng.choice(sample.cuisines)
+    if rng.random() < 0.3:
+        params["sort"] = "rating"
+    return await client.get(f"{args.restaurant_url}/api/restaurants/", params=params)
+
+async def nearby(client, sample, rng, args):
+    origin = rng.choice([r for r in sample.restaurants if r["latitude"] is not None] or sample.restaurants)
+    params = {"lat": origin["latitude"] or 0, "lng": origin["longitude"] or 0, "radius": rng.choice([1, 3, 5, 10]), "is_active": "true"}
+    return await client.get(f"{args.restaurant_url}/api/restaurants/nearby", params=params)
+
+async def facets(client, sample, rng, args):
+    params = {"city": rng.choice(sample.cities)} if rng.random() < 0.7 else {}
+    return await client.get(f"{args.restaurant_url}/api/restaurants/facets", params=params)
+
+async def restaurant_detail(client, sample, rng, args):
+    # Returning visitors revalidate what they already have, most of them get a 304
+    restaurant_id = rng.choice(sample.restaurants)["id"]
+    headers = {"If-None-Match": sample.etags[restaurant_id]} if restaurant_id in sample.etags else {}
+    response = await client.get(f"{args.restaurant_url}/api/restaurants/{restaurant_id}", headers=headers)
+    if "etag" in response.headers:
+        sample.etags[restaurant_id] = response.headers["etag"]
+    return response
+
+async def menu(client, sample, rng, args):
+    restaurant_id = rng.choice(sample.items)["restaurant_id"]
+    return await client.get(f"{args.menu_url}/api/menus/restaurants/{restaurant_id}/menu")
+
+async def menu_items(client, sample, rng, args):
+    params = {"restaurant_id": rng.choice(sample.items)["restaurant_id"], "is_available": "true", "limit": 50}
+    if rng.random() < 0.2:
+        params["is_vegetarian"] = "true"
+    return await client.get(f"{args.menu_url}/api/menus/items/", params=params)
+
+async def search(client, sample, rng, args):
+    words = rng.choice(sample.items)["name"].split()
+    return await client.get(f"{args.menu_url}/api/menus/search", params={"q": rng.choice(words), "limit": 20})
+
+async def toggle_availability(client, sample, rng, args):
+    item = rng.choice(sample.items)
+    item["is_available"] = not item["is_available"]
+    return await client.patch(f"{args.menu_url}/api/menus/items/{item['id']}/availability", json={"is_available": item["is_available"]})
+
+async def update_rating(client, sample, rng, args):
+    restaurant_id = rng.choice(sample.restaurants)["id"]
+    return await client.put(f"{args.restaurant_url}/api/restaurants/{restaurant_id}", json={"rating": round(rng.uniform(3, 5), 1)})
+
+SCENARIOS: Dict[str, Scenario] = {
+    "browse": browse,
+    "nearby": nearby,
+    "facets": facets,
+    "restaurant_detail": restaurant_detail,
+    "menu": menu,
+    "menu_items": menu_items,
+    "search": search,
+    "toggle_availability": toggle_availability,
+    "update_rating": update_rating,
+}
+WRITE_SCENARIOS = {"toggle_availability", "update_rating"}
+
+# Roughly a storefront's traffic: browsing and menus dominate, writes are a few percent
+DEFAULT_MIX = {
+    "browse": 30,
+    "nearby": 15,
+    "facets": 5,
+    "restaurant_detail": 15,
+    "menu": 15,
+    "menu_items": 10,
+    "search": 7,
+    "toggle_availability": 2,
+    "update_rating": 1,
+}
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def run(self, name: str, scenario: Scenario, client, sample, rng, args, started: Optional[float] = None):
+        started = time.perf_counter() if started is None else started
+        try:
+            response = await scenario(client, sample, rng, args)
+            if response.status_code >= 400:
+                self.errors[name] += 1
+        except httpx.HTTPError:
+            self.errors[name] += 1
+        self.latencies[name].append(time.perf_counter() - started)
+
+    def report(self, elapsed: float) -> List[dict]:
+        rows = []
+        for name in sorted(self.latencies, key=lambda n: -len(self.latencies[n])) + ["total"]:
+            latencies = self.latencies[name] if name != "total" else [l for values in self.latencies.values() for l in values]
+            errors = self.errors[name] if name != "total" else sum(self.errors.values())
+            rows.append({
+                "scenario": name,
+                "requests": len(latencies),
+                "rps": len(latencies) / elapsed,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "errors": errors,
+            })
+        return rows
+
+async def run_load(args, mix: Dict[str, int]) -> List[dict]:
+    rng = random.Random(args.seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    results = Results()
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        sample = await load_sample(client, args, rng)
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+
+        if args.rate:
+            # Open loop: requests start on schedule whether or not earlier ones have finished
+            tasks = set()
+            interval = 1 / args.rate
+            next_start = started
+            while next_start < deadline:
+                await asyncio.sleep(max(0.0, next_start - time.perf_counter()))
+                name = rng.choices(names, weights)[0]
+                task = asyncio.create_task(results.run(name, SCENARIOS[name], client, sample, rng, args, started=next_start))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                next_start += interval
+            await asyncio.gather(*tasks)
+        else:
+            async def worker():
+                while time.perf_counter() < deadline:
+                    name = rng.choices(names, weights)[0]
+                    await results.run(name, SCENARIOS[name], client, sample, rng, args)
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return results.report(elapsed)
+
+def parse_mix(values: Optional[List[str]], read_only: bool) -> Dict[str, int]:
+    mix = dict(DEFAULT_MIX)
+    if values:
+        mix = {}
+        for value in values:
+            name, _, weight = value.partition("=")
+            if name not in SCENARIOS:
+                raise SystemExit(f"Unknown scenario {name!r}, expected one of: {', '.join(SCENARIOS)}")
+            mix[name] = int(weight or 1)
+    if read_only:
+        mix = {name: weight for name, weight in mix.items() if name not in WRITE_SCENARIOS}
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a read/write mix against the restaurant and menu services")
+    parser.add_argument("--restaurant-url", default="http://localhost:8000")
+    parser.add_argument("--menu-url", default="http://localhost:8001")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clients (closed loop) or connection limit (with --rate)")
+    parser.add_argument("--rate", type=float, help="Requests per second to start, open loop")
+    parser.add_argument("--mix", nargs="+", metavar="SCENARIO=WEIGHT", help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--read-only", action="store_true", help="Leave out the scenarios that write")
+    parser.add_argument("--sample-size", type=int, default=1000, help="Restaurants and menu items sampled at random to pick parameters from")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    args.restaurant_url = args.restaurant_url.rstrip("/")
+    args.menu_url = args.menu_url.rstrip("/")
+
+    mix = parse_mix(args.mix, args.read_only)
+    mode = f"{args.rate:g} req/s open loop" if args.rate else f"{args.concurrency} clients"
+    print(f"Running {mode} for {args.duration:g}s, mix {mix}")
+    rows = asyncio.run(run_load(args, mix))
+
+    print(f"{'scenario':>20} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for row in rows:
+        print(
+            f"{row['scenario']:>20} {row['requests']:>9} {row['rps']:>9.1f} {row['p50_ms']:>9.1f} "
+            f"{row['p99_ms']:>9.1f} {row['errors']:>7}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"mix": mix, "rate": args.rate, "concurrency": args.concurrency, "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+
+# Settings are read at import, so point the service at its test database before anything imports
+# it. Tests that need Postgres truncate the tables they use; never run them against a real database.
+os.environ["POSTGRES_DB"] = os.environ.get("TEST_POSTGRES_DB", "restaurant_service_test")
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+from app.core.database import Base, async_engine
+from app.models import idempotency, outbox, restaurant  # noqa: F401  registers the tables
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def database():
+    engine = create_engine(settings.DATABASE_URL)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT 1"))
+    except Exception as exc:
+        pytest.skip(f"test database {settings.POSTGRES_DB} is not reachable: {exc}")
+    # Rebuilt every session, so the tables follow the models
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+async def db(database):
+    """Empty tables for the test; the async engine's connections are dropped after it, with its event loop."""
+    with database.begin() as conn:
+        conn.execute(text("TRUNCATE restaurants, change_events, idempotency_keys RESTART IDENTITY"))
+    yield async_engine
+    await async_engine.dispose()
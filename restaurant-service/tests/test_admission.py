@@ -0,0 +1,136 @@
+import asyncio
+
+import pytest
+
+from app.core import admission
+from app.core.admission import LoadShedMiddleware, MemoryBuckets, RateLimitMiddleware, client_id
+
+pytestmark = pytest.mark.anyio
+
+def http_scope(path="/api/restaurants/", headers=(), client=("10.0.0.1", 1234)):
+    return {"type": "http", "method": "GET", "path": path, "headers": list(headers), "client": client}
+
+async def call(app, scope):
+    """Run an ASGI app on `scope`; returns the response status and headers."""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start["status"], dict(start.get("headers", []))
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    return now
+
+async def test_memory_buckets_allow_the_burst_then_refill(clock):
+    buckets = MemoryBuckets()
+    assert [await buckets.take("c", rate=2, burst=3) for _ in range(3)] == [0, 0, 0]
+    assert await buckets.take("c", rate=2, burst=3) == pytest.approx(0.5)
+    clock[0] += 0.5
+    assert await buckets.take("c", rate=2, burst=3) == 0
+
+async def test_memory_buckets_drop_the_least_recently_seen_clients(clock):
+    buckets = MemoryBuckets(max_clients=2)
+    for client in ("a", "b", "c"):
+        await buckets.take(client, rate=1, burst=1)
+    assert list(buckets._buckets) == ["b", "c"]
+
+async def test_rate_limit_answers_429_with_retry_after(clock):
+    app = RateLimitMiddleware(ok, MemoryBuckets(), rate=1, burst=2)
+    assert [(await call(app, http_scope()))[0] for _ in range(2)] == [200, 200]
+    status, headers = await call(app, http_scope())
+    assert status == 429
+    assert headers[b"retry-after"] == b"1"
+
+async def test_rate_limit_skips_probes_and_can_be_disabled(clock):
+    app = RateLimitMiddleware(ok, MemoryBuckets(), rate=1, burst=1)
+    assert [(await call(app, http_scope("/health")))[0] for _ in range(3)] == [200] * 3
+    disabled = RateLimitMiddleware(ok, MemoryBuckets(), rate=1, burst=1, enabled=False)
+    assert [(await call(disabled, http_scope()))[0] for _ in range(3)] == [200] * 3
+
+async def test_rate_limit_buckets_per_api_key(clock):
+    app = RateLimitMiddleware(ok, MemoryBuckets(), rate=1, burst=1)
+    assert (await call(app, http_scope(headers=[(b"x-api-key", b"one")])))[0] == 200
+    assert (await call(app, http_scope(headers=[(b"x-api-key", b"two")])))[0] == 200
+    assert (await call(app, http_scope(headers=[(b"x-api-key", b"one")])))[0] == 429
+
+def test_client_id_ignores_x_forwarded_for_without_trusted_proxies():
+    scope = http_scope(headers=[(b"x-forwarded-for", b"203.0.113.9")])
+    assert client_id(scope, "X-API-Key") == "ip:10.0.0.1"
+
+def test_client_id_takes_the_address_the_trusted_proxies_appended():
+    # The client sent "198.51.100.7"; the two proxies in front appended the client's and the first proxy's address
+    scope = http_scope(headers=[(b"x-forwarded-for", b"198.51.100.7, 203.0.113.9"), (b"x-forwarded-for", b"10.0.0.7")])
+    assert client_id(scope, "X-API-Key", trusted_proxies=1) == "ip:10.0.0.7"
+    assert client_id(scope, "X-API-Key", trusted_proxies=2) == "ip:203.0.113.9"
+
+async def test_spoofed_x_forwarded_for_does_not_get_a_fresh_bucket(clock):
+    app = RateLimitMiddleware(ok, MemoryBuckets(), rate=1, burst=1, trusted_proxies=1)
+    statuses = [
+        (await call(app, http_scope(headers=[(b"x-forwarded-for", f"192.0.2.{i}, 203.0.113.9".encode())])))[0]
+        for i in range(3)
+    ]
+    assert statuses == [200, 429, 429]
+
+def test_client_id_falls_back_to_the_peer_with_fewer_entries_than_proxies():
+    scope = http_scope(headers=[(b"x-forwarded-for", b"203.0.113.9")])
+    assert client_id(scope, "X-API-Key", trusted_proxies=2) == "ip:10.0.0.1"
+
+def test_client_id_prefers_a_hashed_api_key():
+    keyed = http_scope(headers=[(b"x-api-key", b"secret"), (b"x-forwarded-for", b"203.0.113.9")])
+    assert client_id(keyed, "X-API-Key", trusted_proxies=1).startswith("key:")
+    assert b"secret" not in client_id(keyed, "X-API-Key").encode()
+
+async def test_shed_answers_503_once_max_inflight_requests_run():
+    release = asyncio.Event()
+
+    async def slow(scope, receive, send):
+        await release.wait()
+        await ok(scope, receive, send)
+
+    app = LoadShedMiddleware(slow, pool_wait=lambda: 0.0, max_inflight=2, retry_after=3)
+    running = [asyncio.create_task(call(app, http_scope())) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert app.inflight == 2
+    status, headers = await call(app, http_scope())
+    assert (status, headers[b"retry-after"]) == (503, b"3")
+
+    release.set()
+    assert [status for status, _ in await asyncio.gather(*running)] == [200, 200]
+    assert app.inflight == 0
+
+async def test_shed_stops_counting_a_request_once_its_response_starts():
+    # A Server-Sent Events subscriber stays open long after it started answering
+    closed = asyncio.Event()
+
+    async def stream(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream")]})
+        await closed.wait()
+        await send({"type": "http.response.body", "body": b""})
+
+    app = LoadShedMiddleware(stream, pool_wait=lambda: 0.0, max_inflight=1)
+    subscribers = [asyncio.create_task(call(app, http_scope())) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert app.inflight == 0
+    closed.set()
+    assert [status for status, _ in await asyncio.gather(*subscribers)] == [200, 200, 200]
+
+async def test_shed_answers_503_while_pool_checkouts_wait_too_long():
+    wait = [2.0]
+    app = LoadShedMiddleware(ok, pool_wait=lambda: wait[0], max_inflight=0, max_pool_wait=1)
+    assert (await call(app, http_scope()))[0] == 503
+    assert (await call(app, http_scope("/ready")))[0] == 200
+    wait[0] = 0.5
+    assert (await call(app, http_scope()))[0] == 200
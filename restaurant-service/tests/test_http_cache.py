@@ -0,0 +1,35 @@
+import httpx
+import pytest
+
+from app.core.config import settings
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+RESTAURANT = {"name": "Luigi's", "address": "1 Main St", "city": "Springfield", "state": "IL", "postal_code": "62701", "country": "US"}
+
+def client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+@pytest.fixture
+async def restaurant_id(db) -> int:
+    async with client() as api:
+        return (await api.post("/api/restaurants/", json=RESTAURANT)).json()["id"]
+
+async def test_revalidation_gets_a_304_until_the_restaurant_changes(restaurant_id):
+    async with client() as api:
+        first = await api.get(f"/api/restaurants/{restaurant_id}")
+        etag, last_modified = first.headers["etag"], first.headers["last-modified"]
+        by_etag = await api.get(f"/api/restaurants/{restaurant_id}", headers={"If-None-Match": etag})
+        by_date = await api.get(f"/api/restaurants/{restaurant_id}", headers={"If-Modified-Since": last_modified})
+        await api.put(f"/api/restaurants/{restaurant_id}", json={"name": "Mario's"})
+        changed = await api.get(f"/api/restaurants/{restaurant_id}", headers={"If-None-Match": etag})
+
+    assert first.status_code == 200
+    assert etag.startswith(f'W/"restaurant-{restaurant_id}-')
+    assert first.headers["cache-control"] == settings.HTTP_CACHE_CONTROL_RESTAURANT
+    assert (by_etag.status_code, by_etag.content, by_etag.headers["etag"]) == (304, b"", etag)
+    assert by_date.status_code == 304
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["name"] == "Mario's"
@@ -0,0 +1,93 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from app.core.idempotency import IdempotencyMiddleware, REPLAYED_HEADER
+from app.models.restaurant import Restaurant as RestaurantModel
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+RESTAURANT = {"name": "Luigi's", "address": "1 Main St", "city": "Springfield", "state": "IL", "postal_code": "62701", "country": "US"}
+
+def client_for(asgi_app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://test")
+
+async def restaurant_count(db) -> int:
+    async with db.connect() as conn:
+        return (await conn.execute(select(func.count()).select_from(RestaurantModel))).scalar()
+
+async def test_retry_replays_the_first_response(db):
+    async with client_for(app) as client:
+        first = await client.post("/api/restaurants/", json=RESTAURANT, headers={"Idempotency-Key": "create-1"})
+        retry = await client.post("/api/restaurants/", json=RESTAURANT, headers={"Idempotency-Key": "create-1"})
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert REPLAYED_HEADER not in first.headers
+    assert retry.headers[REPLAYED_HEADER] == "true"
+    assert await restaurant_count(db) == 1
+
+async def test_key_reused_for_a_different_request_is_a_422(db):
+    async with client_for(app) as client:
+        await client.post("/api/restaurants/", json=RESTAURANT, headers={"Idempotency-Key": "create-2"})
+        reused = await client.post("/api/restaurants/", json={**RESTAURANT, "name": "Mario's"}, headers={"Idempotency-Key": "create-2"})
+    assert reused.status_code == 422
+    assert await restaurant_count(db) == 1
+
+async def test_keys_belong_to_the_client_that_sent_them(db):
+    async with client_for(app) as client:
+        mine = await client.post("/api/restaurants/", json=RESTAURANT, headers={"Idempotency-Key": "k", "X-API-Key": "one"})
+        theirs = await client.post(
+            "/api/restaurants/", json={**RESTAURANT, "name": "Mario's"}, headers={"Idempotency-Key": "k", "X-API-Key": "two"}
+        )
+    assert (mine.status_code, theirs.status_code) == (200, 200)
+    assert theirs.json()["name"] == "Mario's"
+    assert REPLAYED_HEADER not in theirs.headers
+    assert await restaurant_count(db) == 2
+
+async def test_writes_without_a_key_run_every_time(db):
+    async with client_for(app) as client:
+        for _ in range(2):
+            await client.post("/api/restaurants/", json=RESTAURANT)
+    assert await restaurant_count(db) == 2
+
+async def test_key_held_by_another_worker_is_a_409(db):
+    release = asyncio.Event()
+    calls = []
+
+    async def slow_write(scope, receive, send):
+        calls.append(scope["path"])
+        await release.wait()
+        await send({"type": "http.response.start", "status": 201, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    # Two workers sharing the idempotency_keys table
+    first = IdempotencyMiddleware(slow_write, wait_timeout=5)
+    second = IdempotencyMiddleware(slow_write, wait_timeout=0.2)
+    async with client_for(first) as one, client_for(second) as other:
+        original = asyncio.create_task(one.post("/orders", json={}, headers={"Idempotency-Key": "order-1"}))
+        while not calls:
+            await asyncio.sleep(0.01)
+        busy = await other.post("/orders", json={}, headers={"Idempotency-Key": "order-1"})
+        release.set()
+        done = await original
+        replayed = await other.post("/orders", json={}, headers={"Idempotency-Key": "order-1"})
+    assert busy.status_code == 409
+    assert done.status_code == 201
+    assert (replayed.status_code, replayed.headers[REPLAYED_HEADER]) == (201, "true")
+    assert calls == ["/orders"]
+
+async def test_server_errors_are_not_replayed(db):
+    statuses = iter([500, 201])
+
+    async def flaky(scope, receive, send):
+        await send({"type": "http.response.start", "status": next(statuses), "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async with client_for(IdempotencyMiddleware(flaky)) as client:
+        failed = await client.post("/orders", json={}, headers={"Idempotency-Key": "order-2"})
+        retried = await client.post("/orders", json={}, headers={"Idempotency-Key": "order-2"})
+    assert (failed.status_code, retried.status_code) == (500, 201)
+    assert REPLAYED_HEADER not in retried.headers
@@ -0,0 +1,25 @@
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.metrics import UNMATCHED_ROUTE
+from main import app
+
+pytestmark = pytest.mark.anyio
+
+def requests_seen(route: str, status: int) -> float:
+    labels = {"method": "GET", "route": route, "status": str(status)}
+    return REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) or 0.0
+
+@pytest.mark.parametrize("path, route, status", [
+    ("/api/restaurants/12345", "/api/restaurants/{restaurant_id}", 404),
+    ("/api/restaurants/abc", "/api/restaurants/{restaurant_id}", 422),
+    ("/api/restaurants/", "/api/restaurants/", 200),
+    ("/api/nothing/here", UNMATCHED_ROUTE, 404),
+])
+async def test_requests_are_labelled_with_their_route_template(db, path, route, status):
+    before = requests_seen(route, status)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(path)
+    assert response.status_code == status
+    assert requests_seen(route, status) == before + 1
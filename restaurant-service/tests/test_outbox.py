@@ -0,0 +1,151 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, text, update
+
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.outbox import OutboxRelay, change, read_changes, table
+
+pytestmark = pytest.mark.anyio
+
+class ListSink:
+    """Keeps what it is sent; `gate`, when set, holds each publish until it is opened."""
+
+    def __init__(self, gate: Optional[asyncio.Event] = None, failures: int = 0):
+        self.batches = []
+        self.gate = gate
+        self.failures = failures
+        self.publishing = asyncio.Event()
+
+    async def publish(self, events):
+        self.publishing.set()
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("sink is down")
+        self.batches.append([e["entity_id"] for e in events])
+
+    async def close(self):
+        pass
+
+def event(entity_id: int):
+    return change("restaurant", "updated", entity_id, entity_id, {"rating": 4.5})
+
+async def feed(since: int, limit: int = 100):
+    async with AsyncSessionLocal() as db:
+        return await read_changes(db, since, limit)
+
+async def test_feed_returns_events_in_order(db):
+    async with db.begin() as conn:
+        await conn.execute(table.insert(), [event(1), event(2), event(3)])
+    page = await feed(0, limit=2)
+    assert [e["entity_id"] for e in page["events"]] == [1, 2]
+    rest = await feed(page["next_since"])
+    assert [e["entity_id"] for e in rest["events"]] == [3]
+    assert (await feed(rest["next_since"]))["events"] == []
+
+async def test_lower_id_committed_after_a_higher_one_is_not_skipped(db):
+    first, second = await db.connect(), await db.connect()
+    try:
+        early, late = await first.begin(), await second.begin()
+        await first.execute(text("SELECT txid_current()"))  # takes its transaction id first
+        await second.execute(table.insert(), [event(1)])  # draws the lower event id
+        await first.execute(table.insert(), [event(2)])
+        await early.commit()
+
+        seen = await feed(0)
+        assert [e["entity_id"] for e in seen["events"]] == [2]
+
+        await late.commit()
+        after = await feed(seen["next_since"])
+        assert [e["entity_id"] for e in after["events"]] == [1]
+    finally:
+        await first.close()
+        await second.close()
+
+async def test_uncommitted_events_are_held_back(db):
+    async with db.connect() as conn:
+        running = await conn.begin()
+        await conn.execute(table.insert(), [event(1)])
+        assert (await feed(0))["events"] == []
+        await running.commit()
+    assert [e["entity_id"] for e in (await feed(0))["events"]] == [1]
+
+async def test_purged_since_is_a_410(db):
+    async with db.begin() as conn:
+        await conn.execute(table.insert(), [event(1), event(2)])
+    since = (await feed(0, limit=1))["next_since"]
+    async with db.begin() as conn:
+        await conn.execute(delete(table).where(table.c.id == since))
+    with pytest.raises(HTTPException) as error:
+        await feed(since)
+    assert error.value.status_code == 410
+
+async def unpublished(db):
+    async with db.connect() as conn:
+        return (await conn.execute(select(table.c.entity_id).where(table.c.published_at.is_(None)).order_by(table.c.id))).scalars().all()
+
+async def test_relay_publishes_in_feed_order_and_marks_events(db):
+    async with db.begin() as conn:
+        await conn.execute(table.insert(), [event(1), event(2)])
+    relay = OutboxRelay(sink=ListSink(), batch_size=10, poll_interval=0.05)
+    relay.wake()  # before start there is no loop to wake yet
+    relay.start()
+    try:
+        for _ in range(100):
+            if relay.sink.batches:
+                break
+            await asyncio.sleep(0.05)
+        assert relay.sink.batches == [[1, 2]]
+        assert await unpublished(db) == []
+    finally:
+        await relay.close()
+
+async def test_relay_publishes_outside_the_transaction_and_one_batch_at_a_time(db):
+    async with db.begin() as conn:
+        await conn.execute(table.insert(), [event(1), event(2), event(3)])
+    gate = asyncio.Event()
+    relay, other = OutboxRelay(sink=ListSink(gate), batch_size=2), OutboxRelay(sink=ListSink(), batch_size=2)
+    publishing = asyncio.create_task(relay.relay_batch())
+    await relay.sink.publishing.wait()
+
+    # The claim is committed and no connection is held while the sink takes its time
+    assert async_engine.pool.checkedout() == 0
+    async with db.connect() as conn:
+        claimed = (await conn.execute(select(table.c.entity_id).where(table.c.claimed_until > func.now()))).scalars().all()
+    assert sorted(claimed) == [1, 2]
+    # Another worker's relay does not overtake the batch that is out
+    assert await other.relay_batch() == 0
+
+    gate.set()
+    assert await publishing == 2
+    assert await other.relay_batch() == 1
+    assert (relay.sink.batches, other.sink.batches) == ([[1, 2]], [[3]])
+    assert await unpublished(db) == []
+
+async def test_failed_or_timed_out_publish_releases_the_batch(db):
+    async with db.begin() as conn:
+        await conn.execute(table.insert(), [event(1)])
+    relay = OutboxRelay(sink=ListSink(failures=1), batch_size=10)
+    with pytest.raises(RuntimeError):
+        await relay.relay_batch()
+    assert await unpublished(db) == [1]
+
+    hanging = OutboxRelay(sink=ListSink(asyncio.Event()), batch_size=10, publish_timeout=0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        await hanging.relay_batch()
+    assert await relay.relay_batch() == 1
+    assert relay.sink.batches == [[1]]
+
+async def test_claim_of_a_relay_that_died_expires(db):
+    async with db.begin() as conn:
+        await conn.execute(table.insert(), [event(1)])
+        await conn.execute(update(table).values(claimed_until=func.now() + text("interval '1 minute'")))
+    relay = OutboxRelay(sink=ListSink(), batch_size=10)
+    assert await relay.relay_batch() == 0
+    async with db.begin() as conn:
+        await conn.execute(update(table).values(claimed_until=func.now() - text("interval '1 second'")))
+    assert await relay.relay_batch() == 1
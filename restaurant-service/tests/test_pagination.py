@@ -0,0 +1,71 @@
+import base64
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from app.core.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, keyset_filter
+from app.models.restaurant import Restaurant as RestaurantModel, restaurant_rating_key
+from main import app
+
+def forge(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+@pytest.mark.parametrize("values", [[7], [4.5, 12], [0.0, 1], ["2026-10-18T12:00:00+00:00", 3]])
+def test_cursor_round_trip(values):
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, len(values)) == values
+
+@pytest.mark.parametrize("cursor", ["%%%", forge({"id": 1}), forge([1, 2]), forge("x")])
+def test_malformed_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 1)
+    assert error.value.status_code == 400
+
+@pytest.mark.parametrize("values", [["x"], [True], [None], [1.5]])
+def test_cursor_values_must_match_the_key_types(values):
+    with pytest.raises(HTTPException) as error:
+        keyset_filter([RestaurantModel.id], forge(values))
+    assert error.value.status_code == 400
+
+def test_float_keys_accept_integral_json_numbers():
+    assert keyset_filter([restaurant_rating_key, RestaurantModel.id], forge([4, 3]), descending=True) is not None
+
+@pytest.fixture
+async def restaurants(db):
+    ratings = [None, 4.5, 3.0, 4.5, 5.0, 2.5, None, 4.5, 3.5, 1.0, 4.0, 4.5, 0.5]
+    async with db.begin() as conn:
+        await conn.execute(insert(RestaurantModel), [
+            {"name": f"R{i}", "address": "1 Main St", "city": "Springfield", "state": "IL", "postal_code": "62701",
+             "country": "US", "rating": rating, "is_active": i % 4 != 0}
+            for i, rating in enumerate(ratings)
+        ])
+    return len(ratings)
+
+async def pages(client, params):
+    ids, cursor = [], None
+    while True:
+        response = await client.get("/api/restaurants/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [row["id"] for row in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("params", [{"limit": 4}, {"limit": 4, "sort": "rating"}, {"limit": 3, "is_active": "true"}])
+async def test_listing_pages_through_every_row_once(restaurants, params):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        everything = (await client.get("/api/restaurants/", params={k: v for k, v in params.items() if k != "limit"})).json()
+        ids = await pages(client, params)
+    assert ids == [row["id"] for row in everything]
+    assert len(set(ids)) == len(ids)
+
+@pytest.mark.anyio
+async def test_forged_listing_cursor_is_a_400(restaurants):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get("/api/restaurants/", params={"cursor": forge(["x"])})
+    assert response.status_code == 400